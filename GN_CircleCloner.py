@@ -1,6 +1,11 @@
 import bpy
 import math
+from ...utils.node_utils import (add_viewport_budget_inputs, build_viewport_budget, add_culling_inputs,
+                                 build_culling, add_lod_inputs, build_instance_picking,
+                                 build_stable_id)
+from ...utils.profiling import profiled
 
+@profiled
 def circlecloner_node_group():
     """Create a radial cloner node group similar to Cinema 4D's Radial Cloner"""
     
@@ -18,7 +23,7 @@ def circlecloner_node_group():
     count_input = node_group.interface.new_socket(name="Count", in_out='INPUT', socket_type='NodeSocketInt')
     count_input.default_value = 8
     count_input.min_value = 3
-    count_input.max_value = 1000
+    count_input.max_value = 1000000
     
     radius_input = node_group.interface.new_socket(name="Radius", in_out='INPUT', socket_type='NodeSocketFloat')
     radius_input.default_value = 1.0
@@ -74,6 +79,15 @@ def circlecloner_node_group():
     pick_instance_input = node_group.interface.new_socket(name="Pick Random Instance", in_out='INPUT', socket_type='NodeSocketBool')
     pick_instance_input.default_value = False
     
+    # Distance LOD for collections
+    add_lod_inputs(node_group)
+    
+    # Culling
+    add_culling_inputs(node_group)
+    
+    # Viewport budget
+    add_viewport_budget_inputs(node_group)
+    
     # --- Nodes ---
     nodes = node_group.nodes
     links = node_group.links
@@ -115,14 +129,20 @@ def circlecloner_node_group():
     links.new(mesh_to_points.outputs["Points"], set_position.inputs["Geometry"])
     links.new(combine_height.outputs["Vector"], set_position.inputs["Offset"])
     
+    # Отсекаем невидимые камерой клоны до инстансирования
+    culled_points = build_culling(node_group, group_input, build_stable_id(node_group, set_position.outputs["Geometry"]))
+    
+    # Ограничиваем количество клонов во viewport, рендер использует полное количество
+    viewport = build_viewport_budget(node_group, group_input, culled_points, component='POINTCLOUD')
+    
     # --- 2. Инстансирование и базовые трансформации ---
     # Инстансируем объекты на точках
     instance_on_points = nodes.new('GeometryNodeInstanceOnPoints')
-    links.new(set_position.outputs["Geometry"], instance_on_points.inputs["Points"])
-    links.new(group_input.outputs["Geometry"], instance_on_points.inputs["Instance"])
+    links.new(viewport["points"], instance_on_points.inputs["Points"])
+    links.new(viewport["instance"], instance_on_points.inputs["Instance"])
     
-    # Сначала создаем необходимые ноды для случайных значений
-    index = nodes.new('GeometryNodeInputIndex')
+    # Сначала создаем необходимые ноды для случайных значений (ID = исходный индекс)
+    index = nodes.new('GeometryNodeInputID')
     
     # --- Pick Random Instance Logic (if input is a collection) ---
     pick_instance_random = nodes.new('GeometryNodeInstanceOnPoints')
@@ -132,15 +152,16 @@ def circlecloner_node_group():
     random_instance_index = nodes.new('FunctionNodeRandomValue')
     random_instance_index.data_type = 'INT'
     links.new(group_input.outputs['Random Seed'], random_instance_index.inputs['Seed'])
-    links.new(index.outputs['Index'], random_instance_index.inputs['ID'])
-    links.new(set_position.outputs["Geometry"], pick_instance_random.inputs["Points"])
-    links.new(group_input.outputs['Geometry'], pick_instance_random.inputs['Instance'])
+    links.new(index.outputs['ID'], random_instance_index.inputs['ID'])
+    links.new(viewport["points"], pick_instance_random.inputs["Points"])
+    links.new(viewport["instance"], pick_instance_random.inputs['Instance'])
     
     # Switch between normal instancing and random pick instancing
     switch_instancing = nodes.new('GeometryNodeSwitch')
     switch_instancing.name = "Switch Instance Mode"
     switch_instancing.input_type = 'GEOMETRY'
-    links.new(group_input.outputs['Pick Random Instance'], switch_instancing.inputs['Switch'])
+    pick_enabled = build_instance_picking(node_group, group_input, pick_instance_random, random_instance_index.outputs[2])
+    links.new(pick_enabled, switch_instancing.inputs['Switch'])
     links.new(instance_on_points.outputs['Instances'], switch_instancing.inputs[False])
     links.new(pick_instance_random.outputs['Instances'], switch_instancing.inputs[True])
     
@@ -179,7 +200,7 @@ def circlecloner_node_group():
     links.new(vector_neg_pos.outputs["Vector"], random_position.inputs["Min"])
     links.new(group_input.outputs["Random Position"], random_position.inputs["Max"])
     links.new(group_input.outputs["Random Seed"], random_position.inputs["Seed"])
-    links.new(index.outputs["Index"], random_position.inputs["ID"])
+    links.new(index.outputs["ID"], random_position.inputs["ID"])
     
     # Случайное вращение
     random_rotation = nodes.new('FunctionNodeRandomValue')
@@ -194,7 +215,7 @@ def circlecloner_node_group():
     links.new(vector_neg_rot.outputs["Vector"], random_rotation.inputs["Min"])
     links.new(group_input.outputs["Random Rotation"], random_rotation.inputs["Max"])
     links.new(group_input.outputs["Random Seed"], random_rotation.inputs["Seed"])
-    links.new(index.outputs["Index"], random_rotation.inputs["ID"])
+    links.new(index.outputs["ID"], random_rotation.inputs["ID"])
     
     # Случайный масштаб
     random_scale = nodes.new('FunctionNodeRandomValue')
@@ -209,7 +230,7 @@ def circlecloner_node_group():
     links.new(math_neg_scale.outputs["Value"], random_scale.inputs["Min"])
     links.new(group_input.outputs["Random Scale"], random_scale.inputs["Max"])
     links.new(group_input.outputs["Random Seed"], random_scale.inputs["Seed"])
-    links.new(index.outputs["Index"], random_scale.inputs["ID"])
+    links.new(index.outputs["ID"], random_scale.inputs["ID"])
     
     # Преобразуем случайный масштаб из float в vector
     combine_random_scale = nodes.new('ShaderNodeCombineXYZ')
@@ -0,0 +1,402 @@
+# src/fields/GN_FieldShapes.py
+import bpy
+import math
+from ...utils.profiling import profiled
+
+# Режимы смешивания полей в стеке эффектора
+FIELD_BLEND_MODES = [
+    ('ADD', "Add", "Add the field to the fields above it"),
+    ('MULTIPLY', "Multiply", "Multiply the fields above by this field"),
+    ('MAX', "Max", "Keep the stronger of the two values"),
+    ('MIN', "Min", "Keep the weaker of the two values"),
+    ('SUBTRACT', "Subtract", "Subtract the field from the fields above it"),
+]
+
+# Операция Math для каждого режима смешивания
+FIELD_BLEND_OPERATIONS = {
+    'ADD': 'ADD',
+    'MULTIPLY': 'MULTIPLY',
+    'MAX': 'MAXIMUM',
+    'MIN': 'MINIMUM',
+    'SUBTRACT': 'SUBTRACT',
+}
+
+# Пресеты кривых спадания сферического поля
+FALLOFF_CURVE_PRESETS = (
+    ("S-Curve", ((0.0, 0.0), (0.25, 0.125), (0.75, 0.875), (1.0, 1.0))),
+    ("Ease In", ((0.0, 0.0), (0.5, 0.85), (1.0, 1.0))),
+    ("Ease Out", ((0.0, 0.0), (0.5, 0.15), (1.0, 1.0))),
+)
+
+# Таблица спадания: для каждого пресета две строки (Strength = 0 и 1),
+# смешивание по Strength линейно, поэтому билинейная выборка между ними точна
+FALLOFF_LUT_NAME = ".FieldFalloffLUT"
+FALLOFF_LUT_SIZE = 256
+FALLOFF_LUT_HEIGHT = len(FALLOFF_CURVE_PRESETS) * 2
+
+# Центры крайних текселей: координата спадания 0..1 переводится сразу в них
+FALLOFF_LUT_MIN = 0.5 / FALLOFF_LUT_SIZE
+FALLOFF_LUT_MAX = 1.0 - 0.5 / FALLOFF_LUT_SIZE
+
+# Параметры полей: (имя, тип сокета, значение по умолчанию, min, max)
+STRENGTH_PARAMS = (
+    ("Inner Strength", 'NodeSocketFloat', 1.0, 0.0, 1.0),
+    ("Outer Strength", 'NodeSocketFloat', 0.0, 0.0, 1.0),
+)
+
+FIELD_SHAPE_PARAMS = {
+    'SPHERE': (
+        ("Sphere", 'NodeSocketObject', None, None, None),
+        ("Falloff", 'NodeSocketFloat', 0.0, 0.0, 1.0),
+    ) + STRENGTH_PARAMS + (
+        ("Mode", 'NodeSocketMenu', "S-Curve", None, None),
+        ("Strength", 'NodeSocketFloat', 0.0, 0.0, 1.0),
+    ),
+    'BOX': (
+        ("Gizmo", 'NodeSocketObject', None, None, None),
+        ("Falloff", 'NodeSocketFloat', 0.5, 0.0, 1.0),
+    ) + STRENGTH_PARAMS,
+    'LINEAR': (
+        ("Gizmo", 'NodeSocketObject', None, None, None),
+    ) + STRENGTH_PARAMS,
+    'RADIAL': (
+        ("Gizmo", 'NodeSocketObject', None, None, None),
+    ) + STRENGTH_PARAMS,
+    'NOISE': (
+        ("Gizmo", 'NodeSocketObject', None, None, None),
+        ("Noise Scale", 'NodeSocketFloat', 1.0, 0.0, 100.0),
+    ) + STRENGTH_PARAMS,
+}
+
+def add_float_curve(node_group, points):
+    """Create a Float Curve node with the given curve points"""
+    float_curve = node_group.nodes.new('ShaderNodeFloatCurve')
+    float_curve.mapping.extend = 'EXTRAPOLATED'
+    float_curve.mapping.use_clip = True
+    curve = float_curve.mapping.curves[0]
+    for i, location in enumerate(points):
+        point = curve.points[i] if i < len(curve.points) else curve.points.new(*location)
+        point.location = location
+        point.handle_type = 'AUTO'
+    float_curve.mapping.update()
+    return float_curve
+
+def map_range_node(node_group, value, from_min, from_max, to_min=0.0, to_max=1.0, interpolation='LINEAR'):
+    """Create a clamped float Map Range node; arguments are sockets or constants"""
+    map_range = node_group.nodes.new('ShaderNodeMapRange')
+    map_range.data_type = 'FLOAT'
+    map_range.interpolation_type = interpolation
+    map_range.clamp = True
+    for index, source in enumerate((value, from_min, from_max, to_min, to_max)):
+        if isinstance(source, (int, float)):
+            map_range.inputs[index].default_value = source
+        else:
+            node_group.links.new(source, map_range.inputs[index])
+    return map_range.outputs['Result']
+
+def evaluate_falloff_presets():
+    """Sample every falloff curve preset with Blender's own curve evaluation"""
+    scratch = bpy.data.node_groups.new(type='GeometryNodeTree', name=".FalloffLUTScratch")
+    try:
+        rows = []
+        for preset_name, points in FALLOFF_CURVE_PRESETS:
+            mapping = add_float_curve(scratch, points).mapping
+            mapping.initialize()
+            curve = mapping.curves[0]
+            rows.append([mapping.evaluate(curve, i / (FALLOFF_LUT_SIZE - 1)) for i in range(FALLOFF_LUT_SIZE)])
+        return rows
+    finally:
+        bpy.data.node_groups.remove(scratch)
+
+def get_falloff_lut():
+    """Return the packed falloff lookup image, rebaking it when the presets change"""
+    signature = repr(FALLOFF_CURVE_PRESETS)
+    image = bpy.data.images.get(FALLOFF_LUT_NAME)
+    if image is not None:
+        if image.get("presets") == signature and tuple(image.size) == (FALLOFF_LUT_SIZE, FALLOFF_LUT_HEIGHT):
+            return image
+        bpy.data.images.remove(image)
+    
+    image = bpy.data.images.new(FALLOFF_LUT_NAME, width=FALLOFF_LUT_SIZE, height=FALLOFF_LUT_HEIGHT,
+                                alpha=False, float_buffer=True)
+    image.colorspace_settings.name = 'Non-Color'
+    
+    linear = [i / (FALLOFF_LUT_SIZE - 1) for i in range(FALLOFF_LUT_SIZE)]
+    pixels = []
+    for curve_values in evaluate_falloff_presets():
+        for row in (linear, curve_values):
+            for value in row:
+                pixels.extend((value, value, value, 1.0))
+    image.pixels.foreach_set(pixels)
+    image.pack()
+    image["presets"] = signature
+    return image
+
+def build_falloff_lookup(node_group, coordinate, mode_socket, strength_socket):
+    """
+    Sample the falloff lookup table.
+    
+    coordinate must already be mapped to FALLOFF_LUT_MIN..FALLOFF_LUT_MAX. The preset
+    row only depends on the Mode and Strength inputs, so the per-sample cost is one
+    texture lookup whatever the number of presets.
+    """
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    # Меню -> номер пресета; значение одно на всю группу
+    menu_switch = nodes.new('GeometryNodeMenuSwitch')
+    menu_switch.data_type = 'INT'
+    menu_switch.enum_items.clear()
+    for index, (preset_name, points) in enumerate(FALLOFF_CURVE_PRESETS):
+        menu_switch.enum_items.new(preset_name)
+        menu_switch.inputs[index + 1].default_value = index
+    links.new(mode_socket, menu_switch.inputs[0])
+    
+    # Строка: (2 * пресет + 0.5 + Strength) / высота
+    band = nodes.new('ShaderNodeMath')
+    band.operation = 'MULTIPLY_ADD'
+    band.inputs[1].default_value = 2.0
+    band.inputs[2].default_value = 0.5
+    links.new(menu_switch.outputs[0], band.inputs[0])
+    row = nodes.new('ShaderNodeMath')
+    row.operation = 'ADD'
+    links.new(band.outputs[0], row.inputs[0])
+    links.new(strength_socket, row.inputs[1])
+    row_coordinate = nodes.new('ShaderNodeMath')
+    row_coordinate.operation = 'DIVIDE'
+    row_coordinate.inputs[1].default_value = FALLOFF_LUT_HEIGHT
+    links.new(row.outputs[0], row_coordinate.inputs[0])
+    
+    lookup_vector = nodes.new('ShaderNodeCombineXYZ')
+    links.new(coordinate, lookup_vector.inputs['X'])
+    links.new(row_coordinate.outputs[0], lookup_vector.inputs['Y'])
+    
+    image_texture = nodes.new('GeometryNodeImageTexture')
+    image_texture.interpolation = 'Linear'
+    image_texture.extension = 'EXTEND'
+    image_texture.inputs['Image'].default_value = get_falloff_lut()
+    links.new(lookup_vector.outputs['Vector'], image_texture.inputs['Vector'])
+    return image_texture.outputs['Color']
+
+def gizmo_local_position(node_group, gizmo_socket):
+    """Return the point position in the gizmo's local space (rotation and scale removed)"""
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    object_info = nodes.new('GeometryNodeObjectInfo')
+    object_info.transform_space = 'ORIGINAL'
+    links.new(gizmo_socket, object_info.inputs['Object'])
+    
+    position = nodes.new('GeometryNodeInputPosition')
+    offset = nodes.new('ShaderNodeVectorMath')
+    offset.operation = 'SUBTRACT'
+    links.new(position.outputs['Position'], offset.inputs[0])
+    links.new(object_info.outputs['Location'], offset.inputs[1])
+    
+    unrotate = nodes.new('ShaderNodeVectorRotate')
+    unrotate.rotation_type = 'EULER_XYZ'
+    unrotate.invert = True
+    links.new(offset.outputs['Vector'], unrotate.inputs['Vector'])
+    links.new(object_info.outputs['Rotation'], unrotate.inputs['Rotation'])
+    
+    local = nodes.new('ShaderNodeVectorMath')
+    local.operation = 'DIVIDE'
+    links.new(unrotate.outputs['Vector'], local.inputs[0])
+    links.new(object_info.outputs['Scale'], local.inputs[1])
+    
+    local_xyz = nodes.new('ShaderNodeSeparateXYZ')
+    links.new(local.outputs['Vector'], local_xyz.inputs[0])
+    return local, local_xyz
+
+def build_sphere_falloff(node_group, params):
+    """Sphere falloff: same distance mapping and curve presets as the SphereField group"""
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    object_info = nodes.new('GeometryNodeObjectInfo')
+    object_info.transform_space = 'ORIGINAL'
+    links.new(params["Sphere"], object_info.inputs['Object'])
+    
+    position = nodes.new('GeometryNodeInputPosition')
+    distance = nodes.new('ShaderNodeVectorMath')
+    distance.operation = 'DISTANCE'
+    links.new(position.outputs['Position'], distance.inputs[0])
+    links.new(object_info.outputs['Location'], distance.inputs[1])
+    
+    # Радиус сферы = |scale.x|
+    scale_abs = nodes.new('ShaderNodeVectorMath')
+    scale_abs.operation = 'ABSOLUTE'
+    links.new(object_info.outputs['Scale'], scale_abs.inputs[0])
+    scale_xyz = nodes.new('ShaderNodeSeparateXYZ')
+    links.new(scale_abs.outputs['Vector'], scale_xyz.inputs[0])
+    
+    inner_limit = nodes.new('ShaderNodeMath')
+    inner_limit.operation = 'MULTIPLY'
+    inner_limit.inputs[1].default_value = 0.999
+    links.new(scale_xyz.outputs['X'], inner_limit.inputs[0])
+    inner_radius = map_range_node(node_group, params["Falloff"], 0.0, 1.0, 0.0, inner_limit.outputs['Value'])
+    
+    # Расстояние сразу переводится в координату текселя таблицы спадания
+    coordinate = map_range_node(node_group, distance.outputs['Value'], scale_xyz.outputs['X'], inner_radius,
+                                FALLOFF_LUT_MIN, FALLOFF_LUT_MAX)
+    return build_falloff_lookup(node_group, coordinate, params["Mode"], params["Strength"])
+
+def build_box_falloff(node_group, params):
+    """Box falloff: 1 inside the unit box of the gizmo, fading out to its faces"""
+    nodes = node_group.nodes
+    local, local_xyz = gizmo_local_position(node_group, params["Gizmo"])
+    
+    # Расстояние Чебышёва до центра в локальных координатах
+    max_xy = nodes.new('ShaderNodeMath')
+    max_xy.operation = 'MAXIMUM'
+    max_xyz = nodes.new('ShaderNodeMath')
+    max_xyz.operation = 'MAXIMUM'
+    abs_nodes = []
+    for axis in ('X', 'Y', 'Z'):
+        axis_abs = nodes.new('ShaderNodeMath')
+        axis_abs.operation = 'ABSOLUTE'
+        node_group.links.new(local_xyz.outputs[axis], axis_abs.inputs[0])
+        abs_nodes.append(axis_abs)
+    node_group.links.new(abs_nodes[0].outputs[0], max_xy.inputs[0])
+    node_group.links.new(abs_nodes[1].outputs[0], max_xy.inputs[1])
+    node_group.links.new(max_xy.outputs[0], max_xyz.inputs[0])
+    node_group.links.new(abs_nodes[2].outputs[0], max_xyz.inputs[1])
+    
+    inner_edge = nodes.new('ShaderNodeMath')
+    inner_edge.operation = 'MULTIPLY'
+    inner_edge.inputs[1].default_value = 0.999
+    node_group.links.new(params["Falloff"], inner_edge.inputs[0])
+    return map_range_node(node_group, max_xyz.outputs[0], 1.0, inner_edge.outputs[0], interpolation='SMOOTHSTEP')
+
+def build_linear_falloff(node_group, params):
+    """Linear falloff: gradient along the gizmo's local Z from -1 to +1"""
+    local, local_xyz = gizmo_local_position(node_group, params["Gizmo"])
+    return map_range_node(node_group, local_xyz.outputs['Z'], -1.0, 1.0)
+
+def build_radial_falloff(node_group, params):
+    """Radial falloff: angle around the gizmo's local Z mapped to 0..1"""
+    local, local_xyz = gizmo_local_position(node_group, params["Gizmo"])
+    angle = node_group.nodes.new('ShaderNodeMath')
+    angle.operation = 'ARCTAN2'
+    node_group.links.new(local_xyz.outputs['Y'], angle.inputs[0])
+    node_group.links.new(local_xyz.outputs['X'], angle.inputs[1])
+    return map_range_node(node_group, angle.outputs[0], -math.pi, math.pi)
+
+def build_noise_falloff(node_group, params):
+    """Noise falloff: 3D noise in the gizmo's local space"""
+    local, local_xyz = gizmo_local_position(node_group, params["Gizmo"])
+    noise = node_group.nodes.new('ShaderNodeTexNoise')
+    noise.noise_dimensions = '3D'
+    node_group.links.new(local.outputs['Vector'], noise.inputs['Vector'])
+    node_group.links.new(params["Noise Scale"], noise.inputs['Scale'])
+    return noise.outputs['Fac']
+
+FIELD_FALLOFF_BUILDERS = {
+    'SPHERE': build_sphere_falloff,
+    'BOX': build_box_falloff,
+    'LINEAR': build_linear_falloff,
+    'RADIAL': build_radial_falloff,
+    'NOISE': build_noise_falloff,
+}
+
+def build_field_value(node_group, shape, params):
+    """Build the falloff of a field shape remapped to Outer..Inner Strength; returns the value socket"""
+    falloff = FIELD_FALLOFF_BUILDERS[shape](node_group, params)
+    return map_range_node(node_group, falloff, 0.0, 1.0, params["Outer Strength"], params["Inner Strength"])
+
+def add_field_shape_inputs(node_group, shape, name_prefix=""):
+    """Add the parameter sockets of a field shape; returns {parameter name: interface socket}"""
+    sockets = {}
+    for name, socket_type, default, min_value, max_value in FIELD_SHAPE_PARAMS[shape]:
+        socket = node_group.interface.new_socket(name=f"{name_prefix}{name}", in_out='INPUT', socket_type=socket_type)
+        if default is not None and socket_type != 'NodeSocketMenu':
+            socket.default_value = default
+        if min_value is not None:
+            socket.min_value = min_value
+            socket.max_value = max_value
+        sockets[name] = socket
+    return sockets
+
+def set_menu_defaults(node_group, shape, sockets):
+    """Menu sockets only accept a default once they are linked to a Menu Switch"""
+    for name, socket_type, default, min_value, max_value in FIELD_SHAPE_PARAMS[shape]:
+        if socket_type == 'NodeSocketMenu' and default is not None:
+            try:
+                sockets[name].default_value = default
+            except Exception as e:
+                print(f"Не удалось установить значение меню {name}: {e}")
+
+def fieldshape_node_group(shape, group_name):
+    """Create a field modifier group for a shape: Geometry passthrough plus a per-point Field output"""
+    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name=group_name)
+    node_group.is_modifier = True
+    
+    # Geometry должен быть первым выходом
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    node_group.interface.new_socket(name="Field", in_out='OUTPUT', socket_type='NodeSocketFloat')
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    sockets = add_field_shape_inputs(node_group, shape)
+    
+    group_input = node_group.nodes.new('NodeGroupInput')
+    group_output = node_group.nodes.new('NodeGroupOutput')
+    group_input.location = (-600, 0)
+    group_output.location = (600, 0)
+    node_group.links.new(group_input.outputs['Geometry'], group_output.inputs['Geometry'])
+    
+    params = {name: group_input.outputs[name] for name in sockets}
+    node_group.links.new(build_field_value(node_group, shape, params), group_output.inputs['Field'])
+    set_menu_defaults(node_group, shape, sockets)
+    return node_group
+
+@profiled
+def boxfield_node_group():
+    return fieldshape_node_group('BOX', "BoxField")
+
+@profiled
+def linearfield_node_group():
+    return fieldshape_node_group('LINEAR', "LinearField")
+
+@profiled
+def radialfield_node_group():
+    return fieldshape_node_group('RADIAL', "RadialField")
+
+@profiled
+def noisefield_node_group():
+    return fieldshape_node_group('NOISE', "NoiseField")
+
+# Префикс нод-группы поля -> (форма, билдер, подпись, тип отображения гизмо)
+# SphereField строится своим модулем, в стеке используется build_sphere_falloff
+FIELD_SHAPE_GROUPS = {
+    "SphereField": ('SPHERE', None, "Sphere Field", 'SPHERE'),
+    "BoxField": ('BOX', boxfield_node_group, "Box Field", 'CUBE'),
+    "LinearField": ('LINEAR', linearfield_node_group, "Linear Field", 'SINGLE_ARROW'),
+    "RadialField": ('RADIAL', radialfield_node_group, "Radial Field", 'CIRCLE'),
+    "NoiseField": ('NOISE', noisefield_node_group, "Noise Field", 'CUBE'),
+}
+
+def get_field_shape(field_group):
+    """Return the shape of a field node group, or None if it is not a field"""
+    for prefix, (shape, creator, label, display_type) in FIELD_SHAPE_GROUPS.items():
+        if field_group.name.startswith(prefix):
+            return shape
+    return None
+
+def update_field_blend_mode(self, context):
+    """Recompile the field stacks of the active object's cloners"""
+    obj = context.active_object
+    if obj is None:
+        return
+    from ...utils.update_scheduler import update_scheduler
+    update_scheduler.mark_object(obj)
+
+def register():
+    bpy.types.GeometryNodeTree.field_blend_mode = bpy.props.EnumProperty(
+        name="Blend",
+        description="How this field combines with the fields above it in an effector's field stack",
+        items=FIELD_BLEND_MODES,
+        default='MAX',
+        update=update_field_blend_mode,
+    )
+
+def unregister():
+    del bpy.types.GeometryNodeTree.field_blend_mode
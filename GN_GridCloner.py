@@ -1,6 +1,15 @@
 import bpy
 import mathutils
+from ...utils.node_utils import (add_viewport_budget_inputs, build_viewport_budget, add_culling_inputs,
+                                 build_culling, add_lod_inputs, build_instance_picking,
+                                 build_stable_id)
+from ...utils.profiling import profiled
 
+# Индекс точки раскладывается на (x, y, z) float32-математикой, которая точна
+# только до 2^24 точек; Count Z ограничивается так, чтобы X*Y*Z не превышало лимит
+MAX_GRID_POINTS = 2 ** 24
+
+@profiled
 def gridcloner3d_node_group():
     """Create an advanced 3D grid cloner node group with centering and 2D/3D switch"""
 
@@ -18,17 +27,17 @@ def gridcloner3d_node_group():
     count_x_input = node_group.interface.new_socket(name="Count X", in_out='INPUT', socket_type='NodeSocketInt')
     count_x_input.default_value = 3
     count_x_input.min_value = 1
-    count_x_input.max_value = 100
+    count_x_input.max_value = 1000
 
     count_y_input = node_group.interface.new_socket(name="Count Y", in_out='INPUT', socket_type='NodeSocketInt')
     count_y_input.default_value = 3
     count_y_input.min_value = 1
-    count_y_input.max_value = 100
+    count_y_input.max_value = 1000
 
     count_z_input = node_group.interface.new_socket(name="Count Z", in_out='INPUT', socket_type='NodeSocketInt')
     count_z_input.default_value = 1 # Default to 1 for a 2D grid initially
     count_z_input.min_value = 1
-    count_z_input.max_value = 100
+    count_z_input.max_value = 1000
 
     spacing_input = node_group.interface.new_socket(name="Spacing", in_out='INPUT', socket_type='NodeSocketVector')
     spacing_input.default_value = (1.0, 1.0, 1.0)
@@ -84,6 +93,15 @@ def gridcloner3d_node_group():
     # Grid options
     center_grid_input = node_group.interface.new_socket(name="Center Grid", in_out='INPUT', socket_type='NodeSocketBool')
     center_grid_input.default_value = False
+    
+    # Distance LOD for collections
+    add_lod_inputs(node_group)
+    
+    # Culling
+    add_culling_inputs(node_group)
+    
+    # Viewport budget
+    add_viewport_budget_inputs(node_group)
 
     # --- Nodes ---
     nodes = node_group.nodes
@@ -100,91 +118,91 @@ def gridcloner3d_node_group():
     links.new(group_input.outputs['Spacing'], spacing_multiplier.inputs[0])
     
     # --- Point Generation Logic ---
-
+    
     # Separate Spacing (now using multiplied spacing)
     separate_xyz_spacing = nodes.new('ShaderNodeSeparateXYZ')
     links.new(spacing_multiplier.outputs['Vector'], separate_xyz_spacing.inputs['Vector'])
-
-    # Create 2D grid using Mesh Line technique instead of Mesh Grid
-    # This ensures consistent spacing between points
-
-    # Step 1: Create a line of points along X axis with correct spacing
-    line_x = nodes.new('GeometryNodeMeshLine')
-    line_x.name = "Line X Points"
-    line_x.mode = 'OFFSET'  # Use OFFSET mode for consistent spacing
-    line_x.count_mode = 'TOTAL'
-    links.new(group_input.outputs['Count X'], line_x.inputs['Count'])
-    
-    # Create offset vector for X axis (Spacing X, 0, 0)
-    combine_x_offset = nodes.new('ShaderNodeCombineXYZ')
-    links.new(separate_xyz_spacing.outputs['X'], combine_x_offset.inputs['X'])
-    combine_x_offset.inputs['Y'].default_value = 0.0
-    combine_x_offset.inputs['Z'].default_value = 0.0
-    links.new(combine_x_offset.outputs['Vector'], line_x.inputs['Offset'])
-    
-    # Step 2: Create a line of points along Y axis with correct spacing
-    line_y = nodes.new('GeometryNodeMeshLine')
-    line_y.name = "Line Y Points"
-    line_y.mode = 'OFFSET'
-    line_y.count_mode = 'TOTAL'
-    links.new(group_input.outputs['Count Y'], line_y.inputs['Count'])
-    
-    # Create offset vector for Y axis (0, Spacing Y, 0)
-    combine_y_offset = nodes.new('ShaderNodeCombineXYZ')
-    combine_y_offset.inputs['X'].default_value = 0.0
-    links.new(separate_xyz_spacing.outputs['Y'], combine_y_offset.inputs['Y'])
-    combine_y_offset.inputs['Z'].default_value = 0.0
-    links.new(combine_y_offset.outputs['Vector'], line_y.inputs['Offset'])
-    
-    # Step 3: Instance line_x along line_y to create a 2D grid
-    instance_x_on_y = nodes.new('GeometryNodeInstanceOnPoints')
-    instance_x_on_y.name = "Instance X on Y"
-    links.new(line_y.outputs['Mesh'], instance_x_on_y.inputs['Points'])
-    links.new(line_x.outputs['Mesh'], instance_x_on_y.inputs['Instance'])
-    
-    # Realize the 2D grid instances
-    realize_2d_grid = nodes.new('GeometryNodeRealizeInstances')
-    realize_2d_grid.name = "Realize 2D Grid"
-    links.new(instance_x_on_y.outputs['Instances'], realize_2d_grid.inputs['Geometry'])
-    
-    # Step 4: Create a line along Z axis with correct spacing
-    line_z = nodes.new('GeometryNodeMeshLine')
-    line_z.name = "Line Z Points"
-    line_z.mode = 'OFFSET'
-    line_z.count_mode = 'TOTAL'
-    links.new(group_input.outputs['Count Z'], line_z.inputs['Count'])
-    
-    # Create offset vector for Z axis (0, 0, Spacing Z)
-    combine_z_offset = nodes.new('ShaderNodeCombineXYZ')
-    combine_z_offset.inputs['X'].default_value = 0.0
-    combine_z_offset.inputs['Y'].default_value = 0.0
-    links.new(separate_xyz_spacing.outputs['Z'], combine_z_offset.inputs['Z'])
-    links.new(combine_z_offset.outputs['Vector'], line_z.inputs['Offset'])
-    
-    # Step 5: Instance the 2D grid along the Z line to create a 3D grid
-    instance_2d_on_z = nodes.new('GeometryNodeInstanceOnPoints')
-    instance_2d_on_z.name = "Instance 2D on Z"
-    links.new(line_z.outputs['Mesh'], instance_2d_on_z.inputs['Points'])
-    links.new(realize_2d_grid.outputs['Geometry'], instance_2d_on_z.inputs['Instance'])
-    
-    # Realize the 3D grid instances
-    realize_3d_grid = nodes.new('GeometryNodeRealizeInstances')
-    realize_3d_grid.name = "Realize 3D Grid"
-    links.new(instance_2d_on_z.outputs['Instances'], realize_3d_grid.inputs['Geometry'])
-    
-    # Switch between 2D grid (if Count Z = 1) and 3D grid (if Count Z > 1)
-    compare_z_count = nodes.new('FunctionNodeCompare')
-    compare_z_count.data_type = 'INT'
-    compare_z_count.operation = 'GREATER_THAN'
-    compare_z_count.inputs[3].default_value = 1  # Compare with 1
-    links.new(group_input.outputs['Count Z'], compare_z_count.inputs[2])  # Input A
-    
-    switch_points = nodes.new('GeometryNodeSwitch')
-    switch_points.name = "Switch 2D/3D Points"
-    switch_points.input_type = 'GEOMETRY'
-    links.new(compare_z_count.outputs['Result'], switch_points.inputs['Switch'])
-    links.new(realize_2d_grid.outputs['Geometry'], switch_points.inputs[False])  # Use 2D if Count Z = 1
-    links.new(realize_3d_grid.outputs['Geometry'], switch_points.inputs[True])  # Use 3D if Count Z > 1
+    
+    # Points are generated directly from their index in a single Points node:
+    # no intermediate mesh lines, instancing or realize steps.
+    # Index order (X fastest, then Y, then Z) matches the old realized grid,
+    # so per-index random values are unchanged.
+    
+    # Total point count: Count X * Count Y * Count Z
+    count_xy = nodes.new('ShaderNodeMath')
+    count_xy.name = "Count XY"
+    count_xy.operation = 'MULTIPLY'
+    links.new(group_input.outputs['Count X'], count_xy.inputs[0])
+    links.new(group_input.outputs['Count Y'], count_xy.inputs[1])
+    
+    # Layers that fit into MAX_GRID_POINTS: floor(2^24 / (X * Y)), exact in float32
+    max_layers = nodes.new('ShaderNodeMath')
+    max_layers.operation = 'DIVIDE'
+    max_layers.inputs[0].default_value = MAX_GRID_POINTS
+    links.new(count_xy.outputs['Value'], max_layers.inputs[1])
+    
+    max_layers_floor = nodes.new('ShaderNodeMath')
+    max_layers_floor.operation = 'FLOOR'
+    links.new(max_layers.outputs['Value'], max_layers_floor.inputs[0])
+    
+    count_z = nodes.new('ShaderNodeMath')
+    count_z.name = "Count Z Clamped"
+    count_z.operation = 'MINIMUM'
+    links.new(group_input.outputs['Count Z'], count_z.inputs[0])
+    links.new(max_layers_floor.outputs['Value'], count_z.inputs[1])
+    
+    count_total = nodes.new('ShaderNodeMath')
+    count_total.name = "Count Total"
+    count_total.operation = 'MULTIPLY'
+    links.new(count_xy.outputs['Value'], count_total.inputs[0])
+    links.new(count_z.outputs['Value'], count_total.inputs[1])
+    
+    # Index of the point being generated
+    grid_index = nodes.new('GeometryNodeInputIndex')
+    grid_index.name = "Grid Index"
+    
+    # X = index mod Count X
+    grid_x = nodes.new('ShaderNodeMath')
+    grid_x.operation = 'FLOORED_MODULO'
+    links.new(grid_index.outputs['Index'], grid_x.inputs[0])
+    links.new(group_input.outputs['Count X'], grid_x.inputs[1])
+    
+    # Y = floor(index / Count X) mod Count Y
+    row_index = nodes.new('ShaderNodeMath')
+    row_index.operation = 'DIVIDE'
+    links.new(grid_index.outputs['Index'], row_index.inputs[0])
+    links.new(group_input.outputs['Count X'], row_index.inputs[1])
+    
+    row_floor = nodes.new('ShaderNodeMath')
+    row_floor.operation = 'FLOOR'
+    links.new(row_index.outputs['Value'], row_floor.inputs[0])
+    
+    grid_y = nodes.new('ShaderNodeMath')
+    grid_y.operation = 'FLOORED_MODULO'
+    links.new(row_floor.outputs['Value'], grid_y.inputs[0])
+    links.new(group_input.outputs['Count Y'], grid_y.inputs[1])
+    
+    # Z = floor(index / (Count X * Count Y))
+    layer_index = nodes.new('ShaderNodeMath')
+    layer_index.operation = 'DIVIDE'
+    links.new(grid_index.outputs['Index'], layer_index.inputs[0])
+    links.new(count_xy.outputs['Value'], layer_index.inputs[1])
+    
+    grid_z = nodes.new('ShaderNodeMath')
+    grid_z.operation = 'FLOOR'
+    links.new(layer_index.outputs['Value'], grid_z.inputs[0])
+    
+    # Grid coordinate * spacing
+    grid_coordinate = nodes.new('ShaderNodeCombineXYZ')
+    grid_coordinate.name = "Grid Coordinate"
+    links.new(grid_x.outputs['Value'], grid_coordinate.inputs['X'])
+    links.new(grid_y.outputs['Value'], grid_coordinate.inputs['Y'])
+    links.new(grid_z.outputs['Value'], grid_coordinate.inputs['Z'])
+    
+    grid_position = nodes.new('ShaderNodeVectorMath')
+    grid_position.operation = 'MULTIPLY'
+    links.new(grid_coordinate.outputs['Vector'], grid_position.inputs[0])
+    links.new(spacing_multiplier.outputs['Vector'], grid_position.inputs[1])
     
     # --- Centering Logic ---
     # Calculate offset for centering the grid based on the total size
@@ -215,7 +233,7 @@ def gridcloner3d_node_group():
     count_z_minus_one = nodes.new('ShaderNodeMath')
     count_z_minus_one.operation = 'SUBTRACT'
     count_z_minus_one.inputs[1].default_value = 1.0
-    links.new(group_input.outputs['Count Z'], count_z_minus_one.inputs[0])
+    links.new(count_z.outputs['Value'], count_z_minus_one.inputs[0])
     
     total_size_z = nodes.new('ShaderNodeMath')
     total_size_z.operation = 'MULTIPLY'
@@ -263,21 +281,37 @@ def gridcloner3d_node_group():
     links.new(zero_vector.outputs['Vector'], center_switch.inputs[False])  # No centering
     links.new(negate_center.outputs['Vector'], center_switch.inputs[True])  # With centering
     
-    # Apply the centering offset to the grid points
-    set_grid_center = nodes.new('GeometryNodeSetPosition')
-    set_grid_center.name = "Center Grid Points"
-    links.new(switch_points.outputs['Output'], set_grid_center.inputs['Geometry'])
-    links.new(center_switch.outputs['Output'], set_grid_center.inputs['Offset'])
+    # Centering is folded into the point position math
+    centered_position = nodes.new('ShaderNodeVectorMath')
+    centered_position.operation = 'ADD'
+    links.new(grid_position.outputs['Vector'], centered_position.inputs[0])
+    links.new(center_switch.outputs['Output'], centered_position.inputs[1])
+    
+    # Generate all grid points in one step
+    grid_points = nodes.new('GeometryNodePoints')
+    grid_points.name = "Grid Points"
+    links.new(count_total.outputs['Value'], grid_points.inputs['Count'])
+    links.new(centered_position.outputs['Vector'], grid_points.inputs['Position'])
+    
+    # Stable per-clone id hashed from the grid cell, so resizing keeps random values
+    grid_ids = build_stable_id(node_group, grid_points.outputs[0],
+                               (grid_x.outputs['Value'], grid_y.outputs['Value'], grid_z.outputs['Value']))
+    
+    # Drop clones the camera cannot see before anything is instanced
+    culled_points = build_culling(node_group, group_input, grid_ids)
+    
+    # Limit clones shown in the viewport, render uses the full grid
+    viewport = build_viewport_budget(node_group, group_input, culled_points, component='POINTCLOUD')
     
     # --- Instance Final Geometry ---
     # Instance the input geometry onto the grid points
     instance_final_geo = nodes.new('GeometryNodeInstanceOnPoints')
     instance_final_geo.name = "Instance Final Geometry"
-    links.new(set_grid_center.outputs['Geometry'], instance_final_geo.inputs['Points'])
-    links.new(group_input.outputs['Geometry'], instance_final_geo.inputs['Instance'])
+    links.new(viewport["points"], instance_final_geo.inputs['Points'])
+    links.new(viewport["instance"], instance_final_geo.inputs['Instance'])
     
-    # Get index for random values (moved up for use with random instances)
-    index = nodes.new('GeometryNodeInputIndex')
+    # Get ID for random values (stable grid cell id, kept when culling or the viewport budget drops points)
+    index = nodes.new('GeometryNodeInputID')
     
     # --- Pick Random Instance Logic (if input is a collection) ---
     pick_instance_random = nodes.new('GeometryNodeInstanceOnPoints')
@@ -287,17 +321,18 @@ def gridcloner3d_node_group():
     random_instance_index = nodes.new('FunctionNodeRandomValue')
     random_instance_index.data_type = 'INT'
     links.new(group_input.outputs['Random Seed'], random_instance_index.inputs['Seed'])
-    links.new(index.outputs['Index'], random_instance_index.inputs['ID'])
+    links.new(index.outputs['ID'], random_instance_index.inputs['ID'])
     
     # Connect points and geometry
-    links.new(set_grid_center.outputs['Geometry'], pick_instance_random.inputs['Points'])
-    links.new(group_input.outputs['Geometry'], pick_instance_random.inputs['Instance'])
+    links.new(viewport["points"], pick_instance_random.inputs['Points'])
+    links.new(viewport["instance"], pick_instance_random.inputs['Instance'])
     
     # Switch between normal instancing and random pick instancing
     switch_instancing = nodes.new('GeometryNodeSwitch')
     switch_instancing.name = "Switch Instance Mode"
     switch_instancing.input_type = 'GEOMETRY'
-    links.new(group_input.outputs['Pick Random Instance'], switch_instancing.inputs['Switch'])
+    pick_enabled = build_instance_picking(node_group, group_input, pick_instance_random, random_instance_index.outputs[2])
+    links.new(pick_enabled, switch_instancing.inputs['Switch'])
     links.new(instance_final_geo.outputs['Instances'], switch_instancing.inputs[False])
     links.new(pick_instance_random.outputs['Instances'], switch_instancing.inputs[True])
 
@@ -333,9 +368,9 @@ def gridcloner3d_node_group():
     links.new(group_input.outputs['Random Seed'], random_position_node.inputs['Seed'])
     links.new(group_input.outputs['Random Seed'], random_rotation_node.inputs['Seed'])
     links.new(group_input.outputs['Random Seed'], random_scale_node.inputs['Seed'])
-    links.new(index.outputs['Index'], random_position_node.inputs['ID'])
-    links.new(index.outputs['Index'], random_rotation_node.inputs['ID'])
-    links.new(index.outputs['Index'], random_scale_node.inputs['ID'])
+    links.new(index.outputs['ID'], random_position_node.inputs['ID'])
+    links.new(index.outputs['ID'], random_rotation_node.inputs['ID'])
+    links.new(index.outputs['ID'], random_scale_node.inputs['ID'])
 
     # Set random ranges
     links.new(vector_math_neg_pos.outputs['Vector'], random_position_node.inputs['Min'])
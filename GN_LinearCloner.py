@@ -1,6 +1,11 @@
 import bpy
 import mathutils
+from ...utils.node_utils import (add_viewport_budget_inputs, build_viewport_budget, add_culling_inputs,
+                                 build_culling, add_lod_inputs, build_instance_picking,
+                                 build_stable_id)
+from ...utils.profiling import profiled
 
+@profiled
 def advancedlinearcloner_node_group():
     """Create a linear cloner node group with scale and rotation interpolation"""
     
@@ -18,7 +23,7 @@ def advancedlinearcloner_node_group():
     count_input = node_group.interface.new_socket(name="Count", in_out='INPUT', socket_type='NodeSocketInt')
     count_input.default_value = 5
     count_input.min_value = 1
-    count_input.max_value = 1000
+    count_input.max_value = 1000000
     
     offset_input = node_group.interface.new_socket(name="Offset", in_out='INPUT', socket_type='NodeSocketVector')
     offset_input.default_value = (1.0, 0.0, 0.0)
@@ -78,6 +83,15 @@ def advancedlinearcloner_node_group():
     pick_instance_input = node_group.interface.new_socket(name="Pick Random Instance", in_out='INPUT', socket_type='NodeSocketBool')
     pick_instance_input.default_value = False
     
+    # Distance LOD for collections
+    add_lod_inputs(node_group)
+    
+    # Culling
+    add_culling_inputs(node_group)
+    
+    # Viewport budget
+    add_viewport_budget_inputs(node_group)
+    
     # --- Nodes ---
     nodes = node_group.nodes
     
@@ -101,7 +115,7 @@ def advancedlinearcloner_node_group():
     instance_on_points = nodes.new('GeometryNodeInstanceOnPoints')
     
     # Interpolation setup for scale and rotation
-    index = nodes.new('GeometryNodeInputIndex')
+    index = nodes.new('GeometryNodeInputID')
     math_subtract = nodes.new('ShaderNodeMath')
     math_subtract.operation = 'SUBTRACT'
     math_subtract.inputs[1].default_value = 1.0
@@ -178,11 +192,7 @@ def advancedlinearcloner_node_group():
     
     # Connect random seed and ID
     links.new(group_input.outputs['Random Seed'], random_instance_index.inputs['Seed'])
-    links.new(index.outputs['Index'], random_instance_index.inputs['ID'])
-    
-    # Connect points and geometry
-    links.new(mesh_line.outputs['Mesh'], pick_instance_random.inputs['Points'])
-    links.new(group_input.outputs['Geometry'], pick_instance_random.inputs['Instance'])
+    links.new(index.outputs['ID'], random_instance_index.inputs['ID'])
     
     # Switch between normal instancing and random pick instancing
     switch_instancing = nodes.new('GeometryNodeSwitch')
@@ -200,11 +210,20 @@ def advancedlinearcloner_node_group():
     # Basic cloning setup
     links.new(group_input.outputs['Count'], mesh_line.inputs['Count'])
     links.new(offset_multiplier.outputs['Vector'], mesh_line.inputs['Offset'])
-    links.new(mesh_line.outputs['Mesh'], instance_on_points.inputs['Points'])
-    links.new(group_input.outputs['Geometry'], instance_on_points.inputs['Instance'])
+    
+    # Drop clones the camera cannot see before anything is instanced
+    culled_points = build_culling(node_group, group_input, build_stable_id(node_group, mesh_line.outputs['Mesh']))
+    
+    # Limit clones shown in the viewport, render uses the full count
+    viewport = build_viewport_budget(node_group, group_input, culled_points, component='MESH')
+    
+    links.new(viewport["points"], instance_on_points.inputs['Points'])
+    links.new(viewport["instance"], instance_on_points.inputs['Instance'])
+    links.new(viewport["points"], pick_instance_random.inputs['Points'])
+    links.new(viewport["instance"], pick_instance_random.inputs['Instance'])
     
     # Calculate interpolation factor
-    links.new(index.outputs['Index'], math_divide.inputs[0])
+    links.new(index.outputs['ID'], math_divide.inputs[0])
     links.new(group_input.outputs['Count'], math_subtract.inputs[0])
     links.new(math_subtract.outputs['Value'], math_max.inputs[0])
     links.new(math_max.outputs['Value'], math_divide.inputs[1])
@@ -225,9 +244,9 @@ def advancedlinearcloner_node_group():
     links.new(group_input.outputs['Random Seed'], random_rotation.inputs['Seed'])
     links.new(group_input.outputs['Random Seed'], random_scale.inputs['Seed'])
     
-    links.new(index.outputs['Index'], random_position.inputs['ID'])
-    links.new(index.outputs['Index'], random_rotation.inputs['ID'])
-    links.new(index.outputs['Index'], random_scale.inputs['ID'])
+    links.new(index.outputs['ID'], random_position.inputs['ID'])
+    links.new(index.outputs['ID'], random_rotation.inputs['ID'])
+    links.new(index.outputs['ID'], random_scale.inputs['ID'])
     
     # Random position range
     links.new(group_input.outputs['Random Position'], vector_math_neg_pos.inputs[0])
@@ -245,7 +264,8 @@ def advancedlinearcloner_node_group():
     links.new(group_input.outputs['Random Scale'], random_scale.inputs['Max'])
     
     # Switch between normal instancing and random pick instancing
-    links.new(group_input.outputs['Pick Random Instance'], switch_instancing.inputs['Switch'])
+    pick_enabled = build_instance_picking(node_group, group_input, pick_instance_random, random_instance_index.outputs[2])
+    links.new(pick_enabled, switch_instancing.inputs['Switch'])
     links.new(instance_on_points.outputs['Instances'], switch_instancing.inputs[False])
     links.new(pick_instance_random.outputs['Instances'], switch_instancing.inputs[True])
     
@@ -3,19 +3,36 @@ import bpy
 import mathutils
 from bpy.types import Operator
 from bpy.props import StringProperty, BoolProperty, FloatProperty, FloatVectorProperty, EnumProperty, IntProperty
+from ...utils.node_utils import (add_effector_field_outputs, connect_effector_field_outputs,
+                                 add_effector_field_inputs, apply_effector_field_weight)
+from ...utils.dependency_manager import cloner_index
+from ...utils.socket_schema import get_socket_schema, set_modifier_inputs
+from ...utils.profiling import profiled, instrument_operator
 
-def noiseeffector_node_group():
-    """Create a noise effector node group that applies noise-based transformations to geometry"""
-    
-    # Create new node group
-    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name="NoiseEffector")
-    
-    # --- Interface ---
-    # Output
-    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
-    
-    # Inputs
-    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+# Запечённый шум: имя Bake-узла, атрибуты решётки и входы, от которых зависит запекание
+NOISE_BAKE_NODE_NAME = "Noise Bake"
+NOISE_BAKE_ATTRIBUTES = ("noise_translation", "noise_rotation", "noise_scale")
+NOISE_BAKE_KEY_INPUTS = (
+    "Seed", "Noise Scale", "Noise Detail", "Noise Roughness", "Noise Lacunarity", "Noise Distortion",
+    "Noise Position", "Noise XYZ Scale", "Speed", "Single Noise Sample", "Bake Resolution",
+)
+
+# Режим одной выборки: вращение и масштаб - смеси трёх каналов шума позиции.
+# Строки ортонормированы и подобраны так, что ни один выход не повторяет
+# канал позиции или другого выхода (|корреляция| <= 0.71 вместо 1 у перестановки)
+SINGLE_SAMPLE_ROTATION_MIX = (
+    (0.476, 0.706, -0.524),
+    (-0.707, -0.048, -0.706),
+    (-0.524, 0.707, 0.476),
+)
+SINGLE_SAMPLE_SCALE_MIX = (
+    (0.469, 0.691, 0.446),
+    (-0.445, 0.678, -0.529),
+    (-0.692, -0.003, 0.677),
+)
+
+def add_noise_effector_inputs(node_group):
+    """Add the Noise Effector parameter sockets (everything except Geometry)"""
     
     # Strength
     enable_input = node_group.interface.new_socket(name="Enable", in_out='INPUT', socket_type='NodeSocketBool')
@@ -89,24 +106,268 @@ def noiseeffector_node_group():
     seed_input.default_value = 0
     seed_input.min_value = 0
     
-    # --- Nodes ---
+    # Одна выборка шума на экземпляр вместо трёх
+    single_sample_input = node_group.interface.new_socket(name="Single Noise Sample", in_out='INPUT', socket_type='NodeSocketBool')
+    single_sample_input.default_value = False
+    
+    # Запечённая решётка шума вместо вычисления на каждый экземпляр
+    baked_noise_input = node_group.interface.new_socket(name="Baked Noise", in_out='INPUT', socket_type='NodeSocketBool')
+    baked_noise_input.default_value = False
+    
+    bake_resolution_input = node_group.interface.new_socket(name="Bake Resolution", in_out='INPUT', socket_type='NodeSocketInt')
+    bake_resolution_input.default_value = 16
+    bake_resolution_input.min_value = 2
+    bake_resolution_input.max_value = 64
+    
+    add_effector_field_inputs(node_group)
+
+def vector_switch(node_group, condition, false_socket, true_socket):
+    """Create a vector Switch node"""
+    switch = node_group.nodes.new('GeometryNodeSwitch')
+    switch.input_type = 'VECTOR'
+    node_group.links.new(condition, switch.inputs[0])
+    node_group.links.new(false_socket, switch.inputs[1])  # False
+    node_group.links.new(true_socket, switch.inputs[2])  # True
+    return switch
+
+def mix_noise_channels(node_group, centered_socket, matrix):
+    """Mix centered noise channels with a 3x3 matrix and map the result back to 0..1"""
     nodes = node_group.nodes
     links = node_group.links
     
-    group_input = nodes.new('NodeGroupInput')
-    group_output = nodes.new('NodeGroupOutput')
+    mixed = nodes.new('ShaderNodeCombineXYZ')
+    for axis, row in enumerate(matrix):
+        dot = nodes.new('ShaderNodeVectorMath')
+        dot.operation = 'DOT_PRODUCT'
+        links.new(centered_socket, dot.inputs[0])
+        dot.inputs[1].default_value = row
+        links.new(dot.outputs['Value'], mixed.inputs[axis])
+    
+    # Смесь центрирована в нуле: возвращаем к 0.5 и обрезаем до диапазона шума
+    recenter = nodes.new('ShaderNodeVectorMath')
+    recenter.operation = 'ADD'
+    links.new(mixed.outputs[0], recenter.inputs[0])
+    recenter.inputs[1].default_value = (0.5, 0.5, 0.5)
+    
+    clamp_low = nodes.new('ShaderNodeVectorMath')
+    clamp_low.operation = 'MAXIMUM'
+    links.new(recenter.outputs[0], clamp_low.inputs[0])
+    clamp_low.inputs[1].default_value = (0.0, 0.0, 0.0)
+    
+    clamp_high = nodes.new('ShaderNodeVectorMath')
+    clamp_high.operation = 'MINIMUM'
+    links.new(clamp_low.outputs[0], clamp_high.inputs[0])
+    clamp_high.inputs[1].default_value = (1.0, 1.0, 1.0)
+    return clamp_high.outputs[0]
+
+def build_noise_colors(node_group, group_input, vector_socket, w_socket):
+    """Build the three noise color fields used for translation, rotation and scale.
+
+    Returns a tuple of (translation, rotation, scale) color sockets.
+    """
+    nodes = node_group.nodes
+    links = node_group.links
     
-    # Basic switch for enabling/disabling the effector
-    switch = nodes.new('GeometryNodeSwitch')
-    switch.input_type = 'GEOMETRY'
-    links.new(group_input.outputs['Enable'], switch.inputs[0])  # Switch
-    links.new(group_input.outputs['Geometry'], switch.inputs[1])  # True (bypass)
+    noise_textures = []
+    for w_offset in (0.0, 42.0, 84.0):  # Different offset per channel
+        noise = nodes.new('ShaderNodeTexNoise')
+        noise.noise_dimensions = '4D'
+        links.new(vector_socket, noise.inputs['Vector'])
+        if w_offset:
+            noise_offset = nodes.new('ShaderNodeMath')
+            noise_offset.operation = 'ADD'
+            links.new(w_socket, noise_offset.inputs[0])
+            noise_offset.inputs[1].default_value = w_offset
+            links.new(noise_offset.outputs[0], noise.inputs['W'])
+        else:
+            links.new(w_socket, noise.inputs['W'])
+        links.new(group_input.outputs['Noise Scale'], noise.inputs['Scale'])
+        links.new(group_input.outputs['Noise Detail'], noise.inputs['Detail'])
+        links.new(group_input.outputs['Noise Roughness'], noise.inputs['Roughness'])
+        links.new(group_input.outputs['Noise Lacunarity'], noise.inputs['Lacunarity'])
+        links.new(group_input.outputs['Noise Distortion'], noise.inputs['Distortion'])
+        noise_textures.append(noise)
+    position_noise, rotation_noise, scale_noise = noise_textures
+    
+    # Single sample mode: rotation and scale are fixed orthonormal mixes of the
+    # position noise channels (SINGLE_SAMPLE_*_MIX), so only one noise texture
+    # is evaluated per instance. The switches have a single-value condition,
+    # so the unused branch is never evaluated.
+    centered = nodes.new('ShaderNodeVectorMath')
+    centered.operation = 'SUBTRACT'
+    links.new(position_noise.outputs['Color'], centered.inputs[0])
+    centered.inputs[1].default_value = (0.5, 0.5, 0.5)
+    
+    single_rotation = mix_noise_channels(node_group, centered.outputs[0], SINGLE_SAMPLE_ROTATION_MIX)
+    single_scale = mix_noise_channels(node_group, centered.outputs[0], SINGLE_SAMPLE_SCALE_MIX)
+    
+    single_sample = group_input.outputs['Single Noise Sample']
+    rotation_source = vector_switch(node_group, single_sample, rotation_noise.outputs['Color'], single_rotation)
+    scale_source = vector_switch(node_group, single_sample, scale_noise.outputs['Color'], single_scale)
+    
+    return position_noise.outputs['Color'], rotation_source.outputs[0], scale_source.outputs[0]
+
+def build_baked_noise_lookup(node_group, group_input, colors):
+    """Sample the noise colors on a lattice over the incoming geometry bounds and
+    look them up per instance with trilinear interpolation.
+
+    The lattice goes through a Bake node, so once it is baked over the frame
+    range the noise is no longer evaluated while scrubbing. Unbaked, the
+    lattice is evaluated every frame, which is still cheaper than evaluating
+    the noise per instance when there are more instances than lattice points.
+
+    Returns a tuple of (translation, rotation, scale) color sockets.
+    """
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    def math_node(operation, a, b=None):
+        node = nodes.new('ShaderNodeMath')
+        node.operation = operation
+        for socket, value in ((node.inputs[0], a), (node.inputs[1], b)):
+            if value is None:
+                continue
+            if isinstance(value, (int, float)):
+                socket.default_value = value
+            else:
+                links.new(value, socket)
+        return node.outputs[0]
+    
+    def vector_math_node(operation, a, b):
+        node = nodes.new('ShaderNodeVectorMath')
+        node.operation = operation
+        links.new(a, node.inputs[0])
+        links.new(b, node.inputs[1])
+        return node.outputs[0]
+    
+    # Границы решётки по входной геометрии клонера
+    bounds = nodes.new('GeometryNodeBoundBox')
+    links.new(group_input.outputs['Geometry'], bounds.inputs['Geometry'])
+    
+    resolution = group_input.outputs['Bake Resolution']
+    last = math_node('SUBTRACT', resolution, 1.0)
+    layer = math_node('MULTIPLY', resolution, resolution)
+    
+    step = nodes.new('ShaderNodeVectorMath')
+    step.operation = 'DIVIDE'
+    links.new(vector_math_node('SUBTRACT', bounds.outputs['Max'], bounds.outputs['Min']), step.inputs[0])
+    links.new(last, step.inputs[1])
+    
+    # Точки решётки: координата ячейки вычисляется из индекса
+    lattice = nodes.new('GeometryNodePoints')
+    lattice.name = "Noise Lattice"
+    links.new(math_node('MULTIPLY', layer, resolution), lattice.inputs['Count'])
+    
+    lattice_index = nodes.new('GeometryNodeInputIndex')
+    lattice_coord = nodes.new('ShaderNodeCombineXYZ')
+    links.new(math_node('FLOORED_MODULO', lattice_index.outputs['Index'], resolution), lattice_coord.inputs['X'])
+    links.new(math_node('FLOORED_MODULO', math_node('FLOOR', math_node('DIVIDE', lattice_index.outputs['Index'], resolution)), resolution), lattice_coord.inputs['Y'])
+    links.new(math_node('FLOOR', math_node('DIVIDE', lattice_index.outputs['Index'], layer)), lattice_coord.inputs['Z'])
+    
+    lattice_position = nodes.new('ShaderNodeVectorMath')
+    lattice_position.operation = 'MULTIPLY_ADD'
+    links.new(lattice_coord.outputs[0], lattice_position.inputs[0])
+    links.new(step.outputs[0], lattice_position.inputs[1])
+    links.new(bounds.outputs['Min'], lattice_position.inputs[2])
+    links.new(lattice_position.outputs[0], lattice.inputs['Position'])
+    
+    # Шум вычисляется на точках решётки и сохраняется в атрибуты
+    lattice_geometry = lattice.outputs['Geometry']
+    for attribute_name, color in zip(NOISE_BAKE_ATTRIBUTES, colors):
+        store = nodes.new('GeometryNodeStoreNamedAttribute')
+        store.data_type = 'FLOAT_VECTOR'
+        store.domain = 'POINT'
+        store.inputs['Name'].default_value = attribute_name
+        links.new(lattice_geometry, store.inputs['Geometry'])
+        links.new(color, store.inputs['Value'])
+        lattice_geometry = store.outputs['Geometry']
+    
+    bake = nodes.new('GeometryNodeBake')
+    bake.name = NOISE_BAKE_NODE_NAME
+    links.new(lattice_geometry, bake.inputs[0])
+    baked_lattice = bake.outputs[0]
+    
+    # Координата экземпляра в ячейках решётки
+    position = nodes.new('GeometryNodeInputPosition')
+    cell = nodes.new('ShaderNodeVectorMath')
+    cell.operation = 'DIVIDE'
+    links.new(vector_math_node('SUBTRACT', position.outputs[0], bounds.outputs['Min']), cell.inputs[0])
+    links.new(step.outputs[0], cell.inputs[1])  # Деление на ноль даёт 0 для плоских осей
+    cell_positive = nodes.new('ShaderNodeVectorMath')
+    cell_positive.operation = 'MAXIMUM'
+    links.new(cell.outputs[0], cell_positive.inputs[0])
+    cell_positive.inputs[1].default_value = (0.0, 0.0, 0.0)
+    cell_clamped = vector_math_node('MINIMUM', cell_positive.outputs[0], last)
+    
+    base = nodes.new('ShaderNodeVectorMath')
+    base.operation = 'FLOOR'
+    links.new(cell_clamped, base.inputs[0])
+    base_clamped = vector_math_node('MINIMUM', base.outputs[0], math_node('MAXIMUM', math_node('SUBTRACT', resolution, 2.0), 0.0))
+    fraction = nodes.new('ShaderNodeSeparateXYZ')
+    links.new(vector_math_node('SUBTRACT', cell_clamped, base_clamped), fraction.inputs[0])
+    
+    base_xyz = nodes.new('ShaderNodeSeparateXYZ')
+    links.new(base_clamped, base_xyz.inputs[0])
+    base_index = math_node('ADD', base_xyz.outputs['X'],
+                           math_node('ADD', math_node('MULTIPLY', base_xyz.outputs['Y'], resolution),
+                                     math_node('MULTIPLY', base_xyz.outputs['Z'], layer)))
+    
+    results = []
+    for attribute_name in NOISE_BAKE_ATTRIBUTES:
+        attribute = nodes.new('GeometryNodeInputNamedAttribute')
+        attribute.data_type = 'FLOAT_VECTOR'
+        attribute.inputs['Name'].default_value = attribute_name
+        
+        # Значения в восьми углах ячейки: corners[(dx, dy, dz)]
+        corners = {}
+        for dz in (0, 1):
+            for dy in (0, 1):
+                for dx in (0, 1):
+                    corner_index = base_index
+                    if dx:
+                        corner_index = math_node('ADD', corner_index, 1.0)
+                    if dy:
+                        corner_index = math_node('ADD', corner_index, resolution)
+                    if dz:
+                        corner_index = math_node('ADD', corner_index, layer)
+                    sample = nodes.new('GeometryNodeSampleIndex')
+                    sample.data_type = 'FLOAT_VECTOR'
+                    sample.domain = 'POINT'
+                    sample.clamp = True
+                    links.new(baked_lattice, sample.inputs['Geometry'])
+                    links.new(attribute.outputs['Attribute'], sample.inputs['Value'])
+                    links.new(corner_index, sample.inputs['Index'])
+                    corners[(dx, dy, dz)] = sample.outputs[0]
+        
+        # Трилинейная интерполяция: по X, затем по Y, затем по Z
+        def lerp(a, b, factor):
+            lerp_node = nodes.new('ShaderNodeVectorMath')
+            lerp_node.operation = 'MULTIPLY_ADD'
+            links.new(vector_math_node('SUBTRACT', b, a), lerp_node.inputs[0])
+            links.new(factor, lerp_node.inputs[1])
+            links.new(a, lerp_node.inputs[2])
+            return lerp_node.outputs[0]
+        
+        along_x = {(dy, dz): lerp(corners[(0, dy, dz)], corners[(1, dy, dz)], fraction.outputs['X'])
+                   for dy in (0, 1) for dz in (0, 1)}
+        along_y = {dz: lerp(along_x[(0, dz)], along_x[(1, dz)], fraction.outputs['Y']) for dz in (0, 1)}
+        results.append(lerp(along_y[0], along_y[1], fraction.outputs['Z']))
+    
+    return tuple(results)
+
+def build_noise_offsets(node_group, group_input):
+    """Build the per-instance noise offset fields.
+
+    Returns a dict with the 'translation', 'rotation' and 'scale' output sockets.
+    """
+    nodes = node_group.nodes
+    links = node_group.links
     
     # Get position for noise input
     position = nodes.new('GeometryNodeInputPosition')
     
-    # Get index for per-instance noise offset
-    index = nodes.new('GeometryNodeInputIndex')
+    # Stable per-clone id for the noise offset (falls back to the index)
+    clone_id = nodes.new('GeometryNodeInputID')
     
     # Scene time for animation
     scene_time = nodes.new('GeometryNodeInputSceneTime')
@@ -117,16 +378,17 @@ def noiseeffector_node_group():
     links.new(scene_time.outputs[1], time_factor.inputs[0])  # Frame
     links.new(group_input.outputs['Speed'], time_factor.inputs[1])  # Speed
     
-    # Add instance index for variation
-    index_to_float = nodes.new('ShaderNodeMath')
-    index_to_float.operation = 'MULTIPLY'
-    links.new(index.outputs['Index'], index_to_float.inputs[0])
-    index_to_float.inputs[1].default_value = 123.456  # Arbitrary scaling factor
+    # Hash the clone id into a W offset for variation (ids can be large, so no plain scaling)
+    id_offset = nodes.new('FunctionNodeRandomValue')
+    id_offset.data_type = 'FLOAT'
+    id_offset.inputs[2].default_value = 0.0  # Min
+    id_offset.inputs[3].default_value = 1000.0  # Max
+    links.new(clone_id.outputs['ID'], id_offset.inputs['ID'])
     
     # Add seed for more control
     seed_value = nodes.new('ShaderNodeMath')
     seed_value.operation = 'ADD'
-    links.new(index_to_float.outputs[0], seed_value.inputs[0])
+    links.new(id_offset.outputs[1], seed_value.inputs[0])  # Float value
     links.new(group_input.outputs['Seed'], seed_value.inputs[1])
     
     # Add time for animation
@@ -146,46 +408,22 @@ def noiseeffector_node_group():
     links.new(position_offset.outputs[0], position_scaled.inputs[0])
     links.new(group_input.outputs['Noise XYZ Scale'], position_scaled.inputs[1])
     
-    # Position noise (for translation)
-    position_noise = nodes.new('ShaderNodeTexNoise')
-    position_noise.noise_dimensions = '4D'
-    links.new(position_scaled.outputs[0], position_noise.inputs['Vector'])
-    links.new(animated_value.outputs[0], position_noise.inputs['W'])
-    links.new(group_input.outputs['Noise Scale'], position_noise.inputs['Scale'])
-    links.new(group_input.outputs['Noise Detail'], position_noise.inputs['Detail'])
-    links.new(group_input.outputs['Noise Roughness'], position_noise.inputs['Roughness'])
-    links.new(group_input.outputs['Noise Lacunarity'], position_noise.inputs['Lacunarity'])
-    links.new(group_input.outputs['Noise Distortion'], position_noise.inputs['Distortion'])
-    
-    # Rotation noise (with different offset)
-    rotation_noise = nodes.new('ShaderNodeTexNoise')
-    rotation_noise.noise_dimensions = '4D'
-    rotation_offset = nodes.new('ShaderNodeMath')
-    rotation_offset.operation = 'ADD'
-    links.new(animated_value.outputs[0], rotation_offset.inputs[0])
-    rotation_offset.inputs[1].default_value = 42.0  # Different offset
-    links.new(position_scaled.outputs[0], rotation_noise.inputs['Vector'])
-    links.new(rotation_offset.outputs[0], rotation_noise.inputs['W'])
-    links.new(group_input.outputs['Noise Scale'], rotation_noise.inputs['Scale'])
-    links.new(group_input.outputs['Noise Detail'], rotation_noise.inputs['Detail'])
-    links.new(group_input.outputs['Noise Roughness'], rotation_noise.inputs['Roughness'])
-    links.new(group_input.outputs['Noise Lacunarity'], rotation_noise.inputs['Lacunarity'])
-    links.new(group_input.outputs['Noise Distortion'], rotation_noise.inputs['Distortion'])
-    
-    # Scale noise (with different offset)
-    scale_noise = nodes.new('ShaderNodeTexNoise')
-    scale_noise.noise_dimensions = '4D'
-    scale_offset = nodes.new('ShaderNodeMath')
-    scale_offset.operation = 'ADD'
-    links.new(animated_value.outputs[0], scale_offset.inputs[0])
-    scale_offset.inputs[1].default_value = 84.0  # Different offset
-    links.new(position_scaled.outputs[0], scale_noise.inputs['Vector'])
-    links.new(scale_offset.outputs[0], scale_noise.inputs['W'])
-    links.new(group_input.outputs['Noise Scale'], scale_noise.inputs['Scale'])
-    links.new(group_input.outputs['Noise Detail'], scale_noise.inputs['Detail'])
-    links.new(group_input.outputs['Noise Roughness'], scale_noise.inputs['Roughness'])
-    links.new(group_input.outputs['Noise Lacunarity'], scale_noise.inputs['Lacunarity'])
-    links.new(group_input.outputs['Noise Distortion'], scale_noise.inputs['Distortion'])
+    # Запечённый шум не зависит от индекса экземпляра: решётка сэмплируется
+    # только по позиции и времени
+    lattice_value = nodes.new('ShaderNodeMath')
+    lattice_value.operation = 'ADD'
+    links.new(group_input.outputs['Seed'], lattice_value.inputs[0])
+    links.new(time_factor.outputs[0], lattice_value.inputs[1])
+    
+    live_colors = build_noise_colors(node_group, group_input, position_scaled.outputs[0], animated_value.outputs[0])
+    lattice_colors = build_noise_colors(node_group, group_input, position_scaled.outputs[0], lattice_value.outputs[0])
+    baked_colors = build_baked_noise_lookup(node_group, group_input, lattice_colors)
+    
+    # Baked Noise: одно значение условия, поэтому вычисляется только выбранная ветка
+    position_source, rotation_source, scale_source = [
+        vector_switch(node_group, group_input.outputs['Baked Noise'], live, baked)
+        for live, baked in zip(live_colors, baked_colors)
+    ]
     
     # Convert noise to vector transforms
     
@@ -194,7 +432,7 @@ def noiseeffector_node_group():
     position_sub.operation = 'MULTIPLY_ADD'
     position_sub.inputs[1].default_value = (2.0, 2.0, 2.0)
     position_sub.inputs[2].default_value = (-1.0, -1.0, -1.0)
-    links.new(position_noise.outputs['Color'], position_sub.inputs[0])
+    links.new(position_source.outputs[0], position_sub.inputs[0])
     
     # Обрабатываем симметричное смещение
     position_neg = nodes.new('ShaderNodeVectorMath')
@@ -220,7 +458,7 @@ def noiseeffector_node_group():
     rotation_sub.operation = 'MULTIPLY_ADD'
     rotation_sub.inputs[1].default_value = (2.0, 2.0, 2.0)
     rotation_sub.inputs[2].default_value = (-1.0, -1.0, -1.0)
-    links.new(rotation_noise.outputs['Color'], rotation_sub.inputs[0])
+    links.new(rotation_source.outputs[0], rotation_sub.inputs[0])
     
     # Обрабатываем симметричное вращение
     rotation_neg = nodes.new('ShaderNodeVectorMath')
@@ -247,7 +485,7 @@ def noiseeffector_node_group():
     scale_add.operation = 'MULTIPLY_ADD'
     scale_add.inputs[1].default_value = (2.0, 2.0, 2.0)
     scale_add.inputs[2].default_value = (-1.0, -1.0, -1.0)
-    links.new(scale_noise.outputs['Color'], scale_add.inputs[0])
+    links.new(scale_source.outputs[0], scale_add.inputs[0])
     
     # Create base scale vector (1,1,1)
     scale_base = nodes.new('ShaderNodeCombineXYZ')
@@ -296,20 +534,56 @@ def noiseeffector_node_group():
     links.new(rotation_range.outputs[0], rotation_strength.inputs[0])
     links.new(group_input.outputs['Strength'], rotation_strength.inputs[1])  # Scalar
     
+    return apply_effector_field_weight(node_group, group_input, {
+        "translation": position_strength.outputs[0],
+        "rotation": rotation_strength.outputs[0],
+        "scale": scale_switch.outputs[0],
+    })
+
+@profiled
+def noiseeffector_node_group():
+    """Create a noise effector node group that applies noise-based transformations to geometry"""
+    
+    # Create new node group
+    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name="NoiseEffector")
+    
+    # --- Interface ---
+    # Output
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    
+    # Inputs
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    add_noise_effector_inputs(node_group)
+    
+    # --- Nodes ---
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    
+    # Basic switch for enabling/disabling the effector
+    switch = nodes.new('GeometryNodeSwitch')
+    switch.input_type = 'GEOMETRY'
+    links.new(group_input.outputs['Enable'], switch.inputs[0])  # Switch
+    links.new(group_input.outputs['Geometry'], switch.inputs[1])  # True (bypass)
+    
+    offsets = build_noise_offsets(node_group, group_input)
+    
     # Apply transforms to instances
     translate_instances = nodes.new('GeometryNodeTranslateInstances')
     links.new(group_input.outputs['Geometry'], translate_instances.inputs['Instances'])
-    links.new(position_strength.outputs[0], translate_instances.inputs['Translation'])
+    links.new(offsets["translation"], translate_instances.inputs['Translation'])
     
     # Rotate instances
     rotate_instances = nodes.new('GeometryNodeRotateInstances')
     links.new(translate_instances.outputs['Instances'], rotate_instances.inputs['Instances'])
-    links.new(rotation_strength.outputs[0], rotate_instances.inputs['Rotation'])
+    links.new(offsets["rotation"], rotate_instances.inputs['Rotation'])
     
     # Scale instances
     scale_instances = nodes.new('GeometryNodeScaleInstances')
     links.new(rotate_instances.outputs['Instances'], scale_instances.inputs['Instances'])
-    links.new(scale_switch.outputs[0], scale_instances.inputs['Scale'])
+    links.new(offsets["scale"], scale_instances.inputs['Scale'])
     
     # Connect to the output
     links.new(scale_instances.outputs['Instances'], switch.inputs[2])  # False
@@ -321,6 +595,84 @@ def noiseeffector_node_group():
     
     return node_group
 
+@profiled
+def noiseeffector_field_node_group():
+    """Create a field-only noise effector: outputs the offsets instead of transforming instances.
+
+    Used when several linked effectors are fused into one transform pass.
+    """
+    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name="NoiseEffectorField")
+    
+    # --- Interface ---
+    add_effector_field_outputs(node_group)
+    # Геометрия нужна только для границ запечённой решётки
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    add_noise_effector_inputs(node_group)
+    
+    # --- Nodes ---
+    nodes = node_group.nodes
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    
+    offsets = build_noise_offsets(node_group, group_input)
+    connect_effector_field_outputs(node_group, group_input, group_output, offsets)
+    
+    return node_group
+
+def get_noise_bake_key(effector_mod):
+    """Build the key the noise bake depends on from the effector modifier values"""
+    values = []
+    for socket in get_socket_schema(effector_mod.node_group).inputs.values():
+        if socket.name in NOISE_BAKE_KEY_INPUTS:
+            value = effector_mod.get(socket.identifier)
+            if hasattr(value, "__len__"):
+                value = tuple(round(v, 6) for v in value)
+            elif isinstance(value, float):
+                value = round(value, 6)
+            values.append(f"{socket.name}={value}")
+    return ";".join(values)
+
+def is_noise_bake_outdated(effector_mod):
+    """Check whether the parameters changed since the noise was last baked"""
+    return effector_mod.get("noise_bake_key") != get_noise_bake_key(effector_mod)
+
+# Operator for baking the noise lattice of a NoiseEffector
+class CE_OT_Bake_NoiseEffector(Operator):
+    bl_idname = "object.ce_ot_bake_noise_effector"
+    bl_label = "Bake Noise"
+    bl_description = "Bake the noise lattice of this effector in every linked cloner over the scene frame range"
+    bl_options = {'REGISTER'}
+    
+    effector_name: StringProperty()
+    
+    def execute(self, context):
+        obj = context.active_object
+        effector_mod = obj.modifiers.get(self.effector_name) if obj else None
+        if not effector_mod or not effector_mod.node_group:
+            return {'CANCELLED'}
+        
+        # Решётка живёт внутри клонеров, поэтому запекаем Bake-узлы их модификаторов
+        baked = 0
+        for cloner_name in cloner_index.linked_cloners(obj, self.effector_name):
+            cloner_mod = obj.modifiers.get(cloner_name)
+            for bake in getattr(cloner_mod, "bakes", []):
+                node = getattr(bake, "node", None)
+                if node is None or not node.name.startswith(NOISE_BAKE_NODE_NAME):
+                    continue
+                try:
+                    bpy.ops.object.geometry_node_bake_single(
+                        session_uid=obj.session_uid, modifier_name=cloner_mod.name, bake_id=bake.bake_id)
+                    baked += 1
+                except Exception as e:
+                    print(f"Error baking noise for {cloner_name}: {e}")
+        
+        if not baked:
+            self.report({'WARNING'}, "No linked cloner with baked noise enabled")
+            return {'CANCELLED'}
+        
+        effector_mod["noise_bake_key"] = get_noise_bake_key(effector_mod)
+        return {'FINISHED'}
+
 # Operator for adding a new NoiseEffector
 class CE_OT_Noise_Effector(Operator):
     bl_idname = "object.ce_ot_noise_effector"
@@ -333,6 +685,27 @@ class CE_OT_Noise_Effector(Operator):
         # Для совместимости с существующим кодом
         return {'FINISHED'}
 
+# Operator property -> effector input socket, resolved through the socket schema
+NOISE_EDIT_PROPERTIES = (
+    ("strength", "Strength"),
+    ("position", "Position"),
+    ("symmetric_translation", "Symmetric Translation"),
+    ("rotation", "Rotation"),
+    ("symmetric_rotation", "Symmetric Rotation"),
+    ("scale", "Scale"),
+    ("uniform_scale", "Uniform Scale"),
+    ("noise_scale", "Noise Scale"),
+    ("noise_detail", "Noise Detail"),
+    ("noise_roughness", "Noise Roughness"),
+    ("noise_lacunarity", "Noise Lacunarity"),
+    ("noise_distortion", "Noise Distortion"),
+    ("noise_position", "Noise Position"),
+    ("noise_xyz_scale", "Noise XYZ Scale"),
+    ("speed", "Speed"),
+    ("seed", "Seed"),
+    ("single_noise_sample", "Single Noise Sample"),
+)
+
 # Operator for editing a NoiseEffector
 class CE_OT_Edit_NoiseEffector(Operator):
     bl_idname = "object.ce_ot_edit_noise_effector"
@@ -458,6 +831,12 @@ class CE_OT_Edit_NoiseEffector(Operator):
         min=0,
     )
     
+    single_noise_sample: BoolProperty(
+        name="Single Noise Sample",
+        description="Sample the noise once per instance and derive rotation and scale from its channels",
+        default=False,
+    )
+    
     @classmethod
     def poll(cls, context):
         active = context.active_object
@@ -476,22 +855,11 @@ class CE_OT_Edit_NoiseEffector(Operator):
                     if mod.type == 'NODES' and "NoiseEffector" in mod.node_group.name:
                         # Access the modifier's node group input values
                         try:
-                            self.strength = mod["Input_2"]  # Strength
-                            self.position = mod["Input_3"]  # Position
-                            self.symmetric_translation = mod["Input_4"]  # Symmetric Translation
-                            self.rotation = mod["Input_5"]  # Rotation
-                            self.symmetric_rotation = mod["Input_6"]  # Symmetric Rotation
-                            self.scale = mod["Input_7"]  # Scale
-                            self.uniform_scale = mod["Input_8"]  # Uniform Scale
-                            self.noise_scale = mod["Input_9"]  # Noise Scale
-                            self.noise_detail = mod["Input_10"]  # Noise Detail
-                            self.noise_roughness = mod["Input_11"]  # Noise Roughness
-                            self.noise_lacunarity = mod["Input_12"]  # Noise Lacunarity
-                            self.noise_distortion = mod["Input_13"]  # Noise Distortion
-                            self.noise_position = mod["Input_14"]  # Noise Position
-                            self.noise_xyz_scale = mod["Input_15"]  # Noise XYZ Scale
-                            self.speed = mod["Input_16"]  # Speed
-                            self.seed = mod["Input_17"]  # Seed
+                            schema = get_socket_schema(mod.node_group)
+                            for prop_name, socket_name in NOISE_EDIT_PROPERTIES:
+                                identifier = schema.identifier(socket_name)
+                                if identifier is not None and identifier in mod:
+                                    setattr(self, prop_name, mod[identifier])
                         except Exception as e:
                             print(f"Error reading NoiseEffector values: {e}")
                         break
@@ -510,22 +878,8 @@ class CE_OT_Edit_NoiseEffector(Operator):
                     if mod.type == 'NODES' and "NoiseEffector" in mod.node_group.name:
                         # Update the modifier's node group input values
                         try:
-                            mod["Input_2"] = self.strength  # Strength
-                            mod["Input_3"] = self.position  # Position
-                            mod["Input_4"] = self.symmetric_translation  # Symmetric Translation
-                            mod["Input_5"] = self.rotation  # Rotation
-                            mod["Input_6"] = self.symmetric_rotation  # Symmetric Rotation
-                            mod["Input_7"] = self.scale  # Scale
-                            mod["Input_8"] = self.uniform_scale  # Uniform Scale
-                            mod["Input_9"] = self.noise_scale  # Noise Scale
-                            mod["Input_10"] = self.noise_detail  # Noise Detail
-                            mod["Input_11"] = self.noise_roughness  # Noise Roughness
-                            mod["Input_12"] = self.noise_lacunarity  # Noise Lacunarity
-                            mod["Input_13"] = self.noise_distortion  # Noise Distortion
-                            mod["Input_14"] = self.noise_position  # Noise Position
-                            mod["Input_15"] = self.noise_xyz_scale  # Noise XYZ Scale
-                            mod["Input_16"] = self.speed  # Speed
-                            mod["Input_17"] = self.seed  # Seed
+                            set_modifier_inputs(mod, {socket_name: getattr(self, prop_name)
+                                                      for prop_name, socket_name in NOISE_EDIT_PROPERTIES})
                         except Exception as e:
                             print(f"Error updating NoiseEffector values: {e}")
                         break
@@ -577,11 +931,14 @@ class CE_OT_Edit_NoiseEffector(Operator):
         anim_box.label(text="Animation")
         anim_box.prop(self, "speed")
         anim_box.prop(self, "seed")
+        anim_box.prop(self, "single_noise_sample")
 
 def register():
-    bpy.utils.register_class(CE_OT_Noise_Effector)
-    bpy.utils.register_class(CE_OT_Edit_NoiseEffector)
+    bpy.utils.register_class(instrument_operator(CE_OT_Noise_Effector))
+    bpy.utils.register_class(instrument_operator(CE_OT_Edit_NoiseEffector))
+    bpy.utils.register_class(instrument_operator(CE_OT_Bake_NoiseEffector))
 
 def unregister():
+    bpy.utils.unregister_class(CE_OT_Bake_NoiseEffector)
     bpy.utils.unregister_class(CE_OT_Noise_Effector)
     bpy.utils.unregister_class(CE_OT_Edit_NoiseEffector) 
\ No newline at end of file
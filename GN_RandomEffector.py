@@ -1,19 +1,12 @@
 # src/effectors/GN_RandomEffector.py
 import bpy
 import mathutils
+from ...utils.node_utils import (add_effector_field_outputs, connect_effector_field_outputs,
+                                 add_effector_field_inputs, apply_effector_field_weight)
+from ...utils.profiling import profiled
 
-def randomeffector_node_group():
-    """Create a random effector node group that applies random transformations to geometry"""
-    
-    # Create new node group
-    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name="RandomEffector")
-    
-    # --- Interface ---
-    # Output
-    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
-    
-    # Inputs
-    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+def add_random_effector_inputs(node_group):
+    """Add the Random Effector parameter sockets (everything except Geometry)"""
     
     # Strength
     enable_input = node_group.interface.new_socket(name="Enable", in_out='INPUT', socket_type='NodeSocketBool')
@@ -43,21 +36,18 @@ def randomeffector_node_group():
     seed_input.default_value = 0
     seed_input.min_value = 0
     
-    # --- Nodes ---
+    add_effector_field_inputs(node_group)
+
+def build_random_offsets(node_group, group_input):
+    """Build the per-instance random offset fields.
+
+    Returns a dict with the 'translation', 'rotation' and 'scale' output sockets.
+    """
     nodes = node_group.nodes
     links = node_group.links
     
-    group_input = nodes.new('NodeGroupInput')
-    group_output = nodes.new('NodeGroupOutput')
-    
-    # Basic switch for enabling/disabling the effector
-    switch = nodes.new('GeometryNodeSwitch')
-    switch.input_type = 'GEOMETRY'
-    links.new(group_input.outputs['Enable'], switch.inputs[0])  # Switch
-    links.new(group_input.outputs['Geometry'], switch.inputs[2])  # False (bypass)
-    
-    # Get index for random per-instance values
-    index = nodes.new('GeometryNodeInputIndex')
+    # Stable per-clone id written by the cloner (falls back to the index)
+    index = nodes.new('GeometryNodeInputID')
     
     # Random position
     random_position = nodes.new('FunctionNodeRandomValue')
@@ -65,7 +55,7 @@ def randomeffector_node_group():
     
     # Link seed and ID
     links.new(group_input.outputs['Seed'], random_position.inputs['Seed'])
-    links.new(index.outputs['Index'], random_position.inputs['ID'])
+    links.new(index.outputs['ID'], random_position.inputs['ID'])
     
     # Set random position range (-Position to +Position)
     vector_math_neg = nodes.new('ShaderNodeVectorMath')
@@ -82,7 +72,7 @@ def randomeffector_node_group():
     
     # Link seed and ID
     links.new(group_input.outputs['Seed'], random_rotation.inputs['Seed'])
-    links.new(index.outputs['Index'], random_rotation.inputs['ID'])
+    links.new(index.outputs['ID'], random_rotation.inputs['ID'])
     
     # Set rotation range (-Rotation to +Rotation)
     vector_math_neg_rot = nodes.new('ShaderNodeVectorMath')
@@ -103,9 +93,9 @@ def randomeffector_node_group():
     
     # Link seed and ID
     links.new(group_input.outputs['Seed'], random_scale.inputs['Seed'])
-    links.new(index.outputs['Index'], random_scale.inputs['ID'])
+    links.new(index.outputs['ID'], random_scale.inputs['ID'])
     links.new(group_input.outputs['Seed'], random_uniform_scale.inputs['Seed'])
-    links.new(index.outputs['Index'], random_uniform_scale.inputs['ID'])
+    links.new(index.outputs['ID'], random_uniform_scale.inputs['ID'])
     
     # Set scale range (1-Scale to 1+Scale)
     one_minus_scale = nodes.new('ShaderNodeVectorMath')
@@ -169,21 +159,57 @@ def randomeffector_node_group():
     links.new(random_rotation.outputs['Value'], strength_mul_rot.inputs[0])
     links.new(group_input.outputs['Strength'], strength_mul_rot.inputs[1])  # Strength
     
+    return apply_effector_field_weight(node_group, group_input, {
+        "translation": strength_mul_pos.outputs['Vector'],
+        "rotation": strength_mul_rot.outputs['Vector'],
+        "scale": scale_switch.outputs['Output'],
+    })
+
+@profiled
+def randomeffector_node_group():
+    """Create a random effector node group that applies random transformations to geometry"""
+    
+    # Create new node group
+    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name="RandomEffector")
+    
+    # --- Interface ---
+    # Output
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    
+    # Inputs
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    add_random_effector_inputs(node_group)
+    
+    # --- Nodes ---
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    
+    # Basic switch for enabling/disabling the effector
+    switch = nodes.new('GeometryNodeSwitch')
+    switch.input_type = 'GEOMETRY'
+    links.new(group_input.outputs['Enable'], switch.inputs[0])  # Switch
+    links.new(group_input.outputs['Geometry'], switch.inputs[2])  # False (bypass)
+    
+    offsets = build_random_offsets(node_group, group_input)
+    
     # Apply transformations to instances
     # Start with the input geometry
     translate_instances = nodes.new('GeometryNodeTranslateInstances')
     links.new(group_input.outputs['Geometry'], translate_instances.inputs['Instances'])
-    links.new(strength_mul_pos.outputs['Vector'], translate_instances.inputs['Translation'])
+    links.new(offsets["translation"], translate_instances.inputs['Translation'])
     
     # Rotate instances
     rotate_instances = nodes.new('GeometryNodeRotateInstances')
     links.new(translate_instances.outputs['Instances'], rotate_instances.inputs['Instances'])
-    links.new(strength_mul_rot.outputs['Vector'], rotate_instances.inputs['Rotation'])
+    links.new(offsets["rotation"], rotate_instances.inputs['Rotation'])
     
     # Scale instances
     scale_instances = nodes.new('GeometryNodeScaleInstances')
     links.new(rotate_instances.outputs['Instances'], scale_instances.inputs['Instances'])
-    links.new(scale_switch.outputs['Output'], scale_instances.inputs['Scale'])
+    links.new(offsets["scale"], scale_instances.inputs['Scale'])
     
     # Connect the transformed geometry to the switch (if enabled)
     links.new(scale_instances.outputs['Instances'], switch.inputs['True'])  # True (with effect)
@@ -193,6 +219,28 @@ def randomeffector_node_group():
     
     return node_group
 
+@profiled
+def randomeffector_field_node_group():
+    """Create a field-only random effector: outputs the offsets instead of transforming instances.
+
+    Used when several linked effectors are fused into one transform pass.
+    """
+    node_group = bpy.data.node_groups.new(type='GeometryNodeTree', name="RandomEffectorField")
+    
+    # --- Interface ---
+    add_effector_field_outputs(node_group)
+    add_random_effector_inputs(node_group)
+    
+    # --- Nodes ---
+    nodes = node_group.nodes
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    
+    offsets = build_random_offsets(node_group, group_input)
+    connect_effector_field_outputs(node_group, group_input, group_output, offsets)
+    
+    return node_group
+
 def register():
     pass
 
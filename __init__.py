@@ -19,6 +19,7 @@ from .src.cloners import GN_CircleCloner
 from .src.effectors import GN_RandomEffector
 from .src.effectors import GN_NoiseEffector
 # from .src.fields import GN_SphereField
+from .src.fields import GN_FieldShapes
 
 # Функции создания нод-групп
 from .src.cloners.GN_GridCloner import gridcloner3d_node_group
@@ -26,13 +27,21 @@ from .src.cloners.GN_LinearCloner import advancedlinearcloner_node_group
 from .src.cloners.GN_CircleCloner import circlecloner_node_group
 from .src.effectors.GN_RandomEffector import randomeffector_node_group
 from .src.effectors.GN_NoiseEffector import noiseeffector_node_group
-# from .src.fields.GN_SphereField import spherefield_node_group
+from .src.fields.GN_SphereField import spherefield_node_group
+from .src.fields.GN_FieldShapes import FIELD_SHAPE_GROUPS
 
 # UI-панели (они сами регистрируют свои классы внутри)
-from .src.ui import cloner_panel, effector_panel
+from .src.ui import cloner_panel, effector_panel, field_panel, profiling_panel
 
 # Импортируем утилиты
-from .utils.cloner_utils import update_cloner_with_effectors
+from .utils.cloner_utils import FUSABLE_EFFECTORS
+from .utils.node_utils import create_independent_node_group, create_shared_wrapper_node_group, TEMPLATE_VERSION
+from .utils.node_library import write_node_library
+from .utils import dependency_manager, field_binning, socket_schema, effector_binding, update_scheduler
+from .utils.update_scheduler import mark_cloner_dirty
+from .utils.socket_schema import set_modifier_inputs
+from .utils.dependency_manager import cloner_index
+from .utils.profiling import instrument_operator
 
 # Импортируем определения полей
 # from .src.fields import FIELD_CREATORS, FIELD_TYPES, FIELD_MOD_NAMES, FIELD_GROUP_NAMES, FIELD_NODE_GROUP_PREFIXES
@@ -93,44 +102,27 @@ EFFECTOR_MOD_NAMES = {
 CLONER_NODE_GROUP_PREFIXES = list(CLONER_GROUP_NAMES.values())
 EFFECTOR_NODE_GROUP_PREFIXES = list(EFFECTOR_GROUP_NAMES.values())
 
-# Общие функции для работы с нодами
-def create_independent_node_group(template_creator_func, base_node_name):
-    """Создает независимую копию группы узлов"""
-    # Создаем базовую группу узлов
-    template_node_group = template_creator_func()
-    if template_node_group is None:
-        return None
-    
-    # Создаем независимую копию
-    try:
-        independent_node_group = template_node_group.copy()
-    except Exception as e:
-        print(f"Failed to copy node group: {e}")
-        if template_node_group.users == 0:
-            try:
-                bpy.data.node_groups.remove(template_node_group, do_unlink=True)
-            except Exception as remove_e:
-                print(f"Warning: Could not remove template node group: {remove_e}")
-        return None
-    
-    # Удаляем шаблон или переименовываем его
-    if template_node_group.users == 0:
-        try:
-            bpy.data.node_groups.remove(template_node_group, do_unlink=True)
-        except Exception as e:
-            print(f"Warning: Could not remove template node group: {e}")
-    else:
-        template_node_group.name += ".template"
-    
-    # Создаем уникальное имя для копии
-    unique_node_name = base_node_name
-    counter = 1
-    while unique_node_name in bpy.data.node_groups:
-        unique_node_name = f"{base_node_name}.{counter:03d}"
-        counter += 1
-    independent_node_group.name = unique_node_name
-    
-    return independent_node_group
+def get_node_group_creators():
+    """Map every library node group name to its Python builder"""
+    creators = {}
+    for cloner_type, creator_func in CLONER_CREATORS.items():
+        creators[CLONER_GROUP_NAMES[cloner_type]] = creator_func
+    for effector_type, creator_func in EFFECTOR_CREATORS.items():
+        creators[EFFECTOR_GROUP_NAMES[effector_type]] = creator_func
+    for creator_func, group_name in FUSABLE_EFFECTORS.values():
+        creators[group_name] = creator_func
+    creators["SphereField"] = spherefield_node_group
+    for group_name, (shape, creator_func, label, display_type) in FIELD_SHAPE_GROUPS.items():
+        if creator_func is not None:
+            creators[group_name] = creator_func
+    return creators
+
+# Пересборка библиотеки нод-групп из Python билдеров.
+# Запуск: blender --background --factory-startup --python-expr
+#   "import advanced_cloners; advanced_cloners.regenerate_node_library()"
+def regenerate_node_library(filepath=None):
+    """Rebuild the bundled node group library from the Python builders"""
+    return write_node_library(get_node_group_creators(), TEMPLATE_VERSION, filepath)
 
 # ОПЕРАТОРЫ ДЛЯ КЛОНЕРОВ
 
@@ -141,6 +133,11 @@ class CLONER_OT_create_cloner(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
     
     cloner_type: bpy.props.StringProperty(default="GRID")
+    use_shared_graph: bpy.props.BoolProperty(
+        name="Shared Graph",
+        description="Reference one shared node group per cloner type instead of copying the whole graph",
+        default=False,
+    )
 
     def execute(self, context):
         if not context.active_object:
@@ -159,8 +156,11 @@ class CLONER_OT_create_cloner(bpy.types.Operator):
         base_node_name = CLONER_GROUP_NAMES[self.cloner_type]
         base_mod_name = CLONER_MOD_NAMES[self.cloner_type]
         
-        # Создаем группу узлов
-        node_group = create_independent_node_group(creator_func, base_node_name)
+        # Создаем группу узлов: полную копию графа или лёгкую обёртку над общим графом
+        if self.use_shared_graph:
+            node_group = create_shared_wrapper_node_group(creator_func, base_node_name)
+        else:
+            node_group = create_independent_node_group(creator_func, base_node_name)
         if node_group is None:
             self.report({'ERROR'}, f"Failed to create node group for {base_mod_name}")
             return {'CANCELLED'}
@@ -208,7 +208,8 @@ class CLONER_OT_create_cloner(bpy.types.Operator):
         modifier.node_group = node_group
         
         # Обновляем с эффекторами (изначально пустой список)
-        update_cloner_with_effectors(obj, modifier)
+        mark_cloner_dirty(obj, modifier)
+        cloner_index.invalidate(obj)
         
         self.report({'INFO'}, f"{base_mod_name} '{modifier_name}' created")
         return {'FINISHED'}
@@ -230,6 +231,7 @@ class CLONER_OT_delete_cloner(bpy.types.Operator):
             
             # Удаляем модификатор
             obj.modifiers.remove(modifier)
+            cloner_index.invalidate(obj)
             
             # Удаляем группу узлов, если она больше не используется
             if node_group and node_group.users == 0:
@@ -259,6 +261,7 @@ class CLONER_OT_move_modifier(bpy.types.Operator):
                 bpy.ops.object.modifier_move_up(modifier=self.modifier_name)
             else:
                 bpy.ops.object.modifier_move_down(modifier=self.modifier_name)
+            cloner_index.invalidate(obj)
         return {'FINISHED'}
 
 
@@ -315,33 +318,13 @@ class EFFECTOR_OT_create_effector(bpy.types.Operator):
         # Явно устанавливаем начальные значения для параметров эффектора
         # Это предотвратит влияние на клонеры до привязки
         try:
-            for socket in node_group.interface.items_tree:
-                if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT':
-                    if socket.name == "Enable":
-                        try:
-                            modifier[socket.identifier] = False
-                        except:
-                            pass
-                    elif socket.name == "Strength":
-                        try:
-                            modifier[socket.identifier] = 0.0
-                        except:
-                            pass
-                    elif socket.name == "Position":
-                        try:
-                            modifier[socket.identifier] = (0.0, 0.0, 0.0)
-                        except:
-                            pass
-                    elif socket.name == "Rotation":
-                        try:
-                            modifier[socket.identifier] = (0.0, 0.0, 0.0)
-                        except:
-                            pass
-                    elif socket.name == "Scale":
-                        try:
-                            modifier[socket.identifier] = (0.0, 0.0, 0.0)
-                        except:
-                            pass
+            set_modifier_inputs(modifier, {
+                "Enable": False,
+                "Strength": 0.0,
+                "Position": (0.0, 0.0, 0.0),
+                "Rotation": (0.0, 0.0, 0.0),
+                "Scale": (0.0, 0.0, 0.0),
+            })
         except Exception as e:
             print(f"Ошибка при установке начальных значений: {e}")
         
@@ -350,6 +333,7 @@ class EFFECTOR_OT_create_effector(bpy.types.Operator):
         # Для удобства настройки показываем в интерфейсе, но скрываем в viewport
         modifier.show_render = True
         modifier.show_viewport = False  # Отключаем отображение эффектора вообще
+        cloner_index.invalidate(obj)
         
         self.report({'INFO'}, f"{base_mod_name} '{modifier_name}' created. Link it to a cloner to use.")
         return {'FINISHED'}
@@ -371,6 +355,7 @@ class EFFECTOR_OT_delete_effector(bpy.types.Operator):
             
             # Удаляем модификатор
             obj.modifiers.remove(modifier)
+            cloner_index.invalidate(obj)
             
             # Удаляем группу узлов, если она больше не используется
             if node_group and node_group.users == 0:
@@ -400,10 +385,12 @@ class EFFECTOR_OT_move_modifier(bpy.types.Operator):
                 bpy.ops.object.modifier_move_up(modifier=self.modifier_name)
             else:
                 bpy.ops.object.modifier_move_down(modifier=self.modifier_name)
+            cloner_index.invalidate(obj)
         return {'FINISHED'}
 
 
-# ОПЕРАТОРЫ ДЛЯ ПОЛЕЙ - ЗАКОММЕНТИРОВАНЫ
+# ОПЕРАТОРЫ ДЛЯ ПОЛЕЙ
+# Создание полей (всех форм) - FIELD_OT_create_field в src/ui/field_panel.py
 
 # class FIELD_OT_create_field(bpy.types.Operator):
 #     """Create a new field"""
@@ -462,52 +449,65 @@ class EFFECTOR_OT_move_modifier(bpy.types.Operator):
 #             return {'CANCELLED'}
 # 
 # 
-# class FIELD_OT_delete_field(bpy.types.Operator):
-#     """Delete this field"""
-#     bl_idname = "object.delete_field"
-#     bl_label = "Delete Field"
-#     bl_options = {'REGISTER', 'UNDO'}
-# 
-#     modifier_name: bpy.props.StringProperty()
-# 
-#     def execute(self, context):
-#         obj = context.active_object
-#         if obj and self.modifier_name in obj.modifiers:
-#             modifier = obj.modifiers[self.modifier_name]
-#             node_group = modifier.node_group
-#             
-#             # Удаляем модификатор
-#             obj.modifiers.remove(modifier)
-#             
-#             # Удаляем группу узлов, если она больше не используется
-#             if node_group and node_group.users == 0:
-#                 bpy.data.node_groups.remove(node_group)
-#         
-#         return {'FINISHED'}
-# 
-# 
-# class FIELD_OT_move_field(bpy.types.Operator):
-#     """Move field up or down"""
-#     bl_idname = "object.move_field"
-#     bl_label = "Move Field"
-#     bl_options = {'REGISTER', 'UNDO'}
-# 
-#     modifier_name: bpy.props.StringProperty()
-#     direction: bpy.props.EnumProperty(
-#         items=[
-#             ('UP', 'Up', 'Move up'),
-#             ('DOWN', 'Down', 'Move down')
-#         ]
-#     )
-# 
-#     def execute(self, context):
-#         obj = context.active_object
-#         if obj and self.modifier_name in obj.modifiers:
-#             if self.direction == 'UP':
-#                 bpy.ops.object.modifier_move_up(modifier=self.modifier_name)
-#             else:
-#                 bpy.ops.object.modifier_move_down(modifier=self.modifier_name)
-#         return {'FINISHED'}
+class FIELD_OT_delete_field(bpy.types.Operator):
+    """Delete this field"""
+    bl_idname = "object.delete_field"
+    bl_label = "Delete Field"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    modifier_name: bpy.props.StringProperty()
+
+    def execute(self, context):
+        obj = context.active_object
+        if obj and self.modifier_name in obj.modifiers:
+            modifier = obj.modifiers[self.modifier_name]
+            node_group = modifier.node_group
+            
+            # Убираем поле из стеков эффекторов, их клонеры пересобираются отложенно
+            for effector_name in cloner_index.effectors(obj):
+                effector_mod = obj.modifiers.get(effector_name)
+                if not effector_mod or not effector_mod.node_group:
+                    continue
+                if dependency_manager.dependency_manager.unlink_field_from_effector(effector_mod, self.modifier_name):
+                    for cloner_name in cloner_index.linked_cloners(obj, effector_name):
+                        cloner_mod = obj.modifiers.get(cloner_name)
+                        if cloner_mod:
+                            mark_cloner_dirty(obj, cloner_mod)
+            
+            # Удаляем модификатор
+            obj.modifiers.remove(modifier)
+            cloner_index.invalidate(obj)
+            
+            # Удаляем группу узлов, если она больше не используется
+            if node_group and node_group.users == 0:
+                bpy.data.node_groups.remove(node_group)
+        
+        return {'FINISHED'}
+
+
+class FIELD_OT_move_field(bpy.types.Operator):
+    """Move field up or down"""
+    bl_idname = "object.move_field"
+    bl_label = "Move Field"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    modifier_name: bpy.props.StringProperty()
+    direction: bpy.props.EnumProperty(
+        items=[
+            ('UP', 'Up', 'Move up'),
+            ('DOWN', 'Down', 'Move down')
+        ]
+    )
+
+    def execute(self, context):
+        obj = context.active_object
+        if obj and self.modifier_name in obj.modifiers:
+            if self.direction == 'UP':
+                bpy.ops.object.modifier_move_up(modifier=self.modifier_name)
+            else:
+                bpy.ops.object.modifier_move_down(modifier=self.modifier_name)
+            cloner_index.invalidate(obj)
+        return {'FINISHED'}
 
 # РЕГИСТРАЦИЯ
 
@@ -519,9 +519,8 @@ classes = (
     EFFECTOR_OT_create_effector,
     EFFECTOR_OT_delete_effector,
     EFFECTOR_OT_move_modifier,
-    # FIELD_OT_create_field,
-    # FIELD_OT_delete_field,
-    # FIELD_OT_move_field,
+    FIELD_OT_delete_field,
+    FIELD_OT_move_field,
 )
 
 def register():
@@ -535,26 +534,48 @@ def register():
     GN_RandomEffector.register()
     GN_NoiseEffector.register()
     # GN_SphereField.register()
+    GN_FieldShapes.register()
     print("GN modules registered")
 
     # Register UI components
     print("Registering UI components...")
     cloner_panel.register()
+    profiling_panel.register()
     effector_panel.register()
-    # field_panel.register()
+    field_panel.register()
     print("UI components registered")
     
     # Register operators
     print("Registering operators...")
     for cls in classes:
-        bpy.utils.register_class(cls)
+        bpy.utils.register_class(instrument_operator(cls))
     print("Operators registered")
     
+    dependency_manager.register()
+    field_binning.register()
+    socket_schema.register()
+    effector_binding.register()
+    update_scheduler.register()
+    
+    bpy.types.Scene.cloner_use_shared_graph = bpy.props.BoolProperty(
+        name="Shared Graph",
+        description="New cloners reference one shared node group per type and keep their settings in modifier inputs",
+        default=False,
+    )
+    
     print("Advanced Cloners addon registered successfully")
 
 def unregister():
     print("Unregistering Advanced Cloners addon...")
     
+    del bpy.types.Scene.cloner_use_shared_graph
+    
+    update_scheduler.unregister()
+    effector_binding.unregister()
+    socket_schema.unregister()
+    field_binning.unregister()
+    dependency_manager.unregister()
+    
     # Unregister operators
     print("Unregistering operators...")
     for cls in reversed(classes):
@@ -563,14 +584,16 @@ def unregister():
     
     # Unregister UI components
     print("Unregistering UI components...")
-    # field_panel.unregister()
+    field_panel.unregister()
     effector_panel.unregister()
+    profiling_panel.unregister()
     cloner_panel.unregister()
     print("UI components unregistered")
     
     # Unregister GN modules
     print("Unregistering GN modules...")
     # GN_SphereField.unregister()
+    GN_FieldShapes.unregister()
     GN_RandomEffector.unregister()
     GN_NoiseEffector.unregister()
     GN_CircleCloner.unregister()
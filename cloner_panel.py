@@ -2,11 +2,13 @@ import bpy
 from bpy.types import Panel, Operator
 from bpy.props import StringProperty
 
-from ..cloners import CLONER_TYPES, CLONER_NODE_GROUP_PREFIXES
-from ..effectors import EFFECTOR_NODE_GROUP_PREFIXES as EFF_PREFIXES
+from ..cloners import CLONER_TYPES
 
-# Import the update_cloner_with_effectors function
-from ...utils.cloner_utils import update_cloner_with_effectors
+# Cloner rebuilds are coalesced by the update scheduler
+from ...utils.update_scheduler import mark_cloner_dirty
+from ...utils.dependency_manager import cloner_index
+from ...utils.socket_schema import get_socket_schema, get_input_identifier, set_modifier_inputs
+from ...utils.profiling import instrument_operator
 
 # ——— Операторы для привязки/отвязки эффекторов ———
 
@@ -23,22 +25,8 @@ class CLONER_OT_add_effector(Operator):
         grp = mod.node_group
         linked = list(grp.get("linked_effectors", []))
         
-        # Найдем все эффекторы на объекте
-        unlinked_effectors = []
-        for m in obj.modifiers:
-            if not m.node_group:
-                continue
-                
-            # Проверяем, что это эффектор
-            is_effector = False
-            for prefix in EFF_PREFIXES:
-                if m.node_group.name.startswith(prefix):
-                    is_effector = True
-                    break
-                    
-            # Проверяем, что эффектор еще не связан с этим клонером
-            if is_effector and m.name not in linked:
-                unlinked_effectors.append(m.name)
+        # Эффекторы объекта, ещё не связанные с этим клонером
+        unlinked_effectors = cloner_index.unlinked_effectors(obj, mod.name)
         
         # Если нет несвязанных эффекторов, сообщаем об этом
         if not unlinked_effectors:
@@ -49,6 +37,7 @@ class CLONER_OT_add_effector(Operator):
         added_effector_name = unlinked_effectors[0]
         linked.append(added_effector_name)
         grp["linked_effectors"] = linked
+        cloner_index.link(obj, mod.name, added_effector_name)
         
         # Активируем эффектор, устанавливая его параметры
         effector_mod = obj.modifiers.get(added_effector_name)
@@ -56,22 +45,11 @@ class CLONER_OT_add_effector(Operator):
             # Включаем отображение эффектора, так как он теперь привязан
             effector_mod.show_viewport = True
             
-            # Ищем параметры Enable и Strength в интерфейсе эффектора
-            for socket in effector_mod.node_group.interface.items_tree:
-                if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT':
-                    if socket.name == "Enable":
-                        try:
-                            effector_mod[socket.identifier] = True
-                        except:
-                            pass
-                    elif socket.name == "Strength":
-                        try:
-                            effector_mod[socket.identifier] = 1.0
-                        except:
-                            pass
+            # Включаем параметры Enable и Strength эффектора
+            set_modifier_inputs(effector_mod, {"Enable": True, "Strength": 1.0})
         
-        # Обновляем нод-группу клонера с эффекторами
-        update_cloner_with_effectors(obj, mod)
+        # Нод-группа клонера пересобирается отложенно, один раз на клонер
+        mark_cloner_dirty(obj, mod)
         
         return {'FINISHED'}
 
@@ -91,15 +69,11 @@ class CLONER_OT_remove_effector(Operator):
         if self.effector_name in linked:
             linked.remove(self.effector_name)
             grp["linked_effectors"] = linked
+            cloner_index.unlink(obj, mod.name, self.effector_name)
             
             # Проверим, нужно ли отключить эффектор полностью
             # Проверяем, связан ли эффектор с другими клонерами
-            effector_still_used = False
-            for m in obj.modifiers:
-                if m != mod and m.type == 'NODES' and m.node_group and m.node_group.get("linked_effectors") is not None:
-                    if self.effector_name in m.node_group.get("linked_effectors", []):
-                        effector_still_used = True
-                        break
+            effector_still_used = bool(cloner_index.linked_cloners(obj, self.effector_name))
             
             # Если эффектор больше не используется нигде, отключаем его
             if not effector_still_used:
@@ -108,25 +82,61 @@ class CLONER_OT_remove_effector(Operator):
                     # Отключаем видимость эффектора, так как он больше не привязан ни к одному клонеру
                     effector_mod.show_viewport = False
                     
-                    # Ищем параметры Enable и Strength в интерфейсе эффектора
-                    for socket in effector_mod.node_group.interface.items_tree:
-                        if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT':
-                            if socket.name == "Enable":
-                                try:
-                                    effector_mod[socket.identifier] = False
-                                except:
-                                    pass
-                            elif socket.name == "Strength":
-                                try:
-                                    effector_mod[socket.identifier] = 0.0
-                                except:
-                                    pass
+                    # Выключаем параметры Enable и Strength эффектора
+                    set_modifier_inputs(effector_mod, {"Enable": False, "Strength": 0.0})
             
-            # Обновляем нод-группу клонера с эффекторами
-            update_cloner_with_effectors(obj, mod)
+            # Нод-группа клонера пересобирается отложенно, один раз на клонер
+            mark_cloner_dirty(obj, mod)
             
         return {'FINISHED'}
 
+class CLONER_OT_toggle_fuse_effectors(Operator):
+    bl_idname = "object.cloner_toggle_fuse_effectors"
+    bl_label  = "Fuse Effectors"
+    bl_description = "Compile linked effectors into a single transform pass (order-independent)"
+    bl_options = {'REGISTER', 'UNDO'}
+    cloner_name: StringProperty()
+
+    def execute(self, context):
+        obj = context.active_object
+        mod = obj.modifiers.get(self.cloner_name)
+        if not mod or not mod.node_group:
+            return {'CANCELLED'}
+        grp = mod.node_group
+        grp["fuse_effectors"] = not grp.get("fuse_effectors", False)
+        
+        # Меняется состав узлов цепочки, перестраиваем её целиком
+        mark_cloner_dirty(obj, mod, full_rebuild=True)
+        
+        return {'FINISHED'}
+
+class CLONER_OT_use_scene_camera(Operator):
+    bl_idname = "object.cloner_use_scene_camera"
+    bl_label = "Use Scene Camera"
+    bl_description = "Cull clones against the active scene camera (camera and field of view)"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    cloner_name: StringProperty()
+    
+    def execute(self, context):
+        obj = context.active_object
+        mod = obj.modifiers.get(self.cloner_name)
+        camera = context.scene.camera
+        if not mod or not mod.node_group or camera is None or camera.type != 'CAMERA':
+            self.report({'WARNING'}, "No active scene camera")
+            return {'CANCELLED'}
+        
+        # Угол обзора камеры недоступен в геометрических нодах, копируем его в модификатор
+        values = {
+            "Cull Camera": camera,
+            "Cull Field of View": max(camera.data.angle_x, camera.data.angle_y),
+            "Cull Frustum": True,
+        }
+        set_modifier_inputs(mod, values)
+        
+        obj.update_tag()
+        return {'FINISHED'}
+
 class CLONER_OT_create_material(Operator):
     bl_idname = "object.cloner_create_material"
     bl_label = "Create New Material"
@@ -145,11 +155,7 @@ class CLONER_OT_create_material(Operator):
         new_material.use_nodes = True
         
         # Получаем текущий цвет из параметра Color клонера
-        color_param_name = None
-        for item in mod.node_group.interface.items_tree:
-            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == "Color":
-                color_param_name = item.identifier
-                break
+        color_param_name = get_input_identifier(mod.node_group, "Color")
                 
         if color_param_name:
             try:
@@ -163,11 +169,7 @@ class CLONER_OT_create_material(Operator):
                 pass
                 
         # Устанавливаем созданный материал в параметр Material клонера
-        material_param_name = None
-        for item in mod.node_group.interface.items_tree:
-            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == "Material":
-                material_param_name = item.identifier
-                break
+        material_param_name = get_input_identifier(mod.node_group, "Material")
                 
         if material_param_name:
             try:
@@ -195,28 +197,28 @@ class CLONER_PT_main_panel(Panel):
         box = layout.box()
         box.label(text="Create:", icon='ADD')
         col = box.column(align=True)
+        use_shared_graph = context.scene.cloner_use_shared_graph
         for cid, name, _, icon in CLONER_TYPES:
             op = col.operator("object.create_cloner", text=name, icon=icon)
             op.cloner_type = cid
+            op.use_shared_graph = use_shared_graph
+        box.prop(context.scene, "cloner_use_shared_graph")
 
         if not obj:
             layout.label(text="Select an object")
             return
 
-        # найдём ваши модификаторы-клонеры
-        mods = [
-            m for m in obj.modifiers
-            if m.type == 'NODES' and m.node_group
-               and any(m.node_group.name.startswith(p) for p in CLONER_NODE_GROUP_PREFIXES)
-        ]
-        if not mods:
+        # найдём ваши модификаторы-клонеры (по индексу, без обхода стека)
+        index_entry = cloner_index.get(obj)
+        if not index_entry.cloners:
             layout.label(text="No cloners")
             return
 
         layout.label(text="Cloners:", icon='MODIFIER')
-        idxs = {m.name: i for i, m in enumerate(obj.modifiers)}
-        for m in mods:
-            if m.name in idxs:
+        idxs = index_entry.indices
+        for name in index_entry.cloners:
+            m = obj.modifiers.get(name)
+            if m is not None and m.node_group:
                 self.draw_cloner_ui(context, layout, obj, m, idxs)
 
     def draw_cloner_ui(self, context, layout, obj, mod, indices):
@@ -265,7 +267,8 @@ class CLONER_PT_main_panel(Panel):
         if mod.show_expanded and mod.node_group and hasattr(mod.node_group, 'interface'):
             # — Linked Effectors —
             linked = mod.node_group.get("linked_effectors", [])
-            if linked or has_unlinked_effectors(obj, linked):
+            can_link = has_unlinked_effectors(obj, mod.name)
+            if linked or can_link:
                 eff_box = box.box()
                 eff_box.label(text="Effectors:", icon='LINKED')
                 
@@ -278,9 +281,16 @@ class CLONER_PT_main_panel(Panel):
                     op.effector_name = en
                 
                 # Кнопка добавления эффектора
-                if has_unlinked_effectors(obj, linked):
+                if can_link:
                     add = eff_box.operator("object.cloner_add_effector", text="Add Effector", icon='ADD')
                     add.cloner_name = mod.name
+                
+                # Компиляция эффекторов в один проход трансформации
+                if len(linked) > 1:
+                    fused = mod.node_group.get("fuse_effectors", False)
+                    fuse = eff_box.operator("object.cloner_toggle_fuse_effectors", text="Fuse Effectors",
+                                            icon='AUTOMERGE_ON' if fused else 'AUTOMERGE_OFF', depress=fused)
+                    fuse.cloner_name = mod.name
 
             # Параметры клонера, сгруппированные по категориям
             # Group parameters by category for better organization
@@ -290,10 +300,12 @@ class CLONER_PT_main_panel(Panel):
             material_params = []
             random_params = []
             collection_params = []
+            viewport_params = []
+            culling_params = []
             other_params = []
             
-            for item in mod.node_group.interface.items_tree:
-                if item.item_type=='SOCKET' and item.in_out=='INPUT' and item.name!="Geometry":
+            for item in get_socket_schema(mod.node_group).inputs.values():
+                if item.name!="Geometry":
                     # Categorize parameters
                     if item.name in ["Count", "Count X", "Count Y", "Count Z", "Spacing", "Offset", "Radius", "Height"]:
                         basic_params.append(item)
@@ -305,8 +317,12 @@ class CLONER_PT_main_panel(Panel):
                         material_params.append(item)
                     elif item.name.startswith("Random "):
                         random_params.append(item)
-                    elif item.name in ["Pick Random Instance"]:
+                    elif item.name in ["Pick Random Instance"] or item.name.startswith("LOD "):
                         collection_params.append(item)
+                    elif item.name.startswith("Viewport "):
+                        viewport_params.append(item)
+                    elif item.name.startswith("Cull "):
+                        culling_params.append(item)
                     else:
                         other_params.append(item)
             
@@ -387,6 +403,26 @@ class CLONER_PT_main_panel(Panel):
                     r.context_pointer_set("modifier", mod)
                     r.prop(mod, f'["{item.identifier}"]', text=item.name)
             
+            # Draw Culling Parameters
+            if culling_params:
+                culling_box = box.box()
+                culling_box.label(text="Culling:", icon='CAMERA_DATA')
+                r = culling_box.row()
+                r.operator("object.cloner_use_scene_camera", icon='VIEW_CAMERA').cloner_name = mod.name
+                for item in culling_params:
+                    r = culling_box.row()
+                    r.context_pointer_set("modifier", mod)
+                    r.prop(mod, f'["{item.identifier}"]', text=item.name.replace("Cull ", ""))
+            
+            # Draw Viewport Parameters (budget and proxy display, render uses the full count)
+            if viewport_params:
+                viewport_box = box.box()
+                viewport_box.label(text="Viewport:", icon='RESTRICT_VIEW_OFF')
+                for item in viewport_params:
+                    r = viewport_box.row()
+                    r.context_pointer_set("modifier", mod)
+                    r.prop(mod, f'["{item.identifier}"]', text=item.name.replace("Viewport ", ""))
+            
             # Draw Collection Parameters
             if collection_params:
                 collection_box = box.box()
@@ -407,33 +443,22 @@ class CLONER_PT_main_panel(Panel):
 
 
 # Вспомогательная функция для проверки наличия несвязанных эффекторов
-def has_unlinked_effectors(obj, linked):
-    for m in obj.modifiers:
-        if not m.node_group:
-            continue
-        
-        # Проверяем, что это эффектор
-        is_effector = False
-        for prefix in EFF_PREFIXES:
-            if m.node_group.name.startswith(prefix):
-                is_effector = True
-                break
-                
-        if is_effector and m.name not in linked:
-            return True
-    return False
+def has_unlinked_effectors(obj, cloner_name):
+    return cloner_index.has_unlinked_effectors(obj, cloner_name)
 
 # регистрируем всё вместе
 classes = (
     CLONER_OT_add_effector,
     CLONER_OT_remove_effector,
+    CLONER_OT_toggle_fuse_effectors,
+    CLONER_OT_use_scene_camera,
     CLONER_OT_create_material,
     CLONER_PT_main_panel,
 )
 
 def register():
     for cls in classes:
-        bpy.utils.register_class(cls)
+        bpy.utils.register_class(instrument_operator(cls))
 
 def unregister():
     for cls in reversed(classes):
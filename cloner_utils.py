@@ -1,13 +1,55 @@
 import bpy
 from ..src.effectors import EFFECTOR_NODE_GROUP_PREFIXES
+from ..src.effectors.GN_RandomEffector import randomeffector_field_node_group
+from ..src.effectors.GN_NoiseEffector import noiseeffector_field_node_group
+from ..src.fields.GN_FieldShapes import (get_field_shape, add_field_shape_inputs, build_field_value,
+                                         set_menu_defaults, FIELD_BLEND_OPERATIONS)
+from .node_utils import get_node_group_template
+from .field_binning import field_bins
+from .socket_schema import socket_schema, get_socket_schema, get_modifier_input
+from .profiling import profiled
 
-def update_cloner_with_effectors(obj, cloner_mod):
+EFFECTOR_NODE_PREFIX = 'Effector_'
+
+# Узлы полей, подключённые ко входу Field эффекторов внутри графа клонера
+FIELD_NODE_PREFIX = 'EffectorField_'
+FIELD_STACK_SUFFIX = ".FieldStack"
+
+# Слои полей включаются с этого числа локальных полей: при меньшем числе
+# разделение и сборка геометрии стоят дороже, чем сами поля
+FIELD_SLAB_MIN_FIELDS = 4
+FIELD_STACK_INDEX_ATTRIBUTE = ".field_stack_index"
+FIELD_STACK_FALLOFF_ATTRIBUTE = ".field_stack_falloff"
+
+# Узел, заменяющий всю цепочку эффекторов в режиме fuse_effectors
+FUSED_NODE_NAME = f"{EFFECTOR_NODE_PREFIX}Fused"
+FUSED_STACK_SUFFIX = ".EffectorStack"
+
+# Префикс нод-группы эффектора -> (билдер field-варианта, базовое имя шаблона)
+FUSABLE_EFFECTORS = {
+    "RandomEffector": (randomeffector_field_node_group, "RandomEffectorField"),
+    "NoiseEffector": (noiseeffector_field_node_group, "NoiseEffectorField"),
+}
+
+@profiled
+def update_cloner_with_effectors(obj, cloner_mod, full_rebuild=False):
     """
-    Обновляет нод-группу клонера, применяя связанные эффекторы более эффективным способом.
+    Обновляет нод-группу клонера, применяя связанные эффекторы инкрементально.
+    
+    Старая цепочка эффекторов сравнивается с новым списком linked_effectors:
+    добавляются, удаляются и переставляются только изменившиеся узлы.
+    Неизменённые узлы и связи сохраняют свою идентичность, поэтому кэш
+    вычислителя для них не сбрасывается.
     
     Args:
         obj: Объект, содержащий модификатор
         cloner_mod: Модификатор клонера с нод-группой
+        full_rebuild: Удалить все узлы эффекторов и построить цепочку заново
+    
+    Если у нод-группы клонера установлено свойство "fuse_effectors" и все
+    эффекторы цепочки поддерживают field-вариант, цепочка заменяется одним
+    узлом FUSED_NODE_NAME: смещения суммируются, масштабы перемножаются и
+    инстансы трансформируются один раз.
     """
     if not cloner_mod or not cloner_mod.node_group:
         return
@@ -15,200 +57,133 @@ def update_cloner_with_effectors(obj, cloner_mod):
     node_group = cloner_mod.node_group
     linked_effectors = node_group.get("linked_effectors", [])
     
-    # Проверяем валидность списка эффекторов
+    # Проверяем валидность списка эффекторов и сокетов - за один проход
     valid_linked_effectors = []
+    chain_effectors = []
     for eff_name in linked_effectors:
         eff_mod = obj.modifiers.get(eff_name)
-        if eff_mod is not None and eff_mod.node_group:
-            # Проверяем, что этот эффектор реально является эффектором
-            is_effector = any(eff_mod.node_group.name.startswith(p) for p in EFFECTOR_NODE_GROUP_PREFIXES)
-            if is_effector:
-                valid_linked_effectors.append(eff_name)
+        if eff_mod is None or not eff_mod.node_group:
+            continue
+        # Проверяем, что этот эффектор реально является эффектором
+        if not any(eff_mod.node_group.name.startswith(p) for p in EFFECTOR_NODE_GROUP_PREFIXES):
+            continue
+        valid_linked_effectors.append(eff_name)
+        
+        # Проверка на наличие входного и выходного сокета Geometry
+        if has_geometry_sockets(eff_mod.node_group, eff_name):
+            chain_effectors.append(eff_name)
     
     # Если список изменился, обновляем его
     if len(valid_linked_effectors) != len(linked_effectors):
         node_group["linked_effectors"] = valid_linked_effectors
-        linked_effectors = valid_linked_effectors
-    
-    # Сначала получим список всех связанных эффекторов (старых)
-    old_effectors = []
-    effector_nodes = [n for n in node_group.nodes if n.name.startswith('Effector_')]
-    for node in effector_nodes:
-        effector_name = node.name.replace('Effector_', '')
-        if effector_name not in old_effectors:
-            old_effectors.append(effector_name)
-    
-    if not linked_effectors:
-        # Если нет эффекторов, проверим, не осталось ли от предыдущих связей
-        # Найдем старые узлы эффекторов и удалим их
-        if effector_nodes:
-            # Восстановим прямую связь от основной геометрии к выходу
-            restore_direct_connection(node_group)
-            
-            # Удаляем старые узлы эффекторов
-            for node in effector_nodes:
-                try:
-                    node_group.nodes.remove(node)
-                except Exception as e:
-                    print(f"Ошибка при удалении узла: {e}")
-                
-            # Включим видимость всех отвязанных эффекторов (только рендер)
-            for effector_name in old_effectors:
-                effector_mod = obj.modifiers.get(effector_name)
-                if effector_mod:
-                    # Включаем рендер эффектора, т.к. он был отвязан
-                    effector_mod.show_render = True
-        return
-        
-    # Находим новые и удаляемые эффекторы для управления видимостью
-    to_add = [e for e in linked_effectors if e not in old_effectors]
-    to_remove = [e for e in old_effectors if e not in linked_effectors]
     
-    # Найдем выходной узел и его входящую связь
+    # Все узлы эффекторов в графе (включая оставшиеся вне цепочки после ошибок)
+    existing_nodes = {}
     group_output = None
     for node in node_group.nodes:
-        if node.type == 'GROUP_OUTPUT':
+        if node.name.startswith(EFFECTOR_NODE_PREFIX):
+            existing_nodes[node.name] = node
+        elif node.type == 'GROUP_OUTPUT' and group_output is None:
             group_output = node
-            break
     
     if not group_output:
         return
     
-    # Найдем исходный узел клонера, с которого начнем цепочку
-    source_node = None
-    # Сначала ищем конкретные типы узлов, которые обычно являются последними в цепочке клонера
-    for node in node_group.nodes:
-        # Ищем узлы трансформации
-        if 'Transform' in node.bl_idname and not node.name.startswith('Effector_'):
-            for output in node.outputs:
-                if output.name == 'Geometry' and any(link.to_node == group_output for link in output.links):
-                    source_node = node
-                    source_socket = output
-                    break
-            if source_node:
-                break
+    old_effectors = [name[len(EFFECTOR_NODE_PREFIX):] for name in existing_nodes if name != FUSED_NODE_NAME]
+    fused_node = existing_nodes.get(FUSED_NODE_NAME)
+    if fused_node is not None and fused_node.node_tree:
+        # Эффекторы, скомпилированные в fused-стек, тоже считаются связанными
+        old_effectors.extend(fused_node.node_tree.get("effectors", []))
     
-    # Если не нашли, то ищем любой узел геометрии, связанный с выходом
-    if not source_node:
-        for node in node_group.nodes:
-            if node != group_output and not node.name.startswith('Effector_'):
-                for output in node.outputs:
-                    if output.name == 'Geometry' and any(link.to_node == group_output for link in output.links):
-                        source_node = node
-                        source_socket = output
-                        break
-                if source_node:
-                    break
-    
-    if not source_node:
+    # Находим исходный сокет клонера, идя по текущей цепочке от выхода назад
+    source_socket = find_chain_source(node_group, group_output)
+    if source_socket is None:
+        if not chain_effectors and not existing_nodes:
+            return
         print("Не удалось найти исходный узел клонера для подключения эффекторов")
         return
+    source_node = source_socket.node
     
-    # Находим и удаляем все существующие связи от исходного узла к выходу
-    links_to_remove = []
-    for link in node_group.links:
-        if link.from_node == source_node and link.to_node == group_output:
-            links_to_remove.append(link)
+    if full_rebuild:
+        for node in existing_nodes.values():
+            node_group.nodes.remove(node)
+        existing_nodes = {}
     
-    for link in links_to_remove:
-        try:
-            node_group.links.remove(link)
-        except RuntimeError:
-            # Связь уже была удалена
-            pass
+    # Узлы цепочки: (имя узла, нод-группа, модификатор эффектора или None)
+    chain_entries = []
+    if node_group.get("fuse_effectors", False) and can_fuse_effectors(obj, chain_effectors):
+        fused_node = existing_nodes.get(FUSED_NODE_NAME)
+        stack_group = compile_fused_effector_stack(
+            obj, node_group, chain_effectors,
+            fused_node.node_tree if fused_node is not None else None
+        )
+        if stack_group is not None:
+            chain_entries.append((FUSED_NODE_NAME, stack_group, None))
+    if not chain_entries:
+        for name in chain_effectors:
+            effector_mod = obj.modifiers.get(name)
+            chain_entries.append((f"{EFFECTOR_NODE_PREFIX}{name}", effector_mod.node_group, effector_mod))
     
-    # Удалим старые узлы эффекторов, если они есть
-    for node in effector_nodes:
-        node_group.nodes.remove(node)
-    
-    # Добавляем эффекторы по цепочке, начиная с исходного узла клонера
-    current_geo = source_socket
+    # Удаляем только узлы эффекторов, которых больше нет в списке
+    desired_names = {entry[0] for entry in chain_entries}
+    for node_name in list(existing_nodes):
+        if node_name not in desired_names:
+            try:
+                node = existing_nodes.pop(node_name)
+                stack_group = node.node_tree if node_name == FUSED_NODE_NAME else None
+                node_group.nodes.remove(node)
+                # Fused-стек принадлежит только этому клонеру
+                if stack_group is not None and stack_group.users == 0:
+                    bpy.data.node_groups.remove(stack_group)
+            except Exception as e:
+                print(f"Ошибка при удалении узла: {e}")
     
     # Сохраняем позиции для размещения новых узлов
     pos_x = source_node.location.x + 200
     pos_y = source_node.location.y
     spacing = 250
     
-    # Проверяем эффекторы перед добавлением, чтобы правильно обработать случай с несколькими эффекторами одного типа
-    for effector_name in linked_effectors:
-        # Находим модификатор эффектора
+    # Отключаем только рендер эффекторов цепочки, но оставляем их видимыми во viewport,
+    # чтобы можно было видеть и настраивать их параметры
+    for effector_name in chain_effectors:
         effector_mod = obj.modifiers.get(effector_name)
-        if not effector_mod or not effector_mod.node_group:
-            continue
-            
-        # Отключаем только рендер эффектора, но оставляем видимым во viewport,
-        # чтобы можно было видеть и настраивать его параметры
-        effector_mod.show_render = False
-        
-        # Проверяем, что нод-группа эффектора действительно содержит нужные входы/выходы
-        effector_group = effector_mod.node_group
-        
-        # Проверка на наличие входного и выходного сокета Geometry через interface.items_tree
-        try:
-            input_sockets = [s.name for s in effector_group.interface.items_tree if s.item_type == 'SOCKET' and s.in_out == 'INPUT']
-            output_sockets = [s.name for s in effector_group.interface.items_tree if s.item_type == 'SOCKET' and s.in_out == 'OUTPUT']
-            
-            if 'Geometry' not in output_sockets:
-                print(f"Эффектор {effector_name} не имеет выхода Geometry")
-                continue
-            if 'Geometry' not in input_sockets:
-                print(f"Эффектор {effector_name} не имеет входа Geometry")
-                continue
-        except Exception as e:
-            print(f"Ошибка при проверке сокетов эффектора {effector_name}: {e}")
-            continue
+        if effector_mod.show_render:
+            effector_mod.show_render = False
     
-    # Теперь добавляем узлы эффекторов и создаем связи
-    for effector_name in linked_effectors:
-        # Находим модификатор эффектора
-        effector_mod = obj.modifiers.get(effector_name)
-        if not effector_mod or not effector_mod.node_group:
-            continue
-            
-        # Нод-группа эффектора
-        effector_group = effector_mod.node_group
-        
-        # Создаем уникальное имя для узла эффектора
-        node_name = f"Effector_{effector_name}"
-        
-        # Создаем узел группы эффектора
+    # Создаём недостающие узлы и переподключаем только изменившиеся связи
+    current_geo = source_socket
+    used_field_nodes = set()
+    for node_name, effector_group, effector_mod in chain_entries:
+        effector_node = existing_nodes.get(node_name)
         try:
-            effector_node = node_group.nodes.new('GeometryNodeGroup')
-            effector_node.name = node_name
-            effector_node.node_tree = effector_group
+            if effector_node is None:
+                effector_node = node_group.nodes.new('GeometryNodeGroup')
+                effector_node.name = node_name
+                effector_node.node_tree = effector_group
+                existing_nodes[node_name] = effector_node
+            elif effector_node.node_tree != effector_group:
+                effector_node.node_tree = effector_group
             
             # Устанавливаем положение узла
-            effector_node.location = (pos_x, pos_y)
+            if tuple(effector_node.location) != (pos_x, pos_y):
+                effector_node.location = (pos_x, pos_y)
             pos_x += spacing
             
-            # Скопируем значения параметров из модификатора эффектора
-            for input_socket in [s for s in effector_group.interface.items_tree if s.item_type == 'SOCKET' and s.in_out == 'INPUT']:
-                if input_socket.name in ['Geometry']:
-                    continue  # Пропускаем вход геометрии
-                
-                # Если параметр не входит в сокеты или не имеет установленного значения в модификаторе, пропускаем
-                if input_socket.identifier not in effector_mod:
-                    continue
-                    
-                # Копируем значение параметра из модификатора в узел
-                try:
-                    effector_node.inputs[input_socket.name].default_value = effector_mod[input_socket.identifier]
-                except (KeyError, TypeError) as e:
-                    print(f"Не удалось установить значение для {input_socket.name}: {e}")
-                    # Если не удалось установить значение, пропускаем
-                    pass
-            
             # Подключаем геометрию от предыдущего узла к входу эффектора
-            try:
-                node_group.links.new(current_geo, effector_node.inputs['Geometry'])
-            except Exception as e:
-                print(f"Ошибка при создании связи к эффектору {effector_name}: {e}")
-                continue
+            ensure_link(node_group, current_geo, effector_node.inputs['Geometry'])
+            
+            # Скопируем изменившиеся значения параметров из модификатора эффектора
+            # (узлы fused-стека синхронизируются при его компиляции)
+            if effector_mod is not None:
+                sync_effector_node_inputs(effector_node, effector_mod)
+                field_node_name = update_effector_field_node(obj, node_group, effector_node, effector_mod)
+                if field_node_name:
+                    used_field_nodes.add(field_node_name)
             
             # Устанавливаем выход эффектора как текущую геометрию для следующего эффектора
             current_geo = effector_node.outputs['Geometry']
         except Exception as e:
-            print(f"Ошибка при создании узла эффектора {effector_name}: {e}")
+            print(f"Ошибка при создании узла эффектора {node_name}: {e}")
             # Восстанавливаем прямую связь в случае ошибки
             try:
                 node_group.links.new(source_socket, group_output.inputs['Geometry'])
@@ -216,22 +191,577 @@ def update_cloner_with_effectors(obj, cloner_mod):
                 pass
             return
     
-    # Подключаем последний эффектор к выходу
+    remove_unused_field_nodes(node_group, used_field_nodes)
+    
+    # Подключаем последний эффектор (или сам клонер) к выходу
     try:
-        node_group.links.new(current_geo, group_output.inputs['Geometry'])
+        ensure_link(node_group, current_geo, group_output.inputs['Geometry'])
     except Exception as e:
         print(f"Ошибка при создании финальной связи: {e}")
         # Восстанавливаем прямую связь при ошибке
         restore_direct_connection(node_group)
     
     # Включаем все отвязанные эффекторы (только рендер)
-    for effector_name in to_remove:
+    for effector_name in old_effectors:
+        if effector_name in chain_effectors:
+            continue
         effector_mod = obj.modifiers.get(effector_name)
         if effector_mod:
             # Включаем рендер эффектора, т.к. он был отвязан
             effector_mod.show_render = True
 
 
+def get_fusable_field_creator(effector_group):
+    """Return (field builder, template name) for an effector group, or None if it cannot be fused"""
+    for prefix, creator in FUSABLE_EFFECTORS.items():
+        if effector_group.name.startswith(prefix):
+            return creator
+    return None
+
+
+def can_fuse_effectors(obj, effector_names):
+    """Check that every effector in the chain has a field-only variant"""
+    if not effector_names:
+        return False
+    for name in effector_names:
+        effector_mod = obj.modifiers.get(name)
+        if effector_mod is None or get_fusable_field_creator(effector_mod.node_group) is None:
+            return False
+    return True
+
+
+def compile_fused_effector_stack(obj, cloner_group, effector_names, stack_group=None):
+    """
+    Компилирует цепочку эффекторов в одну нод-группу с одним проходом трансформации.
+    
+    Каждый эффектор добавляется как field-вариант (выходы Translation/Rotation/Scale).
+    Граф стека пересобирается только при изменении списка эффекторов или их шаблонов,
+    в остальных случаях обновляются лишь значения входов.
+    
+    Порядок эффекторов в fused-режиме не важен: смещения и вращения складываются,
+    масштабы перемножаются.
+    """
+    field_groups = []
+    for name in effector_names:
+        creator_func, base_name = get_fusable_field_creator(obj.modifiers[name].node_group)
+        field_group = get_node_group_template(creator_func, base_name)
+        if field_group is None:
+            print(f"Не удалось создать field-вариант эффектора {name}")
+            return None
+        field_groups.append((name, field_group))
+    
+    if stack_group is None:
+        stack_name = f"{cloner_group.name}{FUSED_STACK_SUFFIX}"
+        stack_group = bpy.data.node_groups.get(stack_name)
+        if stack_group is None:
+            stack_group = bpy.data.node_groups.new(type='GeometryNodeTree', name=stack_name)
+            stack_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+            stack_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    
+    # Пересобираем граф стека только если изменился состав эффекторов
+    nodes = stack_group.nodes
+    up_to_date = list(stack_group.get("effectors", [])) == list(effector_names)
+    if up_to_date:
+        for name, field_group in field_groups:
+            field_node = nodes.get(f"{EFFECTOR_NODE_PREFIX}{name}")
+            if field_node is None or field_node.node_tree != field_group:
+                up_to_date = False
+                break
+    if not up_to_date:
+        build_fused_effector_stack(stack_group, field_groups)
+        stack_group["effectors"] = list(effector_names)
+    
+    group_input = next(node for node in nodes if node.type == 'GROUP_INPUT')
+    used_field_nodes = set()
+    for name, field_group in field_groups:
+        field_node = nodes[f"{EFFECTOR_NODE_PREFIX}{name}"]
+        sync_effector_node_inputs(field_node, obj.modifiers[name])
+        field_node_name = update_effector_field_node(obj, stack_group, field_node, obj.modifiers[name],
+                                                     group_input.outputs['Geometry'])
+        if field_node_name:
+            used_field_nodes.add(field_node_name)
+    remove_unused_field_nodes(stack_group, used_field_nodes)
+    
+    return stack_group
+
+
+def build_fused_effector_stack(stack_group, field_groups):
+    """Build the fused stack graph: field effectors -> summed offsets -> one translate/rotate/scale"""
+    nodes = stack_group.nodes
+    links = stack_group.links
+    nodes.clear()
+    
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    group_input.location = (-400, 0)
+    
+    translation = rotation = scale = None
+    pos_y = -200
+    for name, field_group in field_groups:
+        field_node = nodes.new('GeometryNodeGroup')
+        field_node.name = f"{EFFECTOR_NODE_PREFIX}{name}"
+        field_node.node_tree = field_group
+        field_node.location = (-200, pos_y)
+        pos_y -= 250
+        if 'Geometry' in field_node.inputs:
+            links.new(group_input.outputs['Geometry'], field_node.inputs['Geometry'])
+        
+        translation = accumulate_vector(stack_group, translation, field_node.outputs['Translation'], 'ADD')
+        rotation = accumulate_vector(stack_group, rotation, field_node.outputs['Rotation'], 'ADD')
+        scale = accumulate_vector(stack_group, scale, field_node.outputs['Scale'], 'MULTIPLY')
+    
+    # Один проход трансформации для всех эффекторов
+    translate_instances = nodes.new('GeometryNodeTranslateInstances')
+    translate_instances.location = (200, 0)
+    links.new(group_input.outputs['Geometry'], translate_instances.inputs['Instances'])
+    links.new(translation, translate_instances.inputs['Translation'])
+    
+    rotate_instances = nodes.new('GeometryNodeRotateInstances')
+    rotate_instances.location = (400, 0)
+    links.new(translate_instances.outputs['Instances'], rotate_instances.inputs['Instances'])
+    links.new(rotation, rotate_instances.inputs['Rotation'])
+    
+    scale_instances = nodes.new('GeometryNodeScaleInstances')
+    scale_instances.location = (600, 0)
+    links.new(rotate_instances.outputs['Instances'], scale_instances.inputs['Instances'])
+    links.new(scale, scale_instances.inputs['Scale'])
+    
+    group_output.location = (800, 0)
+    links.new(scale_instances.outputs['Instances'], group_output.inputs['Geometry'])
+
+
+def accumulate_vector(node_group, total, value, operation):
+    """Combine a vector field socket into a running total with a Vector Math node"""
+    if total is None:
+        return value
+    vector_math = node_group.nodes.new('ShaderNodeVectorMath')
+    vector_math.operation = operation
+    vector_math.location = (0, value.node.location.y)
+    node_group.links.new(total, vector_math.inputs[0])
+    node_group.links.new(value, vector_math.inputs[1])
+    return vector_math.outputs['Vector']
+
+
+def get_linked_field_mods(obj, effector_mod):
+    """Field modifiers linked to an effector, in link order"""
+    if not effector_mod.node_group:
+        return []
+    field_mods = []
+    for field_name in effector_mod.node_group.get("linked_fields", []):
+        field_mod = obj.modifiers.get(field_name)
+        if field_mod is not None and field_mod.node_group:
+            field_mods.append(field_mod)
+    return field_mods
+
+
+def update_effector_field_node(obj, node_group, effector_node, effector_mod, geometry_socket=None):
+    """
+    Вставляет стек полей, связанных с эффектором, как узел графа клонера.
+    
+    Все поля стека скомпилированы в одну нод-группу (compile_field_stack),
+    её выход подключается ко входу Field узла эффектора, поэтому falloff
+    вычисляется для каждого инстанса за один проход, без драйверов.
+    Стек со слоями получает на вход ту же геометрию, что и эффектор
+    (geometry_socket или источник входа Geometry эффектора).
+    
+    Returns:
+        Имя узла стека полей или None, если поля не подключены
+    """
+    if 'Field' not in effector_node.inputs:
+        return None
+    field_input = effector_node.inputs['Field']
+    
+    field_mods = get_linked_field_mods(obj, effector_mod)
+    stack_group = compile_field_stack(effector_mod, field_mods, field_bins.field_slabs(obj)) if field_mods else None
+    if stack_group is None:
+        if field_input.is_linked:
+            node_group.links.remove(field_input.links[0])
+        return None
+    
+    field_node_name = f"{FIELD_NODE_PREFIX}{effector_mod.name}"
+    field_node = node_group.nodes.get(field_node_name)
+    if field_node is None:
+        field_node = node_group.nodes.new('GeometryNodeGroup')
+        field_node.name = field_node_name
+    if field_node.node_tree != stack_group:
+        field_node.node_tree = stack_group
+    location = (effector_node.location.x, effector_node.location.y - 250)
+    if tuple(field_node.location) != location:
+        field_node.location = location
+    
+    for field_mod in field_mods:
+        if f"{field_mod.name}: Outer Strength" in field_node.inputs:
+            sync_effector_node_inputs(field_node, field_mod, input_prefix=f"{field_mod.name}: ")
+    
+    if 'Geometry' in field_node.inputs:
+        if geometry_socket is None and effector_node.inputs['Geometry'].is_linked:
+            geometry_socket = effector_node.inputs['Geometry'].links[0].from_socket
+        if geometry_socket is not None:
+            ensure_link(node_group, geometry_socket, field_node.inputs['Geometry'])
+    
+    ensure_link(node_group, field_node.outputs['Field'], field_input)
+    return field_node_name
+
+
+def compile_field_stack(effector_mod, field_mods, slabs=None):
+    """
+    Компилирует поля эффектора в одну falloff-группу.
+    
+    Граф пересобирается только при изменении состава полей, их форм,
+    режимов смешивания или раскладки слоёв; значения параметров передаются
+    через входы группы с префиксом "<имя поля>: ".
+    
+    slabs - раскладка слоёв ограниченных полей объекта (field_bins.field_slabs).
+    Локальное поле - ограниченное поле, нейтральное для своего смешивания вне
+    своей области. Если таких полей не меньше FIELD_SLAB_MIN_FIELDS, каждый
+    инстанс вычисляет только локальные поля своего слоя и все остальные:
+    стоимость растёт с перекрытием полей, а не с их общим числом.
+    """
+    entries = []
+    local = set()
+    bounded = set().union(*slabs[3]) if slabs else set()
+    for field_mod in field_mods:
+        shape = get_field_shape(field_mod.node_group)
+        if shape is None:
+            print(f"Неизвестный тип поля {field_mod.name}")
+            continue
+        # Первое поле начинает стек: 0 + значение
+        blend_mode = getattr(field_mod.node_group, "field_blend_mode", 'MAX') if entries else 'ADD'
+        if field_mod.name in bounded and is_neutral_field(field_mod, blend_mode, [entry[2] for entry in entries]):
+            local.add(field_mod.name)
+        entries.append((field_mod.name, shape, blend_mode))
+    if not entries:
+        return None
+    
+    stack_name = f"{effector_mod.node_group.name}{FIELD_STACK_SUFFIX}"
+    stack_group = bpy.data.node_groups.get(stack_name)
+    if stack_group is None:
+        stack_group = bpy.data.node_groups.new(type='GeometryNodeTree', name=stack_name)
+    
+    layout = get_slab_branches(entries, local, slabs) if len(local) >= FIELD_SLAB_MIN_FIELDS else None
+    signature = [":".join(entry) for entry in entries]
+    if layout is not None:
+        axis, origin, width, count, outside, branches = layout
+        signature.append(f"SLABS:{axis}:{origin!r}:{width!r}:{count}")
+        signature.extend(f"{first}-{end}:" + "|".join(entry[0] for entry in branch) for first, end, branch in branches)
+    if list(stack_group.get("fields", [])) != signature:
+        build_field_stack(stack_group, entries, layout)
+        stack_group["fields"] = signature
+    return stack_group
+
+
+def get_slab_branches(entries, local, slabs):
+    """
+    Группирует слои с одинаковым набором полей в ветки стека.
+    
+    Returns:
+        (ось, начало, толщина, число слоёв, поля вне слоёв,
+        [(первый слой, конец, поля ветки)]); поле ветки - любое нелокальное
+        поле или локальное поле этих слоёв
+    """
+    axis, origin, width, slab_fields = slabs
+    outside = [entry for entry in entries if entry[0] not in local]
+    branches = []
+    for index, names in enumerate(slab_fields):
+        branch = [entry for entry in entries if entry[0] not in local or entry[0] in names]
+        if branches and branches[-1][2] == branch:
+            branches[-1] = (branches[-1][0], index + 1, branch)
+        else:
+            branches.append((index, index + 1, branch))
+    return axis, origin, width, len(slab_fields), outside, branches
+
+
+def is_neutral_field(field_mod, blend_mode, previous_blends):
+    """
+    Check that a field outside its support leaves the stack unchanged.
+    
+    Outside the gizmo every falloff is 0, so the field yields its Outer Strength;
+    MAX/MIN are only neutral while the running total stays within 0..1.
+    """
+    outer = get_modifier_input(field_mod, "Outer Strength", 0.0)
+    if blend_mode in ('ADD', 'SUBTRACT'):
+        return outer == 0.0
+    if blend_mode == 'MULTIPLY':
+        return outer == 1.0
+    if blend_mode == 'MAX':
+        return outer == 0.0 and 'SUBTRACT' not in previous_blends
+    if blend_mode == 'MIN':
+        return outer == 1.0 and 'ADD' not in previous_blends[1:]
+    return False
+
+
+def build_field_stack(stack_group, entries, layout=None):
+    """
+    Строит граф стека полей: falloff полей смешивается по порядку и ограничивается 0..1.
+    
+    С раскладкой слоёв (get_slab_branches) инстансы разделяются по слою
+    вдоль оси раскладки, каждая ветка вычисляет только свои поля, затем
+    ветки собираются обратно, сортируются по исходному индексу, и значение
+    берётся Sample Index по индексу инстанса - порядок инстансов сохраняется.
+    """
+    stack_group.interface.clear()
+    socket_schema.invalidate(stack_group)
+    stack_group.nodes.clear()
+    stack_group.interface.new_socket(name="Field", in_out='OUTPUT', socket_type='NodeSocketFloat')
+    if layout is not None:
+        stack_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    
+    field_sockets = {}
+    for field_name, shape, blend_mode in entries:
+        field_sockets[field_name] = add_field_shape_inputs(stack_group, shape, name_prefix=f"{field_name}: ")
+    
+    nodes = stack_group.nodes
+    links = stack_group.links
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    group_input.location = (-600, 0)
+    group_output.location = (600, 0)
+    params = {field_name: {name: group_input.outputs[socket.name] for name, socket in sockets.items()}
+              for field_name, sockets in field_sockets.items()}
+    
+    if layout is None:
+        links.new(build_field_blend(stack_group, entries, params), group_output.inputs['Field'])
+    else:
+        links.new(build_slab_field_blend(stack_group, params, group_input.outputs['Geometry'], layout),
+                  group_output.inputs['Field'])
+    
+    for field_name, shape, blend_mode in entries:
+        set_menu_defaults(stack_group, shape, field_sockets[field_name])
+
+
+def build_field_blend(stack_group, entries, params):
+    """Blend the falloffs of the entries in order, clamped to 0..1; returns the value socket"""
+    nodes = stack_group.nodes
+    
+    # Стек начинается с 0, первое поле добавляется к нему
+    start = nodes.new('ShaderNodeValue')
+    start.outputs[0].default_value = 0.0
+    total = start.outputs[0]
+    for field_name, shape, blend_mode in entries:
+        value = build_field_value(stack_group, shape, params[field_name])
+        blend = nodes.new('ShaderNodeMath')
+        blend.operation = FIELD_BLEND_OPERATIONS[blend_mode]
+        stack_group.links.new(total, blend.inputs[0])
+        stack_group.links.new(value, blend.inputs[1])
+        total = blend.outputs[0]
+    
+    clamp = nodes.new('ShaderNodeClamp')
+    stack_group.links.new(total, clamp.inputs['Value'])
+    return clamp.outputs['Result']
+
+
+def build_slab_field_blend(stack_group, params, geometry, layout):
+    """Evaluate each slab branch on its own instances and gather the falloff back by instance index"""
+    axis, origin, width, count, outside, branches = layout
+    nodes = stack_group.nodes
+    links = stack_group.links
+    
+    def compare_node(operation, a, b):
+        node = nodes.new('FunctionNodeCompare')
+        node.data_type = 'FLOAT'
+        node.operation = operation
+        links.new(a, node.inputs[0])
+        node.inputs[1].default_value = float(b)
+        return node.outputs['Result']
+    
+    def boolean_node(operation, a, b):
+        node = nodes.new('FunctionNodeBooleanMath')
+        node.operation = operation
+        links.new(a, node.inputs[0])
+        links.new(b, node.inputs[1])
+        return node.outputs['Boolean']
+    
+    # Исходный индекс инстанса: после разделения и сборки порядок меняется
+    index = nodes.new('GeometryNodeInputIndex')
+    store_index = nodes.new('GeometryNodeStoreNamedAttribute')
+    store_index.data_type = 'INT'
+    store_index.domain = 'INSTANCE'
+    store_index.inputs['Name'].default_value = FIELD_STACK_INDEX_ATTRIBUTE
+    links.new(geometry, store_index.inputs['Geometry'])
+    links.new(index.outputs['Index'], store_index.inputs['Value'])
+    
+    # Номер слоя: floor((координата - начало) / толщина)
+    position = nodes.new('GeometryNodeInputPosition')
+    position_xyz = nodes.new('ShaderNodeSeparateXYZ')
+    links.new(position.outputs['Position'], position_xyz.inputs[0])
+    offset = nodes.new('ShaderNodeMath')
+    offset.operation = 'SUBTRACT'
+    links.new(position_xyz.outputs['XYZ'[axis]], offset.inputs[0])
+    offset.inputs[1].default_value = origin
+    scaled = nodes.new('ShaderNodeMath')
+    scaled.operation = 'DIVIDE'
+    links.new(offset.outputs['Value'], scaled.inputs[0])
+    scaled.inputs[1].default_value = width
+    slab = nodes.new('ShaderNodeMath')
+    slab.operation = 'FLOOR'
+    links.new(scaled.outputs['Value'], slab.inputs[0])
+    slab_index = slab.outputs['Value']
+    
+    # Вне слоёв ограниченные поля не действуют: остаются только нелокальные поля
+    selections = [(boolean_node('OR', compare_node('LESS_THAN', slab_index, 0), compare_node('GREATER_EQUAL', slab_index, count)),
+                   outside)]
+    for first, end, branch in branches:
+        selections.append((boolean_node('AND', compare_node('GREATER_EQUAL', slab_index, first),
+                                        compare_node('LESS_THAN', slab_index, end)), branch))
+    
+    join = nodes.new('GeometryNodeJoinGeometry')
+    for selection, branch in selections:
+        separate = nodes.new('GeometryNodeSeparateGeometry')
+        separate.domain = 'INSTANCE'
+        links.new(store_index.outputs['Geometry'], separate.inputs['Geometry'])
+        links.new(selection, separate.inputs['Selection'])
+        store_falloff = nodes.new('GeometryNodeStoreNamedAttribute')
+        store_falloff.data_type = 'FLOAT'
+        store_falloff.domain = 'INSTANCE'
+        store_falloff.inputs['Name'].default_value = FIELD_STACK_FALLOFF_ATTRIBUTE
+        links.new(separate.outputs['Selection'], store_falloff.inputs['Geometry'])
+        links.new(build_field_blend(stack_group, branch, params), store_falloff.inputs['Value'])
+        links.new(store_falloff.outputs['Geometry'], join.inputs['Geometry'])
+    
+    stored_index = nodes.new('GeometryNodeInputNamedAttribute')
+    stored_index.data_type = 'INT'
+    stored_index.inputs['Name'].default_value = FIELD_STACK_INDEX_ATTRIBUTE
+    sort = nodes.new('GeometryNodeSortElements')
+    sort.domain = 'INSTANCE'
+    links.new(join.outputs['Geometry'], sort.inputs['Geometry'])
+    links.new(stored_index.outputs['Attribute'], sort.inputs['Sort Key'])
+    
+    falloff = nodes.new('GeometryNodeInputNamedAttribute')
+    falloff.data_type = 'FLOAT'
+    falloff.inputs['Name'].default_value = FIELD_STACK_FALLOFF_ATTRIBUTE
+    sample = nodes.new('GeometryNodeSampleIndex')
+    sample.data_type = 'FLOAT'
+    sample.domain = 'INSTANCE'
+    links.new(sort.outputs['Geometry'], sample.inputs['Geometry'])
+    links.new(falloff.outputs['Attribute'], sample.inputs['Value'])
+    links.new(index.outputs['Index'], sample.inputs['Index'])
+    return sample.outputs['Value']
+
+
+def remove_unused_field_nodes(node_group, used_field_nodes):
+    """Remove field nodes whose effector no longer has linked fields, and their orphaned stacks"""
+    for node in list(node_group.nodes):
+        if node.name.startswith(FIELD_NODE_PREFIX) and node.name not in used_field_nodes:
+            stack_group = node.node_tree
+            node_group.nodes.remove(node)
+            if stack_group is not None and stack_group.users == 0:
+                bpy.data.node_groups.remove(stack_group)
+
+
+def has_geometry_sockets(effector_group, effector_name=""):
+    """Check that an effector node group has Geometry input and output sockets"""
+    try:
+        schema = get_socket_schema(effector_group)
+        has_input = 'Geometry' in schema.inputs
+        has_output = 'Geometry' in schema.outputs
+    except Exception as e:
+        print(f"Ошибка при проверке сокетов эффектора {effector_name}: {e}")
+        return False
+    
+    if not has_output:
+        print(f"Эффектор {effector_name} не имеет выхода Geometry")
+    elif not has_input:
+        print(f"Эффектор {effector_name} не имеет входа Geometry")
+    return has_input and has_output
+
+
+def find_chain_source(node_group, group_output):
+    """
+    Возвращает выходной сокет клонера, с которого начинается цепочка эффекторов.
+    
+    Идёт от выхода группы назад через узлы эффекторов. Если выход не
+    подключён, ищет узел клонера так же, как restore_direct_connection.
+    """
+    socket = group_output.inputs.get('Geometry')
+    visited = set()
+    while socket is not None and socket.is_linked:
+        link = socket.links[0]
+        node = link.from_node
+        if not node.name.startswith(EFFECTOR_NODE_PREFIX):
+            return link.from_socket
+        if node.name in visited:
+            break
+        visited.add(node.name)
+        socket = node.inputs.get('Geometry')
+    
+    source_node = find_cloner_output_node(node_group)
+    if source_node is None:
+        return None
+    return source_node.outputs['Geometry']
+
+
+def find_cloner_output_node(node_group):
+    """Find the last node of the cloner graph (before any effectors)"""
+    fallback = None
+    for node in node_group.nodes:
+        if node.type in {'GROUP_OUTPUT', 'GROUP_INPUT'} or node.name.startswith((EFFECTOR_NODE_PREFIX, FIELD_NODE_PREFIX)):
+            continue
+        if 'Geometry' not in node.outputs:
+            continue
+        # Ищем узел Transform или TransformGeometry
+        if 'Transform' in node.bl_idname:
+            return node
+        if fallback is None:
+            fallback = node
+    return fallback
+
+
+def ensure_link(node_group, from_socket, to_socket):
+    """Create a link only if it does not exist yet; returns True if the graph changed"""
+    if to_socket.is_linked and to_socket.links[0].from_socket == from_socket:
+        return False
+    # Новая связь заменяет существующую на входе с одним подключением
+    node_group.links.new(from_socket, to_socket)
+    return True
+
+
+def values_equal(a, b):
+    """Compare socket/ID property values, including vectors and colors"""
+    try:
+        if hasattr(a, "__len__") and hasattr(b, "__len__") and not isinstance(a, str):
+            return len(a) == len(b) and all(x == y for x, y in zip(a, b))
+        return a == b
+    except TypeError:
+        return False
+
+
+def sync_effector_node_inputs(effector_node, effector_mod, input_prefix="", names=None):
+    """
+    Копирует значения параметров модификатора эффектора в его узел внутри клонера.
+    Записываются только изменившиеся сокеты. input_prefix добавляется к именам
+    входов узла (входы полей в стеке называются "<имя поля>: <параметр>"),
+    names ограничивает синхронизацию перечисленными параметрами.
+    
+    Returns:
+        Количество обновлённых сокетов
+    """
+    changed = 0
+    schema_inputs = get_socket_schema(effector_mod.node_group).inputs
+    if names is not None:
+        input_sockets = [schema_inputs[name] for name in names if name in schema_inputs]
+    else:
+        input_sockets = schema_inputs.values()
+    for input_socket in input_sockets:
+        if input_socket.name == 'Geometry':
+            continue  # Пропускаем вход геометрии
+        
+        # Если параметр не имеет установленного значения в модификаторе, пропускаем
+        if input_socket.identifier not in effector_mod:
+            continue
+        
+        try:
+            node_input = effector_node.inputs[f"{input_prefix}{input_socket.name}"]
+            value = effector_mod[input_socket.identifier]
+            if node_input.type == 'MENU' and isinstance(value, int):
+                continue  # Модификатор хранит меню как индекс, узел принимает только имя пункта
+            if not values_equal(node_input.default_value, value):
+                node_input.default_value = value
+                changed += 1
+        except (KeyError, TypeError, AttributeError) as e:
+            print(f"Не удалось установить значение для {input_socket.name}: {e}")
+    return changed
+
+
 def restore_direct_connection(node_group):
     """
     Восстанавливает прямую связь между основной геометрией клонера и выходным узлом.
@@ -247,18 +777,8 @@ def restore_direct_connection(node_group):
     if not group_output:
         return
     
-    # Найдем последний узел трансформации клонера
-    for node in node_group.nodes:
-        # Ищем узел Transform или TransformGeometry
-        if 'Transform' in node.bl_idname and node.type != 'GROUP_OUTPUT':
-            # Проверяем, что у него есть выход Geometry
-            if 'Geometry' in [s.name for s in node.outputs]:
-                # Создаем прямую связь с выходом
-                node_group.links.new(node.outputs['Geometry'], group_output.inputs['Geometry'])
-                return
-    
-    # Если не нашли узел трансформации, ищем любой узел с выходом Geometry
-    for node in node_group.nodes:
-        if node.type != 'GROUP_OUTPUT' and 'Geometry' in [s.name for s in node.outputs]:
-            node_group.links.new(node.outputs['Geometry'], group_output.inputs['Geometry'])
-            return 
\ No newline at end of file
+    # Последний узел трансформации клонера или любой узел с выходом Geometry.
+    # Вход группы пропускаем: в обёртке shared-режима это не геометрия клонера
+    source_node = find_cloner_output_node(node_group)
+    if source_node is not None:
+        node_group.links.new(source_node.outputs['Geometry'], group_output.inputs['Geometry'])
\ No newline at end of file
@@ -1,11 +1,15 @@
 import bpy
+from bpy.app.handlers import persistent
+from ..src.cloners import CLONER_NODE_GROUP_PREFIXES
+from ..src.effectors import EFFECTOR_NODE_GROUP_PREFIXES
 
 class DependencyManager:
     """Manages relationships between cloners, effectors and fields"""
     
     def __init__(self):
+        # Стеки полей не кэшируются: они хранятся в linked_fields нод-группы эффектора,
+        # а имена эффекторов повторяются на разных объектах
         self.cloner_effector_map = {}  # Maps cloner modifiers to effectors
-        self.effector_field_map = {}   # Maps effectors to fields
     
     def link_effector_to_cloner(self, cloner_mod, effector_mod):
         """Link an effector to a cloner"""
@@ -26,21 +30,21 @@ class DependencyManager:
         return False
     
     def link_field_to_effector(self, effector_mod, field_mod):
-        """Link a field to an effector"""
-        if effector_mod.name not in self.effector_field_map:
-            self.effector_field_map[effector_mod.name] = []
-        
-        if field_mod.name not in self.effector_field_map[effector_mod.name]:
-            self.effector_field_map[effector_mod.name].append(field_mod.name)
+        """Link a field to the end of an effector's field stack"""
+        linked_fields = list(effector_mod.node_group.get("linked_fields", []))
+        if field_mod.name not in linked_fields:
+            linked_fields.append(field_mod.name)
+            effector_mod.node_group["linked_fields"] = linked_fields
             return True
         return False
     
-    def unlink_field_from_effector(self, effector_mod, field_mod):
-        """Unlink a field from an effector"""
-        if effector_mod.name in self.effector_field_map:
-            if field_mod.name in self.effector_field_map[effector_mod.name]:
-                self.effector_field_map[effector_mod.name].remove(field_mod.name)
-                return True
+    def unlink_field_from_effector(self, effector_mod, field_mod_name):
+        """Unlink a field from an effector's field stack"""
+        linked_fields = list(effector_mod.node_group.get("linked_fields", []))
+        if field_mod_name in linked_fields:
+            linked_fields.remove(field_mod_name)
+            effector_mod.node_group["linked_fields"] = linked_fields
+            return True
         return False
     
     def get_effectors_for_cloner(self, cloner_mod):
@@ -50,12 +54,209 @@ class DependencyManager:
                    if name in bpy.context.object.modifiers]
         return []
     
-    def get_fields_for_effector(self, effector_mod):
-        """Get all fields linked to an effector"""
-        if effector_mod.name in self.effector_field_map:
-            return [bpy.context.object.modifiers.get(name) for name in self.effector_field_map[effector_mod.name] 
-                   if name in bpy.context.object.modifiers]
-        return []
+    def get_fields_for_effector(self, obj, effector_mod):
+        """Get all fields linked to an effector, in stack order"""
+        if not effector_mod.node_group:
+            return []
+        return [obj.modifiers[name] for name in effector_mod.node_group.get("linked_fields", [])
+                if name in obj.modifiers]
 
 # Create a global instance
-dependency_manager = DependencyManager()
\ No newline at end of file
+dependency_manager = DependencyManager()
+
+class ClonerIndexEntry:
+    """Cloner/effector relationships of one object"""
+    
+    def __init__(self, signature):
+        self.signature = signature
+        self.indices = {}             # Имя модификатора -> позиция в стеке
+        self.cloners = []             # Имена модификаторов-клонеров по порядку стека
+        self.effectors = []           # Имена модификаторов-эффекторов по порядку стека
+        self.cloner_effectors = {}    # Клонер -> список связанных эффекторов
+        self.effector_cloners = {}    # Эффектор -> список связанных клонеров
+        self.unlinked_counts = {}     # Клонер -> количество несвязанных эффекторов
+
+class ClonerIndex:
+    """
+    Bidirectional cloner <-> effector index, cached per object.
+    
+    Панели обращаются к индексу вместо обхода всех модификаторов с проверкой
+    префиксов при каждой перерисовке. Операторы обновляют индекс инкрементально
+    (link/unlink) или сбрасывают его (invalidate) при добавлении/удалении модификаторов.
+    Сигнатура записи - длина стека и имя последнего модификатора: проверка
+    за O(1) ловит добавление и удаление модификаторов вне аддона. Переименования
+    сбрасывают индекс через msgbus, перестановки в панели модификаторов
+    обнаруживаются по обновлению геометрии объекта (validate_order).
+    """
+    
+    def __init__(self):
+        # ID-свойства нельзя записывать во время draw, поэтому кэш хранится в Python
+        # и привязан к session_uid объекта
+        self._entries = {}
+    
+    @staticmethod
+    def _signature(obj):
+        modifiers = obj.modifiers
+        return len(modifiers), modifiers[-1].name if len(modifiers) else None
+    
+    def get(self, obj):
+        """Return the up-to-date index entry for an object"""
+        entry = self._entries.get(obj.session_uid)
+        if entry is None or entry.signature != self._signature(obj):
+            entry = self.rebuild(obj)
+        return entry
+    
+    def rebuild(self, obj):
+        """Rebuild the index entry of an object from its modifier stack"""
+        entry = ClonerIndexEntry(self._signature(obj))
+        for i, mod in enumerate(obj.modifiers):
+            entry.indices[mod.name] = i
+            if mod.type != 'NODES' or not mod.node_group:
+                continue
+            group_name = mod.node_group.name
+            linked = mod.node_group.get("linked_effectors")
+            if linked is not None or group_name.startswith(tuple(CLONER_NODE_GROUP_PREFIXES)):
+                entry.cloners.append(mod.name)
+                entry.cloner_effectors[mod.name] = list(linked) if linked else []
+            elif group_name.startswith(tuple(EFFECTOR_NODE_GROUP_PREFIXES)):
+                entry.effectors.append(mod.name)
+        
+        for effector_name in entry.effectors:
+            entry.effector_cloners[effector_name] = []
+        for cloner_name, linked in entry.cloner_effectors.items():
+            for effector_name in linked:
+                if effector_name in entry.effector_cloners:
+                    entry.effector_cloners[effector_name].append(cloner_name)
+        self._update_unlinked_counts(entry)
+        
+        self._entries[obj.session_uid] = entry
+        return entry
+    
+    @staticmethod
+    def _update_unlinked_counts(entry, cloner_names=None):
+        for cloner_name in (cloner_names or entry.cloner_effectors):
+            linked = entry.cloner_effectors[cloner_name]
+            linked_count = sum(1 for name in set(linked) if name in entry.effector_cloners)
+            entry.unlinked_counts[cloner_name] = len(entry.effectors) - linked_count
+    
+    def validate_order(self, obj):
+        """Drop the cached entry if the modifier stack was reordered outside the addon"""
+        entry = self._entries.get(obj.session_uid)
+        if entry is None:
+            return
+        if len(obj.modifiers) != len(entry.indices) or any(
+                mod.name != name for mod, name in zip(obj.modifiers, entry.indices)):
+            self.invalidate(obj)
+    
+    def invalidate(self, obj=None):
+        """Drop the cached entry of an object (or of all objects)"""
+        if obj is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(obj.session_uid, None)
+    
+    def link(self, obj, cloner_name, effector_name):
+        """Record a new cloner -> effector link"""
+        entry = self._entries.get(obj.session_uid)
+        if entry is None or cloner_name not in entry.cloner_effectors:
+            self.invalidate(obj)
+            return
+        linked = entry.cloner_effectors[cloner_name]
+        if effector_name not in linked:
+            linked.append(effector_name)
+            cloners = entry.effector_cloners.get(effector_name)
+            if cloners is not None and cloner_name not in cloners:
+                cloners.append(cloner_name)
+            self._update_unlinked_counts(entry, [cloner_name])
+    
+    def unlink(self, obj, cloner_name, effector_name):
+        """Remove a cloner -> effector link"""
+        entry = self._entries.get(obj.session_uid)
+        if entry is None or cloner_name not in entry.cloner_effectors:
+            self.invalidate(obj)
+            return
+        linked = entry.cloner_effectors[cloner_name]
+        if effector_name in linked:
+            linked.remove(effector_name)
+            cloners = entry.effector_cloners.get(effector_name)
+            if cloners is not None and cloner_name in cloners:
+                cloners.remove(cloner_name)
+            self._update_unlinked_counts(entry, [cloner_name])
+    
+    def cloners(self, obj):
+        """Cloner modifier names of an object, in stack order"""
+        return self.get(obj).cloners
+    
+    def effectors(self, obj):
+        """Effector modifier names of an object, in stack order"""
+        return self.get(obj).effectors
+    
+    def linked_cloners(self, obj, effector_name):
+        """Cloners an effector is linked to"""
+        return self.get(obj).effector_cloners.get(effector_name, [])
+    
+    def unlinked_effectors(self, obj, cloner_name):
+        """Effectors not yet linked to a cloner"""
+        entry = self.get(obj)
+        linked = entry.cloner_effectors.get(cloner_name, [])
+        return [name for name in entry.effectors if name not in linked]
+    
+    def has_unlinked_effectors(self, obj, cloner_name):
+        """Check in O(1) whether a cloner has effectors left to link"""
+        entry = self.get(obj)
+        return entry.unlinked_counts.get(cloner_name, len(entry.effectors)) > 0
+
+# Global cloner/effector index
+cloner_index = ClonerIndex()
+
+# Владелец подписки msgbus на переименование модификаторов
+_MSGBUS_OWNER = object()
+
+@persistent
+def _clear_cloner_index(*args):
+    # Undo/redo и загрузка файла заменяют данные, кэш становится недействительным
+    cloner_index.invalidate()
+    # Загрузка файла снимает подписки msgbus
+    _subscribe_modifier_renames()
+
+def _invalidate_cloner_index():
+    cloner_index.invalidate()
+
+def _subscribe_modifier_renames():
+    bpy.msgbus.clear_by_owner(_MSGBUS_OWNER)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Modifier, "name"),
+        owner=_MSGBUS_OWNER,
+        args=(),
+        notify=_invalidate_cloner_index,
+    )
+
+@persistent
+def _validate_modifier_order(scene, depsgraph):
+    # Перемещение модификатора в стандартной панели помечает геометрию объекта
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and isinstance(update.id, bpy.types.Object):
+            cloner_index.validate_order(update.id.original)
+
+_INDEX_HANDLERS = (
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+    bpy.app.handlers.load_post,
+)
+
+def register():
+    _subscribe_modifier_renames()
+    if _validate_modifier_order not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_validate_modifier_order)
+    for handlers in _INDEX_HANDLERS:
+        if _clear_cloner_index not in handlers:
+            handlers.append(_clear_cloner_index)
+
+def unregister():
+    bpy.msgbus.clear_by_owner(_MSGBUS_OWNER)
+    if _validate_modifier_order in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_validate_modifier_order)
+    for handlers in _INDEX_HANDLERS:
+        if _clear_cloner_index in handlers:
+            handlers.remove(_clear_cloner_index)
+    cloner_index.invalidate()
\ No newline at end of file
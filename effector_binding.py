@@ -0,0 +1,177 @@
+import bpy
+from bpy.app.handlers import persistent
+from .dependency_manager import cloner_index
+from .cloner_utils import (sync_effector_node_inputs, update_effector_field_node, values_equal,
+                           EFFECTOR_NODE_PREFIX, FIELD_NODE_PREFIX, FUSED_NODE_NAME)
+from .socket_schema import get_socket_schema
+
+# Последние прочитанные значения эффекторов:
+# (session_uid объекта, имя эффектора) -> (входы эффектора, linked_fields, входы полей)
+_last_seen = {}
+
+def find_bound_effector_node(cloner_group, effector_name):
+    """
+    Находит узел эффектора внутри графа клонера.
+    
+    Returns:
+        (нод-группа, содержащая узел, узел) или (None, None), если эффектор не встроен
+    """
+    node_name = f"{EFFECTOR_NODE_PREFIX}{effector_name}"
+    node = cloner_group.nodes.get(node_name)
+    if node is not None:
+        return cloner_group, node
+    # В fused-режиме узел эффектора лежит внутри стека
+    fused_node = cloner_group.nodes.get(FUSED_NODE_NAME)
+    if fused_node is not None and fused_node.node_tree:
+        node = fused_node.node_tree.nodes.get(node_name)
+        if node is not None:
+            return fused_node.node_tree, node
+    return None, None
+
+def sync_effector_bindings(obj, effector_name):
+    """
+    Переносит значения модификатора эффектора и его полей во все клонеры, где он встроен.
+    
+    Записываются только изменившиеся сокеты, цепочка эффекторов не пересобирается.
+    
+    Returns:
+        Количество обновлённых сокетов
+    """
+    effector_mod = obj.modifiers.get(effector_name)
+    if effector_mod is None or not effector_mod.node_group:
+        return 0
+    changed = 0
+    for cloner_name in cloner_index.linked_cloners(obj, effector_name):
+        cloner_mod = obj.modifiers.get(cloner_name)
+        if cloner_mod is None or not cloner_mod.node_group:
+            continue
+        container, effector_node = find_bound_effector_node(cloner_mod.node_group, effector_name)
+        if effector_node is None:
+            continue
+        changed += sync_effector_node_inputs(effector_node, effector_mod)
+        # Стек полей пересобирается только при изменении состава полей
+        update_effector_field_node(obj, container, effector_node, effector_mod)
+    return changed
+
+def read_modifier_values(mod):
+    """Input values of a geometry nodes modifier by socket name, vectors as tuples"""
+    values = {}
+    for input_socket in get_socket_schema(mod.node_group).inputs.values():
+        if input_socket.name == 'Geometry' or input_socket.identifier not in mod:
+            continue
+        value = mod[input_socket.identifier]
+        if hasattr(value, "__len__") and not isinstance(value, str):
+            value = tuple(value)
+        values[input_socket.name] = value
+    return values
+
+def read_effector_state(obj, effector_mod):
+    """Snapshot of an effector's inputs, its field stack and the inputs of its fields"""
+    linked_fields = tuple(effector_mod.node_group.get("linked_fields", []))
+    field_values = {}
+    for field_name in linked_fields:
+        field_mod = obj.modifiers.get(field_name)
+        if field_mod is not None and field_mod.node_group:
+            field_values[field_name] = read_modifier_values(field_mod)
+    return read_modifier_values(effector_mod), linked_fields, field_values
+
+def changed_inputs(old_values, new_values):
+    """Names of inputs whose value differs between two snapshots"""
+    return [name for name, value in new_values.items()
+            if name not in old_values or not values_equal(old_values[name], value)]
+
+def push_effector_changes(obj, effector_name):
+    """
+    Переносит во встроенные узлы эффектора только параметры, изменившиеся с прошлого вызова.
+    
+    Значения сравниваются с последним снимком модификатора, поэтому правка
+    одного параметра записывает один сокет в каждом клонере. Первый вызов
+    для эффектора выполняет полную синхронизацию. Стек полей пересобирается
+    при изменении состава linked_fields, параметра поля, которого нет на узле
+    стека, или Outer Strength, от которой зависит, локально ли поле в слоях
+    (граф перестраивается, только если изменилась его сигнатура); остальные
+    изменённые параметры полей записываются прямо во входы узла стека.
+    
+    Returns:
+        Количество обновлённых сокетов
+    """
+    effector_mod = obj.modifiers.get(effector_name)
+    if effector_mod is None or not effector_mod.node_group:
+        return 0
+    key = (obj.session_uid, effector_name)
+    state = read_effector_state(obj, effector_mod)
+    previous = _last_seen.get(key)
+    _last_seen[key] = state
+    if previous is None:
+        return sync_effector_bindings(obj, effector_name)
+    
+    values, linked_fields, field_values = state
+    old_values, old_linked_fields, old_field_values = previous
+    effector_changes = changed_inputs(old_values, values)
+    restack = linked_fields != old_linked_fields
+    field_changes = {}
+    if not restack:
+        for field_name, current in field_values.items():
+            names = changed_inputs(old_field_values.get(field_name, {}), current)
+            if names:
+                field_changes[field_name] = names
+    if not effector_changes and not restack and not field_changes:
+        return 0
+    
+    changed = 0
+    for cloner_name in cloner_index.linked_cloners(obj, effector_name):
+        cloner_mod = obj.modifiers.get(cloner_name)
+        if cloner_mod is None or not cloner_mod.node_group:
+            continue
+        container, effector_node = find_bound_effector_node(cloner_mod.node_group, effector_name)
+        if effector_node is None:
+            continue
+        if effector_changes:
+            changed += sync_effector_node_inputs(effector_node, effector_mod, names=effector_changes)
+        if restack:
+            update_effector_field_node(obj, container, effector_node, effector_mod)
+            continue
+        if not field_changes:
+            continue
+        field_node = container.nodes.get(f"{FIELD_NODE_PREFIX}{effector_name}")
+        # Outer Strength решает, нейтрально ли поле вне своей области,
+        # то есть в каких ветках слоёв стека оно вычисляется
+        if field_node is None or any(name == "Outer Strength" or f"{field_name}: {name}" not in field_node.inputs
+                                     for field_name, names in field_changes.items() for name in names):
+            update_effector_field_node(obj, container, effector_node, effector_mod)
+            continue
+        for field_name, names in field_changes.items():
+            changed += sync_effector_node_inputs(field_node, obj.modifiers[field_name],
+                                                 input_prefix=f"{field_name}: ", names=names)
+    return changed
+
+@persistent
+def _sync_bound_effectors(scene, depsgraph):
+    # Изменение входа модификатора помечает геометрию объекта; записи во
+    # встроенные узлы вызывают повторное обновление, но снимок уже совпадает
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry or not isinstance(update.id, bpy.types.Object):
+            continue
+        obj = update.id.original
+        if not cloner_index.cloners(obj):
+            continue
+        for effector_name in cloner_index.effectors(obj):
+            push_effector_changes(obj, effector_name)
+
+@persistent
+def _clear_last_seen(*args):
+    # session_uid уникален только в пределах сессии файла
+    _last_seen.clear()
+
+def register():
+    if _sync_bound_effectors not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_sync_bound_effectors)
+    if _clear_last_seen not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_clear_last_seen)
+
+def unregister():
+    if _sync_bound_effectors in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_sync_bound_effectors)
+    if _clear_last_seen in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_clear_last_seen)
+    _last_seen.clear()
@@ -3,146 +3,103 @@
 import bpy
 from bpy.types import Panel, Operator
 from bpy.props import StringProperty
-from ..effectors import EFFECTOR_TYPES, EFFECTOR_NODE_GROUP_PREFIXES
+from ..effectors import EFFECTOR_TYPES
 from ..fields import FIELD_NODE_GROUP_PREFIXES as FIELD_PREFIXES
+from ..effectors.GN_NoiseEffector import is_noise_bake_outdated
+from ..fields.GN_FieldShapes import FIELD_SHAPE_GROUPS
+from ...utils.dependency_manager import cloner_index, dependency_manager
+from ...utils.update_scheduler import mark_cloner_dirty
+from ...utils.socket_schema import get_socket_schema, get_input_identifier, set_modifier_inputs
+from ...utils.profiling import instrument_operator
+
+# Нод-группы всех типов полей, включая стек полей
+FIELD_GROUP_PREFIXES = tuple(FIELD_PREFIXES) + tuple(FIELD_SHAPE_GROUPS)
 
 # ——— Операторы для привязки/отвязки полей ———
 
+def set_effector_input(mod, socket_name, value):
+    """Set a modifier input by socket name; returns False if the socket does not exist"""
+    identifier = get_input_identifier(mod.node_group, socket_name)
+    if identifier is None:
+        return False
+    mod[identifier] = value
+    return True
+
+def update_effector_cloners(obj, effector_name):
+    """Schedule a rebuild of the field wiring of every cloner the effector is linked to"""
+    for cloner_name in cloner_index.linked_cloners(obj, effector_name):
+        cloner_mod = obj.modifiers.get(cloner_name)
+        if cloner_mod:
+            mark_cloner_dirty(obj, cloner_mod)
+
 class EFFECTOR_OT_add_field(Operator):
     bl_idname = "object.effector_add_field"
     bl_label  = "Add Field to Effector"
     effector_name: StringProperty()
+    field_name: StringProperty(description="Field to add; the first field not in the stack if empty")
 
     def execute(self, context):
         obj = context.active_object
         mod = obj.modifiers.get(self.effector_name)
         if not mod or not mod.node_group:
             return {'CANCELLED'}
-            
-        # Найдем первое поле на объекте
-        field_mod = None
-        for m in obj.modifiers:
-            if m.type == 'NODES' and m.node_group and "SphereField" in m.node_group.name:
-                field_mod = m
-                break
+        
+        # Поле вычисляется внутри графа клонера, эффектору нужен вход Field
+        if "Field" not in get_socket_schema(mod.node_group).inputs:
+            self.report({'ERROR'}, "Этот тип эффектора не поддерживает поля")
+            return {'CANCELLED'}
+        
+        linked_fields = list(mod.node_group.get("linked_fields", []))
+        if self.field_name:
+            field_mod = obj.modifiers.get(self.field_name)
+        else:
+            # Найдем первое поле на объекте, которого ещё нет в стеке
+            field_mod = None
+            for m in obj.modifiers:
+                if (m.type == 'NODES' and m.node_group and m.name not in linked_fields
+                        and m.node_group.name.startswith(FIELD_GROUP_PREFIXES)):
+                    field_mod = m
+                    break
                 
         if not field_mod:
             self.report({'ERROR'}, "Поле не найдено. Сначала создайте поле.")
             return {'CANCELLED'}
-            
-        # Подключим поле к эффектору
-        # Для RandomEffector у нас уже есть входной сокет 'Field'
-        if mod.node_group.name.startswith("RandomEffector"):
-            # 1. Сначала отключаем Use Field для безопасности
-            try:
-                mod["Use Field"] = False
-            except:
-                pass
-                
-            # 2. Устанавливаем значение Field = 1.0 до включения Use Field
-            try:
-                mod["Field"] = 1.0
-                print("Установлено Field = 1.0")
-            except Exception as e:
-                print(f"Ошибка при установке Field: {e}")
-                
-            # 3. Устанавливаем драйвер при отключенном Use Field
-            try:
-                # Находим сокет Value в поле
-                value_socket = None
-                for item in field_mod.node_group.interface.items_tree:
-                    if item.item_type == 'SOCKET' and item.in_out == 'OUTPUT' and item.name == "Value":
-                        value_socket = item.identifier
-                        break
-                        
-                if value_socket:
-                    # Создаем ссылку на выход поля
-                    field_path = f'modifiers["{field_mod.name}"]'
-                    socket_path = f'["{value_socket}"]'
-                    full_path = field_path + socket_path
-                    
-                    # Устанавливаем драйвер
-                    try:
-                        # Удаляем старый драйвер, если есть
-                        try:
-                            mod.driver_remove('Field')
-                        except:
-                            pass
-                            
-                        # Создаем новый драйвер
-                        driver = mod.driver_add('Field').driver
-                        driver.type = 'AVERAGE'
-                        var = driver.variables.new()
-                        var.name = "field_value"
-                        var.type = 'SINGLE_PROP'
-                        var.targets[0].id_type = 'OBJECT'
-                        var.targets[0].id = obj
-                        var.targets[0].data_path = full_path
-                        print(f"Драйвер установлен: {full_path}")
-                        
-                        # Проверка, что драйвер работает
-                        try:
-                            test_val = driver.evaluate()
-                            print(f"Драйвер возвращает: {test_val}")
-                        except:
-                            pass
-                    except Exception as e:
-                        print(f"Ошибка при установке драйвера: {e}")
-            except Exception as e:
-                print(f"Ошибка при настройке драйвера: {e}")
-                        
-            # 4. Наконец, включаем использование поля
-            try:
-                mod["Use Field"] = True
-                print("Use Field включено")
-                self.report({'INFO'}, f"Поле '{field_mod.name}' подключено к эффектору")
-                return {'FINISHED'}
-            except Exception as e:
-                print(f"Ошибка при включении Use Field: {e}")
-                mod["Field"] = 1.0  # безопасное значение на случай ошибки
-                return {'CANCELLED'}
-                
-        self.report({'ERROR'}, "Этот тип эффектора не поддерживает поля")
-        return {'CANCELLED'}
+        
+        # Драйвер старых версий больше не нужен
+        try:
+            mod.driver_remove('["Field"]')
+        except:
+            pass
+        
+        dependency_manager.link_field_to_effector(mod, field_mod)
+        set_effector_input(mod, "Use Field", True)
+        update_effector_cloners(obj, mod.name)
+        
+        self.report({'INFO'}, f"Поле '{field_mod.name}' подключено к эффектору")
+        return {'FINISHED'}
         
 class EFFECTOR_OT_remove_field(Operator):
     bl_idname = "object.effector_remove_field"
     bl_label  = "Remove Field from Effector"
     effector_name: StringProperty()
+    field_name: StringProperty(description="Field to remove; the whole stack if empty")
 
     def execute(self, context):
         obj = context.active_object
         mod = obj.modifiers.get(self.effector_name)
         if not mod or not mod.node_group:
             return {'CANCELLED'}
-            
-        # Для RandomEffector просто отключаем использование поля
-        # и удаляем драйвер
-        if mod.node_group.name.startswith("RandomEffector"):
-            # Сначала установим безопасное значение поля
-            try:
-                mod["Field"] = 1.0
-            except:
-                pass
-                
-            # Удаляем драйвер до отключения Use Field
-            try:
-                mod.driver_remove('Field')
-                print("Драйвер поля удален")
-            except Exception as e:
-                print(f"Ошибка при удалении драйвера: {e}")
-                
-            # Отключаем использование поля
-            try:
-                mod["Use Field"] = False
-                self.report({'INFO'}, "Поле отключено от эффектора")
-                return {'FINISHED'}
-            except Exception as e:
-                print(f"Ошибка при отключении поля: {e}")
-                return {'CANCELLED'}
-            
-        self.report({'ERROR'}, "Этот тип эффектора не поддерживает поля")
-        return {'CANCELLED'}
+        
+        field_names = [self.field_name] if self.field_name else list(mod.node_group.get("linked_fields", []))
+        for field_name in field_names:
+            dependency_manager.unlink_field_from_effector(mod, field_name)
+        
+        if not mod.node_group.get("linked_fields"):
+            set_effector_input(mod, "Use Field", False)
+        update_effector_cloners(obj, mod.name)
+        
+        self.report({'INFO'}, "Поле отключено от эффектора")
+        return {'FINISHED'}
 
 class EFFECTOR_OT_auto_link(Operator):
     bl_idname = "object.auto_link_effector"
@@ -157,11 +114,8 @@ class EFFECTOR_OT_auto_link(Operator):
             return {'CANCELLED'}
         
         # Найдем все клонеры на объекте
-        cloner_mods = [
-            m for m in obj.modifiers
-            if m.type == 'NODES' and m.node_group
-               and m.node_group.get("linked_effectors") is not None
-        ]
+        cloner_mods = [obj.modifiers.get(name) for name in cloner_index.cloners(obj)]
+        cloner_mods = [mod for mod in cloner_mods if mod is not None]
         
         if not cloner_mods:
             self.report({'ERROR'}, "На объекте нет клонеров")
@@ -172,19 +126,8 @@ class EFFECTOR_OT_auto_link(Operator):
             # Включаем отображение эффектора, так как он будет привязан
             effector_mod.show_viewport = True
             
-            # Ищем параметры Enable и Strength в интерфейсе эффектора
-            for socket in effector_mod.node_group.interface.items_tree:
-                if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT':
-                    if socket.name == "Enable":
-                        try:
-                            effector_mod[socket.identifier] = True
-                        except:
-                            pass
-                    elif socket.name == "Strength":
-                        try:
-                            effector_mod[socket.identifier] = 1.0
-                        except:
-                            pass
+            # Включаем параметры Enable и Strength эффектора
+            set_modifier_inputs(effector_mod, {"Enable": True, "Strength": 1.0})
         
         # Связываем эффектор со всеми клонерами, к которым он еще не привязан
         linked_count = 0
@@ -199,10 +142,10 @@ class EFFECTOR_OT_auto_link(Operator):
             if self.effector_name not in linked_effectors:
                 linked_effectors.append(self.effector_name)
                 cloner.node_group["linked_effectors"] = linked_effectors
+                cloner_index.link(obj, cloner.name, self.effector_name)
                 
                 # Обновляем клонер с новыми эффекторами
-                from ...utils.cloner_utils import update_cloner_with_effectors
-                update_cloner_with_effectors(obj, cloner)
+                mark_cloner_dirty(obj, cloner)
                 linked_count += 1
         
         if linked_count > 0:
@@ -235,31 +178,25 @@ class EFFECTOR_PT_main_panel(Panel):
             layout.label(text="Select an object")
             return
 
-        eff_mods = [
-            m for m in obj.modifiers
-            if m.type == 'NODES' and m.node_group
-               and any(m.node_group.name.startswith(p) for p in EFFECTOR_NODE_GROUP_PREFIXES)
-        ]
-        if not eff_mods:
+        # Эффекторы и клонеры берём из индекса, без обхода стека модификаторов
+        index_entry = cloner_index.get(obj)
+        if not index_entry.effectors:
             layout.label(text="No effectors")
             return
 
         layout.label(text="Effectors:", icon='FORCE_FORCE')
-        indices = {m.name: i for i, m in enumerate(obj.modifiers)}
+        indices = index_entry.indices
         
         # Находим клонеры на объекте
-        cloner_mods = [
-            m for m in obj.modifiers
-            if m.type == 'NODES' and m.node_group
-               and m.node_group.get("linked_effectors") is not None
-        ]
+        cloner_names = index_entry.cloners
         
-        for mod in eff_mods:
-            if mod.name not in indices:
+        for name in index_entry.effectors:
+            mod = obj.modifiers.get(name)
+            if mod is None or not mod.node_group:
                 continue
-            self.draw_effector_ui(context, layout, obj, mod, indices, cloner_mods)
+            self.draw_effector_ui(context, layout, obj, mod, indices, cloner_names)
 
-    def draw_effector_ui(self, context, layout, obj, mod, indices, cloner_mods):
+    def draw_effector_ui(self, context, layout, obj, mod, indices, cloner_names):
         box = layout.box()
         header = box.row(align=True)
         icon = 'FORCE_FORCE'
@@ -298,21 +235,18 @@ class EFFECTOR_PT_main_panel(Panel):
 
         if mod.show_expanded and mod.node_group and hasattr(mod.node_group, 'interface'):
             # --- Показываем связи с клонерами ---
-            linked_cloners = []
-            for cloner in cloner_mods:
-                if mod.name in cloner.node_group.get("linked_effectors", []):
-                    linked_cloners.append(cloner)
+            linked_cloners = cloner_index.linked_cloners(obj, mod.name)
             
             # Компактный список связанных клонеров
             if linked_cloners:
                 link_box = box.box()
                 row = link_box.row()
                 row.label(text="Linked to:", icon='LINKED')
-                for cloner in linked_cloners:
-                    row.label(text=cloner.name)
+                for cloner_name in linked_cloners:
+                    row.label(text=cloner_name)
             
             # Кнопка автопривязки
-            if not linked_cloners and cloner_mods:
+            if not linked_cloners and cloner_names:
                 link_op = box.operator("object.auto_link_effector", text="Auto-Link to Cloners", icon='LINKED')
                 link_op.effector_name = mod.name
             
@@ -324,8 +258,8 @@ class EFFECTOR_PT_main_panel(Panel):
             
             # Сортируем параметры по категориям
             if mod.type == 'NODES' and mod.node_group:
-                for socket in mod.node_group.interface.items_tree:
-                    if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT' and socket.name not in ["Geometry"]:
+                for socket in get_socket_schema(mod.node_group).inputs.values():
+                    if socket.name not in ["Geometry"]:
                         name = socket.name
                         if name in ["Position", "Rotation", "Scale", "Uniform Scale"]:
                             transform_params.append(socket)
@@ -369,25 +303,17 @@ class EFFECTOR_PT_main_panel(Panel):
                     except Exception as e:
                         row.label(text=f"Error: {socket.name}")
                 
-                # Проверяем наличие поля
-                using_field = mod.get("Use Field", False)
-                if using_field:
-                    has_driver = False
-                    try:
-                        if hasattr(mod, "animation_data") and mod.animation_data and mod.animation_data.drivers:
-                            drivers = mod.animation_data.drivers
-                            for dr in drivers:
-                                if dr.data_path == 'Field':
-                                    has_driver = True
-                                    break
-                    except:
-                        pass
-                    
-                    # Кнопка отключения поля
-                    field_box.operator("object.effector_remove_field", text="Disconnect", icon='X').effector_name = mod.name
-                else:
-                    # Кнопка подключения поля
-                    field_box.operator("object.effector_add_field", text="Connect Field", icon='ADD').effector_name = mod.name
+                # Стек полей: порядок сверху вниз, режим смешивания хранится в группе поля
+                for field_mod in dependency_manager.get_fields_for_effector(obj, mod):
+                    row = field_box.row(align=True)
+                    row.label(text=field_mod.name, icon='LINKED')
+                    row.prop(field_mod.node_group, "field_blend_mode", text="")
+                    remove_op = row.operator("object.effector_remove_field", text="", icon='X')
+                    remove_op.effector_name = mod.name
+                    remove_op.field_name = field_mod.name
+                
+                # Кнопка подключения поля
+                field_box.operator("object.effector_add_field", text="Add Field", icon='ADD').effector_name = mod.name
             
             if other_params:
                 other_box = box.box()
@@ -398,6 +324,14 @@ class EFFECTOR_PT_main_panel(Panel):
                         row.prop(mod, f'["{socket.identifier}"]', text=socket.name)
                     except Exception as e:
                         row.label(text=f"Error: {socket.name}")
+                
+                # Запекание решётки шума
+                baked_socket = next((socket for socket in other_params if socket.name == "Baked Noise"), None)
+                if baked_socket and mod.get(baked_socket.identifier, False):
+                    bake_row = other_box.row()
+                    bake_row.operator("object.ce_ot_bake_noise_effector", text="Bake Noise", icon='FILE_REFRESH').effector_name = mod.name
+                    if is_noise_bake_outdated(mod):
+                        other_box.label(text="Bake is out of date", icon='ERROR')
 
 # регистрация операторов и панели
 classes = (
@@ -410,7 +344,7 @@ classes = (
 def register():
     print("Registering Effector Panel classes...")
     for cls in classes:
-        bpy.utils.register_class(cls)
+        bpy.utils.register_class(instrument_operator(cls))
     print(f"Effector Panel registered {len(classes)} classes")
 
 def unregister():
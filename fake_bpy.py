@@ -0,0 +1,1861 @@
+# benchmarks/fake_bpy.py
+"""
+In-memory stand-in for the subset of bpy the addon's Python code uses.
+
+Covers bpy.data ID collections (unique names, user counts, ID properties),
+geometry node trees (interface items_tree, nodes, sockets, links), objects
+with modifier stacks, bpy.props/bpy.types/bpy.utils registration, bpy.app
+handlers and timers, bpy.msgbus, a few bpy.ops and a minimal mathutils.
+Node graphs are built and rewired but never evaluated, which is enough to
+run update_cloner_with_effectors, the dependency index, the operators'
+execute() bodies and panel drawing under plain CPython for correctness
+checks and profiling.
+
+There are no per-node socket tables: sockets of regular nodes are declared
+on first access by name or index. Group input/output and group nodes follow
+the node tree interface, as in Blender.
+
+Usage:
+    import fake_bpy
+    bpy = fake_bpy.install()    # registers bpy and mathutils in sys.modules
+    ...
+    fake_bpy.reset()            # drop all data, handlers and timers between runs
+"""
+import itertools
+import math
+import os
+import re
+import sys
+import types
+from copy import deepcopy
+
+VERSION = (4, 2, 0)
+
+_NO_DEFAULT = object()
+_session_uids = itertools.count(1)
+
+# --- mathutils ---
+
+class Vector:
+    """Minimal mathutils.Vector: a mutable float sequence with x/y/z/w access"""
+    
+    __slots__ = ("_values",)
+    
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._values = [float(v) for v in values]
+    
+    def _axis(index):
+        def get(self):
+            return self._values[index]
+        def set(self, value):
+            self._values[index] = float(value)
+        return property(get, set)
+    
+    x, y, z, w = _axis(0), _axis(1), _axis(2), _axis(3)
+    
+    def __len__(self):
+        return len(self._values)
+    
+    def __iter__(self):
+        return iter(self._values)
+    
+    def __getitem__(self, index):
+        return self._values[index]
+    
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+    
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"Vector({tuple(self._values)})"
+    
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+    
+    __radd__ = __add__
+    
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+    
+    def __rsub__(self, other):
+        return Vector(b - a for a, b in zip(self, other))
+    
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector(a * other for a in self)
+        return Vector(a * b for a, b in zip(self, other))
+    
+    __rmul__ = __mul__
+    
+    def __truediv__(self, other):
+        return Vector(a / other for a in self)
+    
+    def __neg__(self):
+        return Vector(-a for a in self)
+    
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self))
+    
+    def normalized(self):
+        length = self.length
+        return Vector(a / length for a in self) if length else self.copy()
+    
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+    
+    def copy(self):
+        return Vector(self._values)
+    
+    def to_tuple(self, precision=-1):
+        return tuple(self._values if precision < 0 else (round(a, precision) for a in self._values))
+
+class Matrix:
+    """Minimal mathutils.Matrix: 4x4 affine transforms"""
+    
+    def __init__(self, rows=None):
+        self._rows = [list(map(float, row)) for row in rows] if rows else [
+            [1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+    
+    @classmethod
+    def Identity(cls, size=4):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+    
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls()
+        for i, value in enumerate(vector):
+            matrix._rows[i][3] = float(value)
+        return matrix
+    
+    def __getitem__(self, index):
+        return Vector(self._rows[index])
+    
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix([[sum(self._rows[i][k] * other._rows[k][j] for k in range(4)) for j in range(4)]
+                           for i in range(4)])
+        values = list(other) + [1.0] * (4 - len(other))
+        result = [sum(self._rows[i][k] * values[k] for k in range(4)) for i in range(4)]
+        return Vector(result[:len(other)])
+    
+    @property
+    def translation(self):
+        return self.to_translation()
+    
+    def to_translation(self):
+        return Vector(row[3] for row in self._rows[:3])
+    
+    def to_scale(self):
+        return Vector(math.sqrt(sum(self._rows[i][j] ** 2 for i in range(3))) for j in range(3))
+    
+    def copy(self):
+        return Matrix(self._rows)
+
+# --- ID-свойства и блоки данных ---
+
+class _IDPropertyOwner:
+    """Dictionary-style ID properties (obj["key"])"""
+    
+    def _id_props(self):
+        return self.__dict__.setdefault("_id_properties", {})
+    
+    def __getitem__(self, key):
+        return self._id_props()[key]
+    
+    def __setitem__(self, key, value):
+        # Списки хранятся копией, как IDPropertyArray
+        self._id_props()[key] = list(value) if isinstance(value, (list, tuple)) else value
+    
+    def __delitem__(self, key):
+        del self._id_props()[key]
+    
+    def __contains__(self, key):
+        return key in self._id_props()
+    
+    def get(self, key, default=None):
+        return self._id_props().get(key, default)
+    
+    def pop(self, key, *default):
+        return self._id_props().pop(key, *default)
+    
+    def keys(self):
+        return self._id_props().keys()
+    
+    def values(self):
+        return self._id_props().values()
+    
+    def items(self):
+        return self._id_props().items()
+
+class ID(_IDPropertyOwner):
+    """Base of all data-blocks: unique name within its collection, user count, session uid"""
+    
+    def __init__(self, name):
+        self._collection = None
+        self._name = name
+        self._users = 0
+        self._use_fake_user = False
+        self.session_uid = next(_session_uids)
+        self.library = None
+        self.is_evaluated = False
+        self.tag = False
+    
+    @property
+    def name(self):
+        return self._name
+    
+    @name.setter
+    def name(self, value):
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+    
+    @property
+    def name_full(self):
+        return self._name
+    
+    @property
+    def users(self):
+        return self._users
+    
+    @property
+    def use_fake_user(self):
+        return self._use_fake_user
+    
+    @use_fake_user.setter
+    def use_fake_user(self, value):
+        value = bool(value)
+        if value != self._use_fake_user:
+            self._users += 1 if value else -1
+            self._use_fake_user = value
+    
+    @property
+    def original(self):
+        return self
+    
+    @property
+    def id_data(self):
+        return self
+    
+    def as_pointer(self):
+        return id(self)
+    
+    def evaluated_get(self, depsgraph):
+        return self
+    
+    def user_clear(self):
+        self._users = 0
+    
+    def _add_user(self):
+        self._users += 1
+    
+    def _remove_user(self):
+        self._users = max(self._users - 1, 0)
+    
+    def _unlink(self):
+        """Drop the references this data-block holds (called on removal)"""
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} '{self._name}'>"
+
+class IDCollection:
+    """bpy.data.<collection>: name -> data-block with Blender's .001 name deduplication"""
+    
+    def __init__(self, factory=None):
+        self._items = {}
+        self._factory = factory
+    
+    def _unique_name(self, name, ignore=None):
+        if name not in self._items or self._items[name] is ignore:
+            return name
+        match = re.match(r"^(.*)\.(\d{3,})$", name)
+        base = match.group(1) if match else name
+        for counter in itertools.count(1):
+            candidate = f"{base}.{counter:03d}"
+            if candidate not in self._items or self._items[candidate] is ignore:
+                return candidate
+    
+    def _link(self, data_block):
+        data_block._name = self._unique_name(data_block._name)
+        data_block._collection = self
+        self._items[data_block._name] = data_block
+        return data_block
+    
+    def _rename(self, data_block, name):
+        name = self._unique_name(name, ignore=data_block)
+        if name == data_block._name:
+            return
+        # Порядок коллекции сохраняется (в Blender он алфавитный, код аддона на него не опирается)
+        self._items = {(name if item is data_block else key): item for key, item in self._items.items()}
+        data_block._name = name
+    
+    def new(self, *args, **kwargs):
+        return self._link(self._factory(*args, **kwargs))
+    
+    def remove(self, data_block, do_unlink=True, do_id_user=True, do_ui_user=True):
+        if self._items.get(data_block._name) is not data_block:
+            raise ReferenceError(f"{data_block!r} is not in this collection")
+        data_block._unlink()
+        del self._items[data_block._name]
+        data_block._collection = None
+    
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._items.values())[key]
+        return self._items[key]
+    
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self._items
+        return any(item is key for item in self._items.values())
+    
+    def __iter__(self):
+        return iter(list(self._items.values()))
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def keys(self):
+        return list(self._items.keys())
+    
+    def values(self):
+        return list(self._items.values())
+    
+    def items(self):
+        return list(self._items.items())
+
+# --- Интерфейс нод-группы ---
+
+# socket_type -> (тип сокета узла, значение по умолчанию, диапазон)
+SOCKET_TYPES = {
+    'NodeSocketFloat': ('VALUE', 0.0, (-3.4028234e38, 3.4028234e38)),
+    'NodeSocketInt': ('INT', 0, (-2 ** 31, 2 ** 31 - 1)),
+    'NodeSocketBool': ('BOOLEAN', False, None),
+    'NodeSocketVector': ('VECTOR', (0.0, 0.0, 0.0), (-3.4028234e38, 3.4028234e38)),
+    'NodeSocketRotation': ('ROTATION', (0.0, 0.0, 0.0), None),
+    'NodeSocketColor': ('RGBA', (0.0, 0.0, 0.0, 1.0), None),
+    'NodeSocketString': ('STRING', "", None),
+    'NodeSocketMenu': ('MENU', "", None),
+    'NodeSocketObject': ('OBJECT', None, None),
+    'NodeSocketCollection': ('COLLECTION', None, None),
+    'NodeSocketMaterial': ('MATERIAL', None, None),
+    'NodeSocketImage': ('IMAGE', None, None),
+    'NodeSocketTexture': ('TEXTURE', None, None),
+    'NodeSocketGeometry': ('GEOMETRY', _NO_DEFAULT, None),
+    'NodeSocketMatrix': ('MATRIX', _NO_DEFAULT, None),
+}
+
+class NodeTreeInterfaceSocket:
+    """Socket item of a node tree interface"""
+    
+    item_type = 'SOCKET'
+    
+    def __init__(self, interface, name, identifier, in_out, socket_type, parent, description=""):
+        self.interface = interface
+        self.name = name
+        self.identifier = identifier
+        self.in_out = in_out
+        self.socket_type = socket_type
+        self.parent = parent
+        self.description = description
+        self.subtype = 'NONE'
+        self.hide_value = False
+        self.hide_in_modifier = False
+        self.force_non_field = False
+        self.attribute_domain = 'POINT'
+        self.default_attribute_name = ""
+        node_type, default, value_range = SOCKET_TYPES.get(socket_type, ('VALUE', 0.0, None))
+        self._node_socket_type = node_type
+        if default is not _NO_DEFAULT:
+            self.default_value = default
+        if value_range is not None:
+            self.min_value, self.max_value = value_range
+    
+    @property
+    def bl_socket_idname(self):
+        return self.socket_type
+    
+    @property
+    def id_data(self):
+        return self.interface.tree
+    
+    def __repr__(self):
+        return f"<NodeTreeInterfaceSocket {self.in_out} '{self.name}'>"
+
+class NodeTreeInterfacePanel:
+    """Panel item of a node tree interface"""
+    
+    item_type = 'PANEL'
+    
+    def __init__(self, interface, name, identifier, parent, description="", default_closed=False):
+        self.interface = interface
+        self.name = name
+        self.identifier = identifier
+        self.parent = parent
+        self.description = description
+        self.default_closed = default_closed
+        self.interface_items = []
+    
+    @property
+    def id_data(self):
+        return self.interface.tree
+
+class NodeTreeInterface:
+    """node_tree.interface: sockets and panels, flattened depth-first by items_tree"""
+    
+    def __init__(self, tree):
+        self.tree = tree
+        self._root = []
+        self._next_identifier = 1
+        self.active = None
+        self.active_index = 0
+    
+    def _new_identifier(self, prefix):
+        identifier = f"{prefix}_{self._next_identifier}"
+        self._next_identifier += 1
+        return identifier
+    
+    def _container(self, parent):
+        return parent.interface_items if parent is not None else self._root
+    
+    def new_socket(self, name, description="", in_out='INPUT', socket_type='NodeSocketFloat', parent=None):
+        if socket_type not in SOCKET_TYPES:
+            raise TypeError(f"Invalid socket type '{socket_type}'")
+        item = NodeTreeInterfaceSocket(self, name, self._new_identifier("Socket"), in_out, socket_type, parent, description)
+        self._container(parent).append(item)
+        return item
+    
+    def new_panel(self, name, description="", default_closed=False, parent=None):
+        item = NodeTreeInterfacePanel(self, name, self._new_identifier("Panel"), parent, description, default_closed)
+        self._container(parent).append(item)
+        return item
+    
+    @property
+    def items_tree(self):
+        items = []
+        def walk(container):
+            for item in container:
+                items.append(item)
+                if item.item_type == 'PANEL':
+                    walk(item.interface_items)
+        walk(self._root)
+        return items
+    
+    def remove(self, item, move_content_to_parent=True):
+        container = self._container(item.parent)
+        index = container.index(item)
+        container.pop(index)
+        if item.item_type == 'PANEL' and move_content_to_parent:
+            for child in item.interface_items:
+                child.parent = item.parent
+            container[index:index] = item.interface_items
+        self.tree._prune_interface_links()
+    
+    def clear(self):
+        self._root = []
+        self.tree._prune_interface_links()
+    
+    def move(self, item, to_position):
+        container = self._container(item.parent)
+        container.remove(item)
+        container.insert(to_position, item)
+    
+    def _copy_from(self, other):
+        """Copy every item keeping identifiers, as ID copy does"""
+        def copy_items(container, parent):
+            copied = []
+            for item in container:
+                clone = object.__new__(type(item))
+                clone.__dict__.update(deepcopy({key: value for key, value in item.__dict__.items()
+                                                if key not in ("interface", "parent", "interface_items")}))
+                clone.interface = self
+                clone.parent = parent
+                if item.item_type == 'PANEL':
+                    clone.interface_items = copy_items(item.interface_items, clone)
+                copied.append(clone)
+            return copied
+        self._root = copy_items(other._root, None)
+        self._next_identifier = other._next_identifier
+
+# --- Сокеты, узлы и связи ---
+
+# Имена сокетов, которые без таблиц узлов считаются геометрией (без default_value)
+GEOMETRY_SOCKET_NAMES = {"Geometry", "Instances", "Points", "Mesh", "Curve", "Curves", "Instance",
+                         "Bounding Box", "Volume", "Mesh 1", "Mesh 2", "Convex Hull"}
+# Входы, принимающие несколько связей
+MULTI_INPUT_SOCKETS = {
+    ('GeometryNodeJoinGeometry', "Geometry"),
+    ('GeometryNodeMeshBoolean', "Mesh 2"),
+    ('GeometryNodeMeshBoolean', "Mesh"),
+    ('GeometryNodeStringJoin', "Strings"),
+}
+
+class NodeSocket:
+    """Input or output socket of a node"""
+    
+    def __init__(self, node, name, identifier, is_output, socket_type='VALUE', default=0.0):
+        self.node = node
+        self.name = name
+        self.identifier = identifier
+        self.is_output = is_output
+        self.type = socket_type
+        self.enabled = True
+        self.hide = False
+        self.hide_value = False
+        self.show_expanded = False
+        self.is_multi_input = (not is_output and (node.bl_idname, name) in MULTI_INPUT_SOCKETS)
+        self._links = []
+        if default is not _NO_DEFAULT:
+            self.default_value = deepcopy(default)
+    
+    @property
+    def links(self):
+        return list(self._links)
+    
+    @property
+    def is_linked(self):
+        return bool(self._links)
+    
+    @property
+    def id_data(self):
+        return self.node.id_data
+    
+    def __repr__(self):
+        direction = "output" if self.is_output else "input"
+        return f"<NodeSocket {direction} '{self.name}' of '{self.node.name}'>"
+
+class _SocketCollection:
+    """node.inputs / node.outputs lookups by index, name or identifier"""
+    
+    def __init__(self, node, is_output):
+        self._node = node
+        self._is_output = is_output
+    
+    def _sockets(self):
+        raise NotImplementedError
+    
+    def _find(self, key):
+        sockets = self._sockets()
+        if isinstance(key, int):
+            return sockets[key] if -len(sockets) <= key < len(sockets) else None
+        for socket in sockets:
+            if socket.name == key:
+                return socket
+        for socket in sockets:
+            if socket.identifier == key:
+                return socket
+        return None
+    
+    def __getitem__(self, key):
+        socket = self._find(key)
+        if socket is None:
+            raise KeyError(f"'{key}' not found in {self._node.name} {'outputs' if self._is_output else 'inputs'}")
+        return socket
+    
+    def get(self, key, default=None):
+        socket = self._find(key)
+        return default if socket is None else socket
+    
+    def __contains__(self, key):
+        return self._find(key) is not None
+    
+    def __iter__(self):
+        return iter(self._sockets())
+    
+    def __len__(self):
+        return len(self._sockets())
+    
+    def find(self, name):
+        for i, socket in enumerate(self._sockets()):
+            if socket.name == name:
+                return i
+        return -1
+    
+    def keys(self):
+        return [socket.name for socket in self._sockets()]
+    
+    def values(self):
+        return self._sockets()
+
+class _DeclaredSockets(_SocketCollection):
+    """Sockets of a regular node, declared on first access by name or index"""
+    
+    def __init__(self, node, is_output):
+        super().__init__(node, is_output)
+        self._list = []
+    
+    def _sockets(self):
+        return self._list
+    
+    def _declare(self, name):
+        prefix = "Output" if self._is_output else "Input"
+        identifier = f"{name or prefix}_{len(self._list)}" if any(s.name == name for s in self._list) else (name or f"{prefix}_{len(self._list)}")
+        if name in GEOMETRY_SOCKET_NAMES:
+            socket = NodeSocket(self._node, name, identifier, self._is_output, 'GEOMETRY', _NO_DEFAULT)
+        else:
+            socket = NodeSocket(self._node, name, identifier, self._is_output)
+        self._list.append(socket)
+        return socket
+    
+    def __getitem__(self, key):
+        socket = self._find(key)
+        if socket is not None:
+            return socket
+        if isinstance(key, int):
+            if key < 0:
+                raise IndexError(key)
+            while len(self._list) <= key:
+                self._declare("")
+            return self._list[key]
+        return self._declare(key)
+    
+    def new(self, socket_type, name, identifier=""):
+        socket = self._declare(name)
+        if identifier:
+            socket.identifier = identifier
+        return socket
+
+class _InterfaceSockets(_SocketCollection):
+    """Sockets that mirror a node tree interface (group input/output and group nodes)"""
+    
+    def __init__(self, node, is_output, in_out, tree_getter, virtual_socket):
+        super().__init__(node, is_output)
+        self._in_out = in_out
+        self._tree_getter = tree_getter
+        self._virtual_socket = virtual_socket
+        self._cache = {}
+    
+    def _sockets(self):
+        tree = self._tree_getter()
+        sockets = []
+        if tree is not None:
+            for item in tree.interface.items_tree:
+                if item.item_type != 'SOCKET' or item.in_out != self._in_out:
+                    continue
+                socket = self._cache.get(item.identifier)
+                if socket is None:
+                    socket = NodeSocket(self._node, item.name, item.identifier, self._is_output,
+                                        item._node_socket_type, getattr(item, "default_value", _NO_DEFAULT))
+                    self._cache[item.identifier] = socket
+                socket.name = item.name
+                sockets.append(socket)
+        if self._virtual_socket:
+            socket = self._cache.get("__extend__")
+            if socket is None:
+                socket = NodeSocket(self._node, "", "__extend__", self._is_output, 'CUSTOM', _NO_DEFAULT)
+                self._cache["__extend__"] = socket
+            sockets.append(socket)
+        return sockets
+    
+    def _reset(self):
+        self._cache = {}
+
+class CurveMapPoint:
+    def __init__(self, location):
+        self.location = location
+        self.handle_type = 'AUTO'
+        self.select = False
+    
+    @property
+    def location(self):
+        return self._location
+    
+    @location.setter
+    def location(self, value):
+        self._location = Vector(value)
+
+class CurveMapPoints(list):
+    def new(self, position, value):
+        point = CurveMapPoint((position, value))
+        self.append(point)
+        return point
+
+class CurveMap:
+    def __init__(self):
+        self.points = CurveMapPoints([CurveMapPoint((0.0, 0.0)), CurveMapPoint((1.0, 1.0))])
+
+class CurveMapping:
+    """Curve mapping of Float/RGB Curve nodes; evaluate() interpolates linearly (Blender uses Bezier handles)"""
+    
+    def __init__(self, channels=1):
+        self.curves = [CurveMap() for _ in range(channels)]
+        self.extend = 'HORIZONTAL'
+        self.use_clip = True
+        self.clip_min_x = self.clip_min_y = 0.0
+        self.clip_max_x = self.clip_max_y = 1.0
+    
+    def initialize(self):
+        pass
+    
+    def update(self):
+        for curve in self.curves:
+            curve.points.sort(key=lambda point: point.location.x)
+    
+    def evaluate(self, curve, position):
+        points = sorted(curve.points, key=lambda point: point.location.x)
+        first, last = points[0].location, points[-1].location
+        if position <= first.x or position >= last.x:
+            end, neighbour = (first, points[1].location) if position <= first.x else (last, points[-2].location)
+            if self.extend != 'EXTRAPOLATED' or neighbour.x == end.x:
+                return end.y
+            slope = (neighbour.y - end.y) / (neighbour.x - end.x)
+            return end.y + slope * (position - end.x)
+        for left, right in zip(points, points[1:]):
+            a, b = left.location, right.location
+            if a.x <= position <= b.x:
+                factor = (position - a.x) / (b.x - a.x) if b.x != a.x else 0.0
+                return a.y + (b.y - a.y) * factor
+        return last.y
+
+class _NamedItems(list):
+    """enum_items and similar dynamic item collections"""
+    
+    def new(self, name):
+        item = types.SimpleNamespace(name=name, description="")
+        self.append(item)
+        return item
+
+# Дополнительные данные отдельных типов узлов
+NODE_EXTRAS = {
+    'ShaderNodeFloatCurve': lambda node: setattr(node, "mapping", CurveMapping(1)),
+    'ShaderNodeRGBCurve': lambda node: setattr(node, "mapping", CurveMapping(4)),
+    'ShaderNodeVectorCurve': lambda node: setattr(node, "mapping", CurveMapping(3)),
+    'GeometryNodeMenuSwitch': lambda node: setattr(node, "enum_items", _NamedItems(
+        [types.SimpleNamespace(name="A", description=""), types.SimpleNamespace(name="B", description="")])),
+}
+
+GROUP_NODE_TYPES = {'GeometryNodeGroup', 'ShaderNodeGroup', 'CompositorNodeGroup', 'NodeGroup'}
+
+def _node_type_and_label(bl_idname):
+    """Approximate node.type and default name from the bl_idname"""
+    special = {
+        'NodeGroupInput': ('GROUP_INPUT', "Group Input"),
+        'NodeGroupOutput': ('GROUP_OUTPUT', "Group Output"),
+        'NodeFrame': ('FRAME', "Frame"),
+        'NodeReroute': ('REROUTE', "Reroute"),
+    }
+    if bl_idname in special:
+        return special[bl_idname]
+    if bl_idname in GROUP_NODE_TYPES:
+        return 'GROUP', "Group"
+    stem = re.sub(r"^(GeometryNode|ShaderNode|FunctionNode|CompositorNode|Node)", "", bl_idname)
+    words = re.findall(r"[A-Z]+(?![a-z])|[A-Z][a-z0-9]*|[0-9]+", stem) or [stem]
+    return "_".join(word.upper() for word in words), " ".join(words)
+
+class Node:
+    """Node of a node tree; any node-specific attribute can be set"""
+    
+    def __init__(self, tree, bl_idname, name):
+        self.id_data = tree
+        self.bl_idname = bl_idname
+        self.type, self.bl_label = _node_type_and_label(bl_idname)
+        self._name = name
+        self.label = ""
+        self._location = Vector((0.0, 0.0))
+        self.width = 140.0
+        self.hide = False
+        self.mute = False
+        self.select = False
+        self.parent = None
+        self._node_tree = None
+        if bl_idname == 'NodeGroupInput':
+            self.inputs = _DeclaredSockets(self, False)
+            self.outputs = _InterfaceSockets(self, True, 'INPUT', lambda: self.id_data, True)
+        elif bl_idname == 'NodeGroupOutput':
+            self.inputs = _InterfaceSockets(self, False, 'OUTPUT', lambda: self.id_data, True)
+            self.outputs = _DeclaredSockets(self, True)
+            self.is_active_output = True
+        elif bl_idname in GROUP_NODE_TYPES:
+            self.inputs = _InterfaceSockets(self, False, 'INPUT', lambda: self._node_tree, False)
+            self.outputs = _InterfaceSockets(self, True, 'OUTPUT', lambda: self._node_tree, False)
+        else:
+            self.inputs = _DeclaredSockets(self, False)
+            self.outputs = _DeclaredSockets(self, True)
+        extra = NODE_EXTRAS.get(bl_idname)
+        if extra is not None:
+            extra(self)
+    
+    @property
+    def name(self):
+        return self._name
+    
+    @name.setter
+    def name(self, value):
+        self.id_data.nodes._rename(self, value)
+    
+    def as_pointer(self):
+        return id(self)
+    
+    @property
+    def location(self):
+        return self._location
+    
+    @location.setter
+    def location(self, value):
+        self._location = Vector(value)
+    
+    @property
+    def node_tree(self):
+        return self._node_tree
+    
+    @node_tree.setter
+    def node_tree(self, tree):
+        if tree is self._node_tree:
+            return
+        if self._node_tree is not None:
+            self._node_tree._remove_user()
+        self._node_tree = tree
+        if tree is not None:
+            tree._add_user()
+        # Сокеты группы пересоздаются по новому интерфейсу, связи с ними снимаются
+        for sockets in (self.inputs, self.outputs):
+            for socket in list(sockets._cache.values()):
+                for link in list(socket._links):
+                    self.id_data.links.remove(link)
+            sockets._reset()
+    
+    def __repr__(self):
+        return f"<Node '{self._name}' ({self.bl_idname})>"
+
+class Nodes:
+    """node_tree.nodes"""
+    
+    def __init__(self, tree):
+        self._tree = tree
+        self._list = []
+        self._by_name = {}
+        self.active = None
+    
+    def _unique_name(self, name, node=None):
+        if self._by_name.get(name, node) is node:
+            return name
+        match = re.match(r"^(.*)\.(\d{3,})$", name)
+        base = match.group(1) if match else name
+        for counter in itertools.count(1):
+            candidate = f"{base}.{counter:03d}"
+            if self._by_name.get(candidate, node) is node:
+                return candidate
+    
+    def _rename(self, node, name):
+        name = self._unique_name(name, node)
+        self._by_name.pop(node._name, None)
+        node._name = name
+        self._by_name[name] = node
+    
+    def new(self, type):
+        node = Node(self._tree, type, "")
+        node._name = self._unique_name(node.bl_label)
+        self._list.append(node)
+        self._by_name[node._name] = node
+        return node
+    
+    def remove(self, node):
+        if self._by_name.get(node._name) is not node:
+            raise RuntimeError(f"Unable to locate {node!r} in node tree")
+        for link in [link for link in self._tree.links if link.from_node is node or link.to_node is node]:
+            self._tree.links.remove(link)
+        if node._node_tree is not None:
+            node._node_tree._remove_user()
+            node._node_tree = None
+        self._list.remove(node)
+        del self._by_name[node._name]
+        if self.active is node:
+            self.active = None
+    
+    def clear(self):
+        for node in list(self._list):
+            self.remove(node)
+    
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._list[key]
+        return self._by_name[key]
+    
+    def __contains__(self, key):
+        return key in self._by_name if isinstance(key, str) else key in self._list
+    
+    def __iter__(self):
+        return iter(list(self._list))
+    
+    def __len__(self):
+        return len(self._list)
+    
+    def keys(self):
+        return [node.name for node in self._list]
+    
+    def values(self):
+        return list(self._list)
+
+class NodeLink:
+    def __init__(self, from_socket, to_socket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.from_node = from_socket.node
+        self.to_node = to_socket.node
+        self.is_valid = True
+        self.is_muted = False
+        self.is_hidden = False
+    
+    def as_pointer(self):
+        return id(self)
+    
+    def __repr__(self):
+        return f"<NodeLink {self.from_node.name}.{self.from_socket.name} -> {self.to_node.name}.{self.to_socket.name}>"
+
+class NodeLinks:
+    """node_tree.links; a new link replaces the existing one on a single-input socket"""
+    
+    def __init__(self, tree):
+        self._tree = tree
+        self._list = []
+    
+    def new(self, input, output, verify_limits=True, handle_dynamic_sockets=False):
+        from_socket, to_socket = input, output
+        if not from_socket.is_output and to_socket.is_output:
+            from_socket, to_socket = to_socket, from_socket
+        if not from_socket.is_output or to_socket.is_output:
+            raise RuntimeError("Cannot link two sockets of the same direction")
+        if from_socket.node.id_data is not self._tree or to_socket.node.id_data is not self._tree:
+            raise RuntimeError("Sockets must belong to this node tree")
+        for link in to_socket._links:
+            if link.from_socket is from_socket:
+                return link
+        if verify_limits and not to_socket.is_multi_input:
+            for link in list(to_socket._links):
+                self.remove(link)
+        link = NodeLink(from_socket, to_socket)
+        self._list.append(link)
+        from_socket._links.append(link)
+        to_socket._links.append(link)
+        return link
+    
+    def remove(self, link):
+        self._list.remove(link)
+        link.from_socket._links.remove(link)
+        link.to_socket._links.remove(link)
+    
+    def clear(self):
+        for link in list(self._list):
+            self.remove(link)
+    
+    def __iter__(self):
+        return iter(list(self._list))
+    
+    def __len__(self):
+        return len(self._list)
+    
+    def __getitem__(self, index):
+        return self._list[index]
+
+class NodeTree(ID):
+    """Node group data-block"""
+    
+    bl_idname = 'NodeTree'
+    type = 'UNDEFINED'
+    
+    def __init__(self, name, type='GeometryNodeTree'):
+        super().__init__(name)
+        self.bl_idname = type
+        self.interface = NodeTreeInterface(self)
+        self.nodes = Nodes(self)
+        self.links = NodeLinks(self)
+        self.description = ""
+        self.is_modifier = False
+        self.is_tool = False
+        self.color_tag = 'NONE'
+    
+    def _prune_interface_links(self):
+        """Remove links to sockets whose interface item no longer exists, here and in group nodes using this tree"""
+        identifiers = {item.identifier for item in self.interface.items_tree if item.item_type == 'SOCKET'}
+        identifiers.add("__extend__")
+        trees = [self] + [tree for tree in _data.node_groups if tree is not self]
+        for tree in trees:
+            for link in tree.links:
+                for socket in (link.from_socket, link.to_socket):
+                    node = socket.node
+                    uses_interface = (node.id_data is self and node.type in {'GROUP_INPUT', 'GROUP_OUTPUT'}) or node._node_tree is self
+                    if uses_interface and socket.identifier not in identifiers:
+                        tree.links.remove(link)
+                        break
+    
+    def copy(self):
+        tree = _new_node_tree(self.name, self.bl_idname)
+        _data.node_groups._link(tree)
+        tree.interface._copy_from(self.interface)
+        for key, value in self.__dict__.items():
+            if key not in ("_collection", "_name", "_users", "_use_fake_user", "session_uid", "interface",
+                           "nodes", "links", "_id_properties"):
+                tree.__dict__[key] = deepcopy(value)
+        tree.__dict__["_id_properties"] = deepcopy(self._id_props())
+        
+        # Узлы копируются с атрибутами и значениями сокетов, связи переносятся по индексам сокетов
+        node_map = {}
+        for node in self.nodes:
+            clone = tree.nodes.new(node.bl_idname)
+            clone.name = node.name
+            for key, value in node.__dict__.items():
+                if key in ("id_data", "_name", "_node_tree", "inputs", "outputs", "parent"):
+                    continue
+                clone.__dict__[key] = deepcopy(value)
+            if node._node_tree is not None:
+                clone.node_tree = node._node_tree
+            for source, target in ((node.inputs, clone.inputs), (node.outputs, clone.outputs)):
+                for index, socket in enumerate(source):
+                    copied = target[index] if isinstance(target, _DeclaredSockets) else target.get(socket.identifier)
+                    if copied is None:
+                        continue
+                    if isinstance(target, _DeclaredSockets):
+                        copied.name, copied.identifier, copied.type = socket.name, socket.identifier, socket.type
+                    if hasattr(socket, "default_value"):
+                        copied.default_value = deepcopy(socket.default_value)
+                    copied.hide = socket.hide
+            node_map[node] = clone
+        for node, clone in node_map.items():
+            if node.parent is not None:
+                clone.parent = node_map.get(node.parent)
+        for link in self.links:
+            from_node, to_node = node_map[link.from_node], node_map[link.to_node]
+            from_socket = _matching_socket(link.from_socket, from_node.outputs)
+            to_socket = _matching_socket(link.to_socket, to_node.inputs)
+            tree.links.new(from_socket, to_socket)
+        return tree
+    
+    def _unlink(self):
+        for node in self.nodes:
+            if node._node_tree is not None:
+                node._node_tree._remove_user()
+        for obj in _data.objects:
+            for modifier in obj.modifiers:
+                if getattr(modifier, "_node_group", None) is self:
+                    modifier._node_group = None
+        for tree in _data.node_groups:
+            for node in tree.nodes:
+                if node._node_tree is self:
+                    node._node_tree = None
+                    for sockets in (node.inputs, node.outputs):
+                        for socket in list(sockets._cache.values()):
+                            for link in list(socket._links):
+                                tree.links.remove(link)
+                        sockets._reset()
+
+class GeometryNodeTree(NodeTree):
+    type = 'GEOMETRY'
+
+class ShaderNodeTree(NodeTree):
+    type = 'SHADER'
+
+def _new_node_tree(name, type='GeometryNodeTree'):
+    tree_class = {'GeometryNodeTree': GeometryNodeTree, 'ShaderNodeTree': ShaderNodeTree}.get(type, NodeTree)
+    return tree_class(name, type)
+
+def _matching_socket(socket, sockets):
+    """Socket of a copied node that corresponds to a socket of the original"""
+    if isinstance(sockets, _InterfaceSockets):
+        return sockets[socket.identifier]
+    return sockets[list(socket.node.outputs if socket.is_output else socket.node.inputs).index(socket)]
+
+# --- Объекты и модификаторы ---
+
+class Modifier:
+    def __init__(self, obj, name, type):
+        self.id_data = obj
+        self.name = name
+        self.type = type
+        self.show_viewport = True
+        self.show_render = True
+        self.show_in_editmode = False
+        self.show_expanded = True
+        self.is_active = False
+    
+    def __repr__(self):
+        return f"<Modifier '{self.name}' ({self.type})>"
+
+class NodesModifier(Modifier, _IDPropertyOwner):
+    """Geometry Nodes modifier: inputs are ID properties keyed by interface socket identifiers"""
+    
+    def __init__(self, obj, name):
+        super().__init__(obj, name, 'NODES')
+        self._node_group = None
+    
+    @property
+    def node_group(self):
+        return self._node_group
+    
+    @node_group.setter
+    def node_group(self, tree):
+        if tree is self._node_group:
+            return
+        if self._node_group is not None:
+            self._node_group._remove_user()
+        self._node_group = tree
+        if tree is None:
+            return
+        tree._add_user()
+        # Как и Blender, заполняем входы модификатора значениями по умолчанию
+        props = self._id_props()
+        for item in tree.interface.items_tree:
+            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and hasattr(item, "default_value"):
+                props.setdefault(item.identifier, deepcopy(item.default_value))
+
+class ObjectModifiers:
+    """obj.modifiers"""
+    
+    def __init__(self, obj):
+        self._obj = obj
+        self._list = []
+        self.active = None
+    
+    def new(self, name, type):
+        existing = {modifier.name for modifier in self._list}
+        unique_name = name
+        counter = 1
+        while unique_name in existing:
+            unique_name = f"{name}.{counter:03d}"
+            counter += 1
+        modifier = NodesModifier(self._obj, unique_name) if type == 'NODES' else Modifier(self._obj, unique_name, type)
+        self._list.append(modifier)
+        self.active = modifier
+        return modifier
+    
+    def remove(self, modifier):
+        self._list.remove(modifier)
+        if isinstance(modifier, NodesModifier):
+            modifier.node_group = None
+        if self.active is modifier:
+            self.active = self._list[-1] if self._list else None
+    
+    def clear(self):
+        for modifier in list(self._list):
+            self.remove(modifier)
+    
+    def move(self, from_index, to_index):
+        self._list.insert(to_index, self._list.pop(from_index))
+    
+    def find(self, name):
+        for i, modifier in enumerate(self._list):
+            if modifier.name == name:
+                return i
+        return -1
+    
+    def get(self, name, default=None):
+        index = self.find(name)
+        return self._list[index] if index >= 0 else default
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._list[key]
+        modifier = self.get(key)
+        if modifier is None:
+            raise KeyError(f"bpy_prop_collection[key]: key \"{key}\" not found")
+        return modifier
+    
+    def __contains__(self, key):
+        return self.find(key) >= 0 if isinstance(key, str) else key in self._list
+    
+    def __iter__(self):
+        return iter(list(self._list))
+    
+    def __len__(self):
+        return len(self._list)
+    
+    def keys(self):
+        return [modifier.name for modifier in self._list]
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.vertices = []
+        self.materials = []
+
+class Material(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.use_nodes = False
+        self.diffuse_color = (0.8, 0.8, 0.8, 1.0)
+
+class Object(ID):
+    def __init__(self, name, object_data=None):
+        super().__init__(name)
+        self._data = None
+        self.data = object_data
+        self.type = 'EMPTY' if object_data is None else {Mesh: 'MESH'}.get(type(object_data), 'MESH')
+        self.modifiers = ObjectModifiers(self)
+        self.location = Vector((0.0, 0.0, 0.0))
+        self.rotation_euler = Vector((0.0, 0.0, 0.0))
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.dimensions = Vector((0.0, 0.0, 0.0))
+        self.parent = None
+        self.hide_viewport = False
+        self.hide_render = False
+        self.empty_display_type = 'PLAIN_AXES'
+        self.empty_display_size = 1.0
+        self.show_in_front = False
+        self._selected = False
+    
+    @property
+    def data(self):
+        return self._data
+    
+    @data.setter
+    def data(self, value):
+        if self._data is not None:
+            self._data._remove_user()
+        self._data = value
+        if value is not None:
+            value._add_user()
+    
+    @property
+    def matrix_world(self):
+        """Composed from location, rotation_euler (XYZ) and scale; parents are ignored"""
+        cx, cy, cz = (math.cos(angle) for angle in self.rotation_euler)
+        sx, sy, sz = (math.sin(angle) for angle in self.rotation_euler)
+        rotation = [
+            [cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
+            [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
+            [-sy, sx * cy, cx * cy],
+        ]
+        rows = [[rotation[i][j] * self.scale[j] for j in range(3)] + [self.location[i]] for i in range(3)]
+        return Matrix(rows + [[0.0, 0.0, 0.0, 1.0]])
+    
+    @matrix_world.setter
+    def matrix_world(self, matrix):
+        # Вращение не раскладывается: сохраняются только перенос и масштаб
+        self.location = matrix.to_translation()
+        self.scale = matrix.to_scale()
+        self.rotation_euler = Vector((0.0, 0.0, 0.0))
+    
+    @property
+    def bound_box(self):
+        return [(0.0, 0.0, 0.0)] * 8
+    
+    def select_get(self, view_layer=None):
+        return self._selected
+    
+    def select_set(self, state, view_layer=None):
+        self._selected = bool(state)
+    
+    def visible_get(self, view_layer=None, viewport=None):
+        return not self.hide_viewport
+    
+    def _unlink(self):
+        self.modifiers.clear()
+        self.data = None
+        for collection in [_context.scene.collection] + list(_data.collections):
+            if self in collection.objects:
+                collection.objects.unlink(self)
+        if _context.view_layer.objects.active is self:
+            _context.view_layer.objects.active = None
+
+class CollectionObjects:
+    def __init__(self):
+        self._list = []
+    
+    def link(self, obj):
+        if obj in self._list:
+            raise RuntimeError(f"Object '{obj.name}' already in collection")
+        self._list.append(obj)
+        obj._add_user()
+    
+    def unlink(self, obj):
+        self._list.remove(obj)
+        obj._remove_user()
+    
+    def __contains__(self, obj):
+        return any(item is obj for item in self._list) if not isinstance(obj, str) else any(item.name == obj for item in self._list)
+    
+    def __iter__(self):
+        return iter(list(self._list))
+    
+    def __len__(self):
+        return len(self._list)
+
+class Collection(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.objects = CollectionObjects()
+        self.children = []
+    
+    @property
+    def all_objects(self):
+        return list(self.objects)
+
+class _PixelBuffer(list):
+    def foreach_set(self, values):
+        self[:] = list(values)
+    
+    def foreach_get(self, target):
+        target[:] = self
+
+class Image(ID):
+    def __init__(self, name, width, height, alpha=False, float_buffer=False, stereo3d=False, is_data=False, tiled=False):
+        super().__init__(name)
+        self.size = (width, height)
+        self.alpha_mode = 'STRAIGHT' if alpha else 'NONE'
+        self.is_float = float_buffer
+        self.pixels = _PixelBuffer([0.0, 0.0, 0.0, 1.0] * (width * height))
+        self.colorspace_settings = types.SimpleNamespace(name='sRGB', is_data=is_data)
+        self.source = 'GENERATED'
+        self.filepath = ""
+        self.packed_file = None
+    
+    def pack(self):
+        self.packed_file = types.SimpleNamespace(size=len(self.pixels) * 4)
+    
+    def update(self):
+        pass
+
+class Library(ID):
+    pass
+
+class _Libraries(IDCollection):
+    """bpy.data.libraries: loading yields nothing and writes are only recorded"""
+    
+    def __init__(self):
+        super().__init__()
+        self.written = []
+    
+    def load(self, filepath, link=False, relative=False, assets_only=False):
+        class _LoadContext:
+            def __enter__(self):
+                self.data_from = types.SimpleNamespace(node_groups=[], objects=[], materials=[], meshes=[])
+                self.data_to = types.SimpleNamespace(node_groups=[], objects=[], materials=[], meshes=[])
+                return self.data_from, self.data_to
+            
+            def __exit__(self, *args):
+                # Файлы не читаются: запрошенные блоки данных не найдены
+                for key, names in vars(self.data_to).items():
+                    setattr(self.data_to, key, [None] * len(names))
+                return False
+        return _LoadContext()
+    
+    def write(self, filepath, datablocks, path_remap='NONE', fake_user=False, compress=False):
+        self.written.append((filepath, set(datablocks), fake_user))
+
+# --- Сцена, контекст и depsgraph ---
+
+class Scene(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.collection = Collection("Scene Collection")
+        self.frame_current = 1
+        self.frame_start = 1
+        self.frame_end = 250
+        self.render = types.SimpleNamespace(fps=24, fps_base=1.0, resolution_x=1920, resolution_y=1080)
+        self.camera = None
+    
+    def frame_set(self, frame, subframe=0.0):
+        self.frame_current = int(frame)
+        _call_handlers("frame_change_post", self, _context.evaluated_depsgraph_get())
+
+class LayerObjects:
+    def __init__(self, scene):
+        self._scene = scene
+        self.active = None
+    
+    def __iter__(self):
+        return iter(self._scene.collection.objects)
+    
+    def __len__(self):
+        return len(self._scene.collection.objects)
+
+class ViewLayer:
+    def __init__(self, scene):
+        self.name = "ViewLayer"
+        self.objects = LayerObjects(scene)
+    
+    def update(self):
+        pass
+
+class DepsgraphUpdate:
+    def __init__(self, id, is_updated_geometry=False, is_updated_transform=False, is_updated_shading=False):
+        self.id = id
+        self.is_updated_geometry = is_updated_geometry
+        self.is_updated_transform = is_updated_transform
+        self.is_updated_shading = is_updated_shading
+
+class Depsgraph:
+    def __init__(self, updates=()):
+        self.updates = list(updates)
+        self.scene = _context.scene
+        self.view_layer = _context.view_layer
+    
+    @property
+    def objects(self):
+        return list(_context.scene.collection.objects)
+    
+    def id_eval_get(self, id):
+        return id
+    
+    def id_type_updated(self, id_type):
+        return bool(self.updates)
+    
+    def update(self):
+        pass
+
+class Context:
+    """bpy.context with a scene, view layer and active object"""
+    
+    def __init__(self):
+        self.scene = None
+        self.view_layer = None
+        self.window_manager = types.SimpleNamespace(windows=[])
+        self.area = None
+        self.region = None
+        self.space_data = None
+        self.mode = 'OBJECT'
+        self.preferences = types.SimpleNamespace(addons={})
+    
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+    
+    object = active_object
+    
+    @property
+    def collection(self):
+        return self.scene.collection
+    
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.collection.objects if obj.select_get()]
+    
+    def evaluated_depsgraph_get(self):
+        return Depsgraph()
+    
+    def temp_override(self, **kwargs):
+        context = self
+        class _Override:
+            def __enter__(self):
+                self._saved = {key: getattr(context, key, None) for key in kwargs}
+                for key, value in kwargs.items():
+                    if key in ("active_object", "object"):
+                        context.view_layer.objects.active = value
+                    else:
+                        setattr(context, key, value)
+                return context
+            
+            def __exit__(self, *args):
+                for key, value in self._saved.items():
+                    if key in ("active_object", "object"):
+                        context.view_layer.objects.active = value
+                    else:
+                        setattr(context, key, value)
+                return False
+        return _Override()
+
+class BlendData:
+    """bpy.data"""
+    
+    def __init__(self):
+        self._reset()
+    
+    def _reset(self):
+        self.node_groups = IDCollection(_new_node_tree)
+        self.objects = IDCollection(Object)
+        self.meshes = IDCollection(Mesh)
+        self.materials = IDCollection(Material)
+        self.collections = IDCollection(Collection)
+        self.images = IDCollection(Image)
+        self.scenes = IDCollection(Scene)
+        self.libraries = _Libraries()
+        self.filepath = ""
+        self.is_dirty = False
+        self.is_saved = False
+
+_data = BlendData()
+_context = Context()
+
+# --- bpy.props и регистрация классов ---
+
+class PropertyDefinition:
+    """Result of bpy.props.*Property(); works as an annotation and as an RNA property on bpy.types classes"""
+    
+    def __init__(self, kind, default, kwargs):
+        self.kind = kind
+        self.keywords = kwargs
+        self._default = kwargs.get("default", default)
+    
+    def make_default(self):
+        if self.kind == 'ENUM' and "default" not in self.keywords:
+            items = self.keywords.get("items")
+            if isinstance(items, (list, tuple)) and items:
+                return items[0][0]
+            return ""
+        return deepcopy(self._default)
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = instance.__dict__.setdefault("_rna_values", {})
+        if id(self) not in values:
+            values[id(self)] = self.make_default()
+        return values[id(self)]
+    
+    def __set__(self, instance, value):
+        instance.__dict__.setdefault("_rna_values", {})[id(self)] = value
+        update = self.keywords.get("update")
+        if update is not None:
+            update(instance, _context)
+
+def _property(kind, default):
+    def factory(**kwargs):
+        if kind in ('FLOAT_VECTOR', 'INT_VECTOR', 'BOOL_VECTOR') and "default" not in kwargs:
+            return PropertyDefinition(kind, (default,) * kwargs.get("size", 3), kwargs)
+        return PropertyDefinition(kind, default, kwargs)
+    factory.__name__ = f"{kind.title().replace('_', '')}Property"
+    return factory
+
+class bpy_struct:
+    """Base of the registrable bpy.types classes"""
+    
+    bl_rna = None
+    
+    def __init__(self):
+        for cls in reversed(type(self).__mro__):
+            for name, value in cls.__dict__.get("__annotations__", {}).items():
+                if isinstance(value, PropertyDefinition):
+                    setattr(self, name, value.make_default())
+
+class Operator(bpy_struct):
+    bl_idname = ""
+    bl_label = ""
+    bl_options = set()
+    
+    def __init__(self):
+        super().__init__()
+        self.reports = []
+        self.layout = None
+    
+    def report(self, type, message):
+        self.reports.append((set(type), message))
+
+class Panel(bpy_struct):
+    bl_label = ""
+    layout = None
+
+class Menu(bpy_struct):
+    bl_label = ""
+    layout = None
+
+class PropertyGroup(bpy_struct):
+    pass
+
+class UIList(bpy_struct):
+    pass
+
+class AddonPreferences(bpy_struct):
+    layout = None
+
+_registered_classes = []
+_operators = {}
+
+def register_class(cls):
+    if cls in _registered_classes:
+        raise ValueError(f"register_class(...): already registered as a subclass '{cls.__name__}'")
+    _registered_classes.append(cls)
+    if issubclass(cls, Operator) and cls.bl_idname:
+        _operators[cls.bl_idname] = cls
+
+def unregister_class(cls):
+    if cls not in _registered_classes:
+        raise RuntimeError(f"unregister_class(...): missing bl_rna attribute from '{cls.__name__}'")
+    _registered_classes.remove(cls)
+    if issubclass(cls, Operator):
+        _operators.pop(cls.bl_idname, None)
+
+def is_registered(cls):
+    return cls in _registered_classes
+
+# --- bpy.app: обработчики и таймеры ---
+
+HANDLER_NAMES = (
+    "depsgraph_update_pre", "depsgraph_update_post", "frame_change_pre", "frame_change_post",
+    "load_pre", "load_post", "save_pre", "save_post", "undo_pre", "undo_post", "redo_pre", "redo_post",
+    "render_pre", "render_post", "render_init", "render_complete", "render_cancel",
+)
+
+def persistent(func):
+    func._bpy_persistent = True
+    return func
+
+def _call_handlers(name, *args):
+    for handler in list(getattr(_handlers_module, name)):
+        handler(*args)
+
+class _Timers:
+    """bpy.app.timers; run_timers() fires the due callbacks"""
+    
+    def __init__(self):
+        self._timers = {}   # функция -> оставшийся интервал
+    
+    def register(self, function, first_interval=0.0, persistent=False):
+        self._timers[function] = first_interval
+    
+    def unregister(self, function):
+        if function not in self._timers:
+            raise ValueError("Error: function is not registered")
+        del self._timers[function]
+    
+    def is_registered(self, function):
+        return function in self._timers
+    
+    def run(self):
+        """Call every registered timer once; returns the number of calls"""
+        calls = 0
+        for function in list(self._timers):
+            if function not in self._timers:
+                continue
+            calls += 1
+            interval = function()
+            if interval is None:
+                self._timers.pop(function, None)
+            elif function in self._timers:
+                self._timers[function] = interval
+        return calls
+    
+    def clear(self):
+        self._timers.clear()
+
+_timers = _Timers()
+
+class _MessageBus:
+    """bpy.msgbus; publish_rna() notifies the subscribers of a key"""
+    
+    def __init__(self):
+        self._subscriptions = []   # (key, owner, args, notify)
+    
+    def subscribe_rna(self, key, owner, args, notify, options=frozenset()):
+        self._subscriptions.append((key, owner, tuple(args), notify))
+    
+    def clear_by_owner(self, owner):
+        self._subscriptions = [entry for entry in self._subscriptions if entry[1] is not owner]
+    
+    def publish_rna(self, key):
+        for subscribed_key, owner, args, notify in list(self._subscriptions):
+            if subscribed_key == key:
+                notify(*args)
+    
+    def clear(self):
+        self._subscriptions = []
+
+_msgbus = _MessageBus()
+
+# --- bpy.ops ---
+
+_ops_log = []
+
+def _move_modifier(modifier, offset):
+    obj = _context.active_object
+    index = obj.modifiers.find(modifier)
+    if index < 0:
+        raise RuntimeError(f"Modifier '{modifier}' not found")
+    target = index + offset
+    if 0 <= target < len(obj.modifiers):
+        obj.modifiers.move(index, target)
+    return {'FINISHED'}
+
+def _select_all(action='TOGGLE'):
+    select = action == 'SELECT' or (action == 'TOGGLE' and not _context.selected_objects)
+    for obj in _context.scene.collection.objects:
+        obj.select_set(select if action != 'INVERT' else not obj.select_get())
+    return {'FINISHED'}
+
+BUILTIN_OPERATORS = {
+    "object.modifier_move_up": lambda modifier="": _move_modifier(modifier, -1),
+    "object.modifier_move_down": lambda modifier="": _move_modifier(modifier, 1),
+    "object.modifier_move_to_index": lambda modifier="", index=0: (
+        _context.active_object.modifiers.move(_context.active_object.modifiers.find(modifier), index), {'FINISHED'})[1],
+    "object.select_all": _select_all,
+}
+
+class _OperatorCaller:
+    def __init__(self, idname):
+        self.idname = idname
+    
+    def __call__(self, *args, **kwargs):
+        _ops_log.append((self.idname, kwargs))
+        operator_class = _operators.get(self.idname)
+        if operator_class is not None:
+            poll = getattr(operator_class, "poll", None)
+            if poll is not None and not poll(_context):
+                raise RuntimeError(f"Operator bpy.ops.{self.idname}.poll() failed, context is incorrect")
+            operator = operator_class()
+            for key, value in kwargs.items():
+                setattr(operator, key, value)
+            return operator.execute(_context)
+        builtin = BUILTIN_OPERATORS.get(self.idname)
+        if builtin is not None:
+            return builtin(**kwargs)
+        return {'FINISHED'}
+    
+    def poll(self):
+        return True
+
+class _OperatorModule:
+    def __init__(self, name):
+        self._name = name
+    
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _OperatorCaller(f"{self._name}.{name}")
+
+class _OpsModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _OperatorModule(name)
+
+# --- Установка модулей ---
+
+class _TypesModule(types.ModuleType):
+    """bpy.types: known classes plus empty placeholder classes for any other name"""
+    
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = type(name, (bpy_struct,), {})
+        setattr(self, name, value)
+        return value
+
+_modules = {}
+_handlers_module = types.ModuleType("bpy.app.handlers")
+
+def _build_modules():
+    bpy = types.ModuleType("bpy")
+    bpy.IS_FAKE = True
+    bpy.data = _data
+    bpy.context = _context
+    
+    bpy_types = _TypesModule("bpy.types")
+    for cls in (bpy_struct, Operator, Panel, Menu, PropertyGroup, UIList, AddonPreferences, ID, Object, Mesh,
+                Material, Collection, Image, Library, Scene, NodeTree, GeometryNodeTree, ShaderNodeTree, Node,
+                NodeSocket, NodeLink, Modifier, NodesModifier, NodeTreeInterfaceSocket, NodeTreeInterfacePanel,
+                ViewLayer, Depsgraph, DepsgraphUpdate, Context, BlendData, CurveMapping):
+        setattr(bpy_types, cls.__name__, cls)
+    bpy_types.Header = type("Header", (bpy_struct,), {"layout": None})
+    
+    bpy_props = types.ModuleType("bpy.props")
+    for kind, default in (('BOOL', False), ('INT', 0), ('FLOAT', 0.0), ('STRING', ""), ('ENUM', ""),
+                          ('FLOAT_VECTOR', 0.0), ('INT_VECTOR', 0), ('BOOL_VECTOR', False),
+                          ('POINTER', None), ('COLLECTION', [])):
+        factory = _property(kind, default)
+        setattr(bpy_props, factory.__name__, factory)
+    
+    bpy_utils = types.ModuleType("bpy.utils")
+    bpy_utils.register_class = register_class
+    bpy_utils.unregister_class = unregister_class
+    bpy_utils.is_registered = is_registered
+    bpy_utils.user_resource = lambda resource_type, path="", create=False: os.path.join(os.path.expanduser("~"), path)
+    
+    _handlers_module.persistent = persistent
+    for name in HANDLER_NAMES:
+        setattr(_handlers_module, name, [])
+    
+    bpy_app = types.ModuleType("bpy.app")
+    bpy_app.version = VERSION
+    bpy_app.version_string = f"{VERSION[0]}.{VERSION[1]}.{VERSION[2]} (fake_bpy)"
+    bpy_app.background = True
+    bpy_app.binary_path = ""
+    bpy_app.debug = False
+    bpy_app.driver_namespace = {}
+    bpy_app.handlers = _handlers_module
+    bpy_app.timers = _timers
+    
+    bpy_path = types.ModuleType("bpy.path")
+    bpy_path.abspath = lambda path, start=None, library=None: os.path.abspath(path.lstrip("/")) if path.startswith("//") else path
+    bpy_path.basename = lambda path: os.path.basename(path.lstrip("/"))
+    bpy_path.clean_name = lambda name, replace="_": re.sub(r"[^A-Za-z0-9_]", replace, name)
+    
+    bpy.types = bpy_types
+    bpy.props = bpy_props
+    bpy.utils = bpy_utils
+    bpy.app = bpy_app
+    bpy.path = bpy_path
+    bpy.ops = _OpsModule("bpy.ops")
+    bpy.msgbus = _msgbus
+    
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Matrix = Matrix
+    mathutils.Euler = lambda angles=(0.0, 0.0, 0.0), order='XYZ': Vector(angles)
+    mathutils.Color = lambda rgb=(0.0, 0.0, 0.0): Vector(rgb)
+    
+    return {
+        "bpy": bpy,
+        "bpy.types": bpy_types,
+        "bpy.props": bpy_props,
+        "bpy.utils": bpy_utils,
+        "bpy.app": bpy_app,
+        "bpy.app.handlers": _handlers_module,
+        "bpy.path": bpy_path,
+        "bpy.ops": bpy.ops,
+        "mathutils": mathutils,
+    }
+
+def install():
+    """Register the fake bpy and mathutils modules in sys.modules and return bpy"""
+    if not _modules:
+        _modules.update(_build_modules())
+        reset()
+    sys.modules.update(_modules)
+    return _modules["bpy"]
+
+def reset():
+    """Remove all data, handlers, timers, subscriptions and registered classes; keep a fresh scene"""
+    _data._reset()
+    for name in HANDLER_NAMES:
+        # Списки очищаются на месте: модули аддона держат ссылки на них
+        getattr(_handlers_module, name)[:] = []
+    _timers.clear()
+    _msgbus.clear()
+    _registered_classes.clear()
+    _operators.clear()
+    _ops_log.clear()
+    scene = _data.scenes.new("Scene")
+    _context.scene = scene
+    _context.view_layer = ViewLayer(scene)
+
+# --- Помощники для тестов и профилирования ---
+
+def depsgraph_update(*ids, geometry=True, transform=False):
+    """Call the depsgraph_update_post handlers as if the given data-blocks changed"""
+    depsgraph = Depsgraph(DepsgraphUpdate(id, is_updated_geometry=geometry, is_updated_transform=transform) for id in ids)
+    _call_handlers("depsgraph_update_post", _context.scene, depsgraph)
+    return depsgraph
+
+def call_handlers(name, *args):
+    """Call a bpy.app.handlers list (undo_post, load_post, ...) with the current scene"""
+    _call_handlers(name, *(args or (_context.scene,)))
+
+def run_timers():
+    """Fire the registered bpy.app.timers once"""
+    return _timers.run()
+
+def new_object(name, with_mesh=True, active=True):
+    """Create an object linked to the scene, optionally made active"""
+    mesh = _data.meshes.new(name) if with_mesh else None
+    obj = _data.objects.new(name, mesh)
+    _context.scene.collection.objects.link(obj)
+    if active:
+        _context.view_layer.objects.active = obj
+    return obj
+
+def operator_calls():
+    """(idname, keyword arguments) of every bpy.ops call so far"""
+    return list(_ops_log)
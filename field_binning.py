@@ -0,0 +1,237 @@
+import bpy
+import math
+from collections import defaultdict
+from bpy.app.handlers import persistent
+from ..src.fields.GN_FieldShapes import get_field_shape, FIELD_SHAPE_GROUPS
+from .socket_schema import get_socket_schema
+
+# Формы с конечной областью влияния; линейное, радиальное и шумовое поля
+# действуют на всё пространство и никогда не отбрасываются
+BOUNDED_FIELD_SHAPES = {'SPHERE', 'BOX'}
+
+DEFAULT_CELL_SIZE = 2.0
+
+# Предел числа слоёв: каждый слой - отдельная ветка графа стека полей
+MAX_FIELD_SLABS = 32
+
+def get_field_gizmo(field_mod):
+    """Return the gizmo object driving a field modifier, or None"""
+    for socket in get_socket_schema(field_mod.node_group).inputs.values():
+        if socket.socket_type == 'NodeSocketObject':
+            return field_mod.get(socket.identifier)
+    return None
+
+def get_field_support(field_mod):
+    """
+    Возвращает область влияния поля как (центр, радиус) в мировых координатах.
+    
+    None означает неограниченную область (форма без границ или поле без гизмо).
+    """
+    shape = get_field_shape(field_mod.node_group)
+    gizmo = get_field_gizmo(field_mod)
+    if shape not in BOUNDED_FIELD_SHAPES or gizmo is None:
+        return None
+    matrix = gizmo.matrix_world
+    scale = matrix.to_scale()
+    if shape == 'SPHERE':
+        radius = abs(scale.x)
+    else:
+        # Описанная сфера вокруг куба с полуразмерами |scale|
+        radius = scale.length
+    return tuple(matrix.translation), radius
+
+class FieldBins:
+    """Uniform grid of field supports (gizmo centre + falloff radius) of one object"""
+    
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)   # ключ ячейки -> имена полей
+        self.supports = {}              # имя поля -> (центр, радиус) или None
+        self.field_cells = {}           # имя поля -> ключи занятых ячеек
+    
+    def _cell_keys(self, lo, hi):
+        ranges = [range(math.floor(lo[axis] / self.cell_size), math.floor(hi[axis] / self.cell_size) + 1)
+                  for axis in range(3)]
+        return [(x, y, z) for x in ranges[0] for y in ranges[1] for z in ranges[2]]
+    
+    def insert(self, field_name, support):
+        """Add or move a field; only the cells it leaves or enters change"""
+        self.remove(field_name)
+        self.supports[field_name] = support
+        if support is None:
+            return
+        center, radius = support
+        keys = self._cell_keys([c - radius for c in center], [c + radius for c in center])
+        for key in keys:
+            self.cells[key].add(field_name)
+        self.field_cells[field_name] = keys
+    
+    def remove(self, field_name):
+        for key in self.field_cells.pop(field_name, ()):
+            cell = self.cells.get(key)
+            if cell is not None:
+                cell.discard(field_name)
+                if not cell:
+                    del self.cells[key]
+        self.supports.pop(field_name, None)
+    
+    def slabs(self, max_slabs=MAX_FIELD_SLABS):
+        """
+        Разбивает сетку на слои вдоль оси с наибольшим разбросом занятых ячеек.
+        
+        Returns:
+            (ось, начало, толщина, [frozenset имён полей слоя]) или None, если
+            ограниченных полей нет. Слой i занимает
+            начало + i * толщина <= координата < начало + (i + 1) * толщина;
+            за пределами слоёв ограниченные поля не действуют.
+        """
+        if not self.cells:
+            return None
+        keys = list(self.cells)
+        spans = [(max(key[axis] for key in keys) - min(key[axis] for key in keys) + 1, axis) for axis in range(3)]
+        span, axis = max(spans)
+        first = min(key[axis] for key in keys)
+        cells_per_slab = math.ceil(span / max_slabs)
+        count = math.ceil(span / cells_per_slab)
+        
+        slab_fields = [set() for _ in range(count)]
+        for key, names in self.cells.items():
+            slab_fields[(key[axis] - first) // cells_per_slab] |= names
+        return (axis, first * self.cell_size, cells_per_slab * self.cell_size,
+                [frozenset(names) for names in slab_fields])
+
+class FieldBinIndex:
+    """
+    Сетки полей по объектам.
+    
+    Сетка строится один раз и обновляется точечно, когда двигается гизмо
+    поля; раскладка слоёв для клонеров объекта кэшируется, чтобы
+    перекомпилировать стек полей только при её изменении.
+    """
+    
+    def __init__(self):
+        self.bins = {}          # имя объекта -> FieldBins
+        self.gizmo_fields = {}  # имя гизмо -> {(имя объекта, имя поля)}
+        self.layouts = {}       # имя объекта -> последняя раскладка слоёв
+    
+    @staticmethod
+    def _field_mods(obj):
+        return [mod for mod in obj.modifiers
+                if mod.type == 'NODES' and mod.node_group and mod.node_group.name.startswith(tuple(FIELD_SHAPE_GROUPS))]
+    
+    def get(self, obj):
+        """Grid of an object, rebuilt when its set of field modifiers changes"""
+        field_mods = self._field_mods(obj)
+        bins = self.bins.get(obj.name)
+        if bins is None or set(bins.supports) != {mod.name for mod in field_mods}:
+            bins = self.rebuild(obj, field_mods)
+        return bins
+    
+    def rebuild(self, obj, field_mods=None):
+        """Rebuild the grid of an object from its field modifiers"""
+        if field_mods is None:
+            field_mods = self._field_mods(obj)
+        supports = {mod.name: get_field_support(mod) for mod in field_mods}
+        
+        # Размер ячейки по медианному диаметру, чтобы поле занимало несколько ячеек
+        radii = sorted(support[1] for support in supports.values() if support is not None)
+        cell_size = max(radii[len(radii) // 2] * 2.0, 0.01) if radii else DEFAULT_CELL_SIZE
+        bins = FieldBins(cell_size)
+        for name, support in supports.items():
+            bins.insert(name, support)
+        
+        for keys in self.gizmo_fields.values():
+            keys.difference_update({key for key in keys if key[0] == obj.name})
+        for mod in field_mods:
+            gizmo = get_field_gizmo(mod)
+            if gizmo is not None:
+                self.gizmo_fields.setdefault(gizmo.name, set()).add((obj.name, mod.name))
+        
+        self.bins[obj.name] = bins
+        return bins
+    
+    def invalidate(self, obj=None):
+        if obj is None:
+            self.bins.clear()
+            self.gizmo_fields.clear()
+            self.layouts.clear()
+        else:
+            self.bins.pop(obj.name, None)
+            self.layouts.pop(obj.name, None)
+    
+    def move_gizmo(self, gizmo):
+        """Update the fields driven by a moved gizmo; returns the names of affected objects"""
+        owners = set()
+        for object_name, field_name in self.gizmo_fields.get(gizmo.name, ()):
+            obj = bpy.data.objects.get(object_name)
+            bins = self.bins.get(object_name)
+            field_mod = obj.modifiers.get(field_name) if obj else None
+            if bins is None or field_mod is None:
+                continue
+            bins.insert(field_name, get_field_support(field_mod))
+            owners.add(object_name)
+        return owners
+    
+    def field_slabs(self, obj):
+        """
+        Slab layout of the object's bounded fields (see FieldBins.slabs).
+        
+        Инстанс выбирает свой слой по собственной позиции внутри графа
+        стека полей, поэтому границы клонера здесь не нужны.
+        """
+        layout = self.get(obj).slabs()
+        self.layouts[obj.name] = layout
+        return layout
+    
+    def slabs_changed(self, obj):
+        """Check whether the slab layout differs from the last query"""
+        if obj.name not in self.layouts:
+            return True
+        previous = self.layouts[obj.name]
+        return self.field_slabs(obj) != previous
+
+# Global field grid
+field_bins = FieldBinIndex()
+
+@persistent
+def _update_field_bins(scene, depsgraph):
+    # Перекомпилируем стеки полей только если гизмо сдвинулось настолько,
+    # что изменилась раскладка слоёв
+    owners = set()
+    for update in depsgraph.updates:
+        if not update.is_updated_transform or not isinstance(update.id, bpy.types.Object):
+            continue
+        obj = update.id.original
+        owners |= field_bins.move_gizmo(obj)
+    
+    if not owners:
+        return
+    from .update_scheduler import update_scheduler
+    for object_name in owners:
+        obj = bpy.data.objects.get(object_name)
+        if obj is not None and field_bins.slabs_changed(obj):
+            update_scheduler.mark_object(obj)
+
+@persistent
+def _clear_field_bins(*args):
+    field_bins.invalidate()
+
+_CLEAR_HANDLERS = (
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+    bpy.app.handlers.load_post,
+)
+
+def register():
+    if _update_field_bins not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_update_field_bins)
+    for handlers in _CLEAR_HANDLERS:
+        if _clear_field_bins not in handlers:
+            handlers.append(_clear_field_bins)
+
+def unregister():
+    if _update_field_bins in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_update_field_bins)
+    for handlers in _CLEAR_HANDLERS:
+        if _clear_field_bins in handlers:
+            handlers.remove(_clear_field_bins)
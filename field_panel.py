@@ -3,6 +3,10 @@
 import bpy
 from bpy.types import Panel, Operator
 from ..fields.GN_SphereField import spherefield_node_group
+from ..fields.GN_FieldShapes import FIELD_SHAPE_GROUPS
+from ...utils.node_utils import create_independent_node_group
+from ...utils.socket_schema import get_socket_schema
+from ...utils.profiling import instrument_operator
 from bpy.props import StringProperty, EnumProperty, FloatProperty
 
 class FIELD_OT_create_field(Operator):
@@ -10,9 +14,17 @@ class FIELD_OT_create_field(Operator):
     bl_idname = "object.create_field"
     bl_label = "Create Field"
     bl_options = {'REGISTER', 'UNDO'}
+    
+    field_group: StringProperty(default="SphereField")
 
     def execute(self, context):
-        print("Создание сферического поля...")
+        if self.field_group not in FIELD_SHAPE_GROUPS:
+            self.report({'ERROR'}, f"Неизвестный тип поля: {self.field_group}")
+            return {'CANCELLED'}
+        shape, creator_func, label, display_type = FIELD_SHAPE_GROUPS[self.field_group]
+        if creator_func is None:
+            creator_func = spherefield_node_group
+        print(f"Создание поля {label}...")
         
         if not context.active_object:
             self.report({'ERROR'}, "Пожалуйста, выберите объект")
@@ -23,32 +35,39 @@ class FIELD_OT_create_field(Operator):
         
         try:
             # Создаем уникальное имя для модификатора
-            modifier_name = "Sphere Field"
+            modifier_name = label
             counter = 1
             while modifier_name in obj.modifiers:
-                modifier_name = f"Sphere Field.{counter:03d}"
+                modifier_name = f"{label}.{counter:03d}"
                 counter += 1
             
             # Добавляем модификатор геометрических нодов
             mod = obj.modifiers.new(name=modifier_name, type='NODES')
             
-            # Используем готовую функцию вместо создания своей группы нодов
-            node_group = spherefield_node_group()
+            # Копия из кэшированного шаблона (библиотека или Python билдер)
+            node_group = create_independent_node_group(creator_func, self.field_group)
+            if node_group is None:
+                self.report({'ERROR'}, "Не удалось создать нод-группу поля")
+                obj.modifiers.remove(mod)
+                return {'CANCELLED'}
             
             # Устанавливаем группу нодов в модификатор
             mod.node_group = node_group
             
             # Создаем пустой объект для визуализации поля
             field_empty = bpy.data.objects.new(f"{modifier_name}_Gizmo", None)
-            field_empty.empty_display_type = 'SPHERE'
+            field_empty.empty_display_type = display_type
             field_empty.empty_display_size = 1.0
             # Ставим гизмо на позицию объекта
             field_empty.location = obj.location.copy()
             bpy.context.collection.objects.link(field_empty)
             
-            # Привязываем пустой объект к полю
+            # Привязываем пустой объект к полю (вход Sphere у сферы, Gizmo у остальных)
             try:
-                mod["Sphere"] = field_empty
+                for socket in get_socket_schema(node_group).inputs.values():
+                    if socket.socket_type == 'NodeSocketObject':
+                        mod[socket.identifier] = field_empty
+                        break
                 print(f"Создан пустой объект {field_empty.name} для визуализации поля")
                 
                 # Настраиваем размер гизмо в зависимости от параметров поля
@@ -60,15 +79,17 @@ class FIELD_OT_create_field(Operator):
             except Exception as e:
                 print(f"Ошибка привязки пустого объекта к полю: {e}")
             
-            # Устанавливаем начальные параметры поля
-            try:
-                mod["Falloff"] = 0.5
-                mod["Inner Strength"] = 1.0
-                mod["Outer Strength"] = 0.0
-                mod["Mode"] = 'S-Curve'
-                mod["Strength"] = 0.3
-            except Exception as e:
-                print(f"Ошибка установки начальных параметров: {e}")
+            # Устанавливаем начальные параметры сферического поля
+            # (остальные формы используют значения по умолчанию из интерфейса)
+            if shape == 'SPHERE':
+                try:
+                    mod["Falloff"] = 0.5
+                    mod["Inner Strength"] = 1.0
+                    mod["Outer Strength"] = 0.0
+                    mod["Mode"] = 'S-Curve'
+                    mod["Strength"] = 0.3
+                except Exception as e:
+                    print(f"Ошибка установки начальных параметров: {e}")
             
             # Перемещаем модификатор поля перед эффекторами
             # для правильного порядка выполнения
@@ -241,7 +262,8 @@ class FIELD_PT_main_panel(Panel):
         # Кнопка создания поля
         create_box = layout.box()
         create_box.label(text="Create Field", icon='ADD')
-        create_box.operator("object.create_field", text="Create Sphere Field", icon='OUTLINER_OB_FORCE_FIELD')
+        for group_name, (shape, creator_func, label, display_type) in FIELD_SHAPE_GROUPS.items():
+            create_box.operator("object.create_field", text=f"Create {label}", icon='OUTLINER_OB_FORCE_FIELD').field_group = group_name
         
         # Отобразим активные поля, если есть
         obj = context.active_object
@@ -249,7 +271,8 @@ class FIELD_PT_main_panel(Panel):
             layout.label(text="Select an object to see active fields")
             return
             
-        fields = [m for m in obj.modifiers if m.type == 'NODES' and m.node_group and "SphereField" in m.node_group.name]
+        fields = [m for m in obj.modifiers if m.type == 'NODES' and m.node_group
+                  and m.node_group.name.startswith(tuple(FIELD_SHAPE_GROUPS))]
         if not fields:
             layout.label(text="No active fields on this object")
             return
@@ -336,10 +359,9 @@ class FIELD_PT_main_panel(Panel):
             
             # Отображаем Inner Strength более заметно
             try:
-                for socket in mod.node_group.interface.items_tree:
-                    if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT' and socket.name == "Inner Strength":
-                        strength_row.prop(mod, f'["{socket.identifier}"]', text="")
-                        break
+                socket = get_socket_schema(mod.node_group).inputs.get("Inner Strength")
+                if socket is not None:
+                    strength_row.prop(mod, f'["{socket.identifier}"]', text="")
             except Exception as e:
                 print(f"Ошибка отображения силы поля: {e}")
                 strength_row.label(text="Сила недоступна")
@@ -360,29 +382,29 @@ class FIELD_PT_main_panel(Panel):
                 # Улучшенная организация параметров
                 param_order = ["Falloff", "Outer Strength", "Mode", "Strength"]
                 
+                schema = get_socket_schema(mod.node_group)
                 for socket_name in param_order:
-                    found = False
-                    for socket in mod.node_group.interface.items_tree:
-                        if socket.item_type == 'SOCKET' and socket.in_out == 'INPUT' and socket.name == socket_name:
-                            found = True
-                            try:
-                                row = params_box.row()
-                                # Добавляем понятные подписи
-                                if socket_name == "Falloff":
-                                    display_name = "Плавность спадания"
-                                elif socket_name == "Outer Strength":
-                                    display_name = "Сила снаружи"
-                                elif socket_name == "Mode":
-                                    display_name = "Режим интерполяции"
-                                elif socket_name == "Strength":
-                                    display_name = "Мощность интерполяции"
-                                else:
-                                    display_name = socket_name
-                                
-                                row.prop(mod, f'["{socket.identifier}"]', text=display_name)
-                            except Exception as e:
-                                print(f"Ошибка отображения параметра {socket_name}: {e}")
-                                params_box.label(text=f"Ошибка параметра {socket_name}")
+                    socket = schema.inputs.get(socket_name)
+                    found = socket is not None
+                    if found:
+                        try:
+                            row = params_box.row()
+                            # Добавляем понятные подписи
+                            if socket_name == "Falloff":
+                                display_name = "Плавность спадания"
+                            elif socket_name == "Outer Strength":
+                                display_name = "Сила снаружи"
+                            elif socket_name == "Mode":
+                                display_name = "Режим интерполяции"
+                            elif socket_name == "Strength":
+                                display_name = "Мощность интерполяции"
+                            else:
+                                display_name = socket_name
+                            
+                            row.prop(mod, f'["{socket.identifier}"]', text=display_name)
+                        except Exception as e:
+                            print(f"Ошибка отображения параметра {socket_name}: {e}")
+                            params_box.label(text=f"Ошибка параметра {socket_name}")
                     
                     if not found and socket_name != "Mode" and socket_name != "Strength":
                         row = params_box.row()
@@ -405,7 +427,7 @@ def register():
     print("Registering Field Panel classes...")
     try:
         for cls in classes:
-            bpy.utils.register_class(cls)
+            bpy.utils.register_class(instrument_operator(cls))
         print(f"Field Panel registered {len(classes)} classes")
     except Exception as e:
         print(f"Error registering field panel: {e}")
@@ -0,0 +1,86 @@
+import os
+import bpy
+
+# Библиотека заранее собранных нод-групп, поставляемая вместе с аддоном.
+# Загрузка сериализованных datablock'ов из .blend намного быстрее,
+# чем ~150 RNA вызовов на каждую группу в Python билдерах.
+LIBRARY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+LIBRARY_FILENAME = "advanced_cloners_nodes.blend"
+LIBRARY_VERSION_KEY = "library_version"
+
+def get_library_path():
+    """Return the absolute path of the bundled node group library"""
+    return os.path.join(LIBRARY_DIR, LIBRARY_FILENAME)
+
+def load_node_group_from_library(group_name, version):
+    """Append a prebuilt node group from the bundled library.
+    
+    Returns None if the library is missing, does not contain the group
+    or was written by a different library version.
+    """
+    library_path = get_library_path()
+    if not os.path.isfile(library_path):
+        return None
+    
+    try:
+        with bpy.data.libraries.load(library_path, link=False) as (data_from, data_to):
+            if group_name not in data_from.node_groups:
+                return None
+            data_to.node_groups = [group_name]
+    except Exception as e:
+        print(f"Failed to load node library {library_path}: {e}")
+        return None
+    
+    if not data_to.node_groups or data_to.node_groups[0] is None:
+        return None
+    node_group = data_to.node_groups[0]
+    
+    # Устаревшая библиотека - используем Python билдер
+    if node_group.get(LIBRARY_VERSION_KEY) != version:
+        print(f"Node library group '{group_name}' is outdated, rebuilding in Python")
+        bpy.data.node_groups.remove(node_group, do_unlink=True)
+        return None
+    
+    del node_group[LIBRARY_VERSION_KEY]
+    return node_group
+
+def write_node_library(creators, version, filepath=None):
+    """Regenerate the node group library from the Python builders.
+    
+    Args:
+        creators: Mapping of node group name to builder function
+        version: Version stamped on every written node group
+        filepath: Target .blend file, defaults to the bundled library path
+    """
+    if filepath is None:
+        filepath = get_library_path()
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    
+    node_groups = set()
+    renamed = {}
+    try:
+        for group_name, creator_func in creators.items():
+            node_group = creator_func()
+            if node_group is None:
+                print(f"Builder for '{group_name}' returned nothing, skipping")
+                continue
+            # Имя в библиотеке должно быть точным, временно освобождаем его
+            existing = bpy.data.node_groups.get(group_name)
+            if existing is not None and existing != node_group:
+                existing.name = f"{group_name}.regenerating"
+                renamed[existing] = group_name
+            node_group.name = group_name
+            node_group[LIBRARY_VERSION_KEY] = version
+            node_groups.add(node_group)
+        
+        bpy.data.libraries.write(filepath, node_groups, fake_user=True)
+        print(f"Node library written: {filepath} ({len(node_groups)} node groups)")
+    finally:
+        # Временные группы не нужны в текущем файле
+        for node_group in node_groups:
+            if node_group.users == 0:
+                bpy.data.node_groups.remove(node_group, do_unlink=True)
+        for node_group, group_name in renamed.items():
+            node_group.name = group_name
+    
+    return filepath
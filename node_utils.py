@@ -1,5 +1,6 @@
 import bpy
 import mathutils
+from .node_library import load_node_group_from_library
 
 def create_unique_name(base_name, existing_collection, counter_format="{}.{:03d}"):
     """Create a unique name in a collection by adding an incremental suffix if needed"""
@@ -44,37 +45,655 @@ def add_effector_sockets(node_group):
         "scale": scale_influence
     }
 
+def add_effector_field_outputs(node_group):
+    """Add the Translation/Rotation/Scale outputs of a field-only effector"""
+    node_group.interface.new_socket(name="Translation", in_out='OUTPUT', socket_type='NodeSocketVector')
+    rotation_output = node_group.interface.new_socket(name="Rotation", in_out='OUTPUT', socket_type='NodeSocketVector')
+    rotation_output.subtype = 'EULER'
+    node_group.interface.new_socket(name="Scale", in_out='OUTPUT', socket_type='NodeSocketVector')
+
+def connect_effector_field_outputs(node_group, group_input, group_output, offsets):
+    """Gate the offsets with Enable and connect them to the field outputs"""
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    # Disabled effector: zero translation/rotation and unit scale
+    for key, output_name, neutral in (
+        ("translation", "Translation", (0.0, 0.0, 0.0)),
+        ("rotation", "Rotation", (0.0, 0.0, 0.0)),
+        ("scale", "Scale", (1.0, 1.0, 1.0)),
+    ):
+        enable_switch = nodes.new('GeometryNodeSwitch')
+        enable_switch.input_type = 'VECTOR'
+        enable_switch.inputs['False'].default_value = neutral
+        links.new(group_input.outputs['Enable'], enable_switch.inputs[0])  # Switch
+        links.new(offsets[key], enable_switch.inputs['True'])
+        links.new(enable_switch.outputs['Output'], group_output.inputs[output_name])
+
+# Режимы отображения клонов во viewport (полная геометрия или прокси)
+VIEWPORT_DISPLAY_MODES = ("Geometry", "Bounds", "Points")
+DEFAULT_VIEWPORT_BUDGET = 10000
+
+def add_viewport_budget_inputs(node_group):
+    """Add the Viewport Budget / Viewport Display sockets to a cloner interface"""
+    budget_input = node_group.interface.new_socket(name="Viewport Budget", in_out='INPUT', socket_type='NodeSocketInt')
+    budget_input.default_value = DEFAULT_VIEWPORT_BUDGET
+    budget_input.min_value = 0  # 0 = без ограничения
+    budget_input.description = "Maximum number of clones shown in the viewport (0 = no limit). Render always uses the full count"
+    
+    display_input = node_group.interface.new_socket(name="Viewport Display", in_out='INPUT', socket_type='NodeSocketMenu')
+    display_input.description = "Show the real geometry, bounding boxes or points for clones in the viewport"
+
+def build_viewport_budget(node_group, group_input, points_socket, component='MESH'):
+    """
+    Ограничивает количество клонов во viewport и подменяет геометрию инстансов на прокси.
+    
+    Точки прореживаются с шагом ceil(count / budget); исходный индекс сохраняется
+    в атрибут "id", поэтому случайные значения (через узел ID) совпадают с рендером.
+    Обе ветки подключены через Switch от Is Viewport, поэтому при рендере
+    прореживание и прокси не вычисляются.
+    
+    Returns:
+        dict с сокетами 'points' (точки для инстансирования) и 'instance' (геометрия инстанса)
+    """
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    is_viewport = nodes.new('GeometryNodeIsViewport')
+    is_viewport.name = "Is Viewport"
+    
+    # --- Прореживание точек ---
+    domain_size = nodes.new('GeometryNodeAttributeDomainSize')
+    domain_size.component = component
+    links.new(points_socket, domain_size.inputs['Geometry'])
+    
+    # Шаг = max(ceil(count / budget), 1); деление на 0 даёт 0, т.е. budget 0 = без ограничения
+    stride_divide = nodes.new('ShaderNodeMath')
+    stride_divide.operation = 'DIVIDE'
+    links.new(domain_size.outputs['Point Count'], stride_divide.inputs[0])
+    links.new(group_input.outputs['Viewport Budget'], stride_divide.inputs[1])
+    
+    stride_ceil = nodes.new('ShaderNodeMath')
+    stride_ceil.operation = 'CEIL'
+    links.new(stride_divide.outputs['Value'], stride_ceil.inputs[0])
+    
+    stride = nodes.new('ShaderNodeMath')
+    stride.operation = 'MAXIMUM'
+    stride.inputs[1].default_value = 1.0
+    links.new(stride_ceil.outputs['Value'], stride.inputs[0])
+    
+    point_index = nodes.new('GeometryNodeInputIndex')
+    
+    # Сохраняем исходный индекс до удаления точек
+    # (узел ID возвращает индекс, если атрибут "id" ещё не записан, например отсечением)
+    point_id = nodes.new('GeometryNodeInputID')
+    store_id = nodes.new('GeometryNodeStoreNamedAttribute')
+    store_id.name = "Store Clone ID"
+    store_id.data_type = 'INT'
+    store_id.domain = 'POINT'
+    store_id.inputs['Name'].default_value = "id"
+    links.new(points_socket, store_id.inputs['Geometry'])
+    links.new(point_id.outputs['ID'], store_id.inputs['Value'])
+    
+    stride_modulo = nodes.new('ShaderNodeMath')
+    stride_modulo.operation = 'FLOORED_MODULO'
+    links.new(point_index.outputs['Index'], stride_modulo.inputs[0])
+    links.new(stride.outputs['Value'], stride_modulo.inputs[1])
+    
+    skip_point = nodes.new('FunctionNodeCompare')
+    skip_point.data_type = 'FLOAT'
+    skip_point.operation = 'NOT_EQUAL'
+    skip_point.inputs[1].default_value = 0.0
+    links.new(stride_modulo.outputs['Value'], skip_point.inputs[0])
+    
+    decimate = nodes.new('GeometryNodeDeleteGeometry')
+    decimate.name = "Viewport Decimate"
+    decimate.domain = 'POINT'
+    links.new(store_id.outputs['Geometry'], decimate.inputs['Geometry'])
+    links.new(skip_point.outputs['Result'], decimate.inputs['Selection'])
+    
+    points_switch = nodes.new('GeometryNodeSwitch')
+    points_switch.name = "Viewport Points"
+    points_switch.input_type = 'GEOMETRY'
+    links.new(is_viewport.outputs[0], points_switch.inputs['Switch'])
+    links.new(points_socket, points_switch.inputs[False])
+    links.new(decimate.outputs['Geometry'], points_switch.inputs[True])
+    
+    # --- Прокси геометрия инстансов ---
+    bounds = nodes.new('GeometryNodeBoundBox')
+    links.new(group_input.outputs['Geometry'], bounds.inputs['Geometry'])
+    
+    proxy_point = nodes.new('GeometryNodePoints')
+    proxy_point.inputs['Count'].default_value = 1
+    proxy_point.inputs['Radius'].default_value = 0.05
+    
+    display_menu = nodes.new('GeometryNodeMenuSwitch')
+    display_menu.name = "Viewport Display"
+    display_menu.data_type = 'GEOMETRY'
+    display_menu.enum_items.clear()
+    for mode in VIEWPORT_DISPLAY_MODES:
+        display_menu.enum_items.new(mode)
+    links.new(group_input.outputs['Viewport Display'], display_menu.inputs[0])
+    links.new(group_input.outputs['Geometry'], display_menu.inputs[1])
+    links.new(bounds.outputs['Bounding Box'], display_menu.inputs[2])
+    links.new(proxy_point.outputs[0], display_menu.inputs[3])
+    
+    instance_switch = nodes.new('GeometryNodeSwitch')
+    instance_switch.name = "Viewport Instance"
+    instance_switch.input_type = 'GEOMETRY'
+    links.new(is_viewport.outputs[0], instance_switch.inputs['Switch'])
+    links.new(group_input.outputs['Geometry'], instance_switch.inputs[False])
+    links.new(display_menu.outputs[0], instance_switch.inputs[True])
+    
+    return {
+        "points": points_switch.outputs['Output'],
+        "instance": instance_switch.outputs['Output'],
+    }
+
+def add_effector_field_inputs(node_group):
+    """Add the Field weight inputs; a linked field group drives Field per instance inside the cloner"""
+    field_input = node_group.interface.new_socket(name="Field", in_out='INPUT', socket_type='NodeSocketFloat')
+    field_input.default_value = 1.0
+    field_input.min_value = 0.0
+    field_input.max_value = 1.0
+    field_input.subtype = 'FACTOR'
+    
+    use_field_input = node_group.interface.new_socket(name="Use Field", in_out='INPUT', socket_type='NodeSocketBool')
+    use_field_input.default_value = False
+
+def apply_effector_field_weight(node_group, group_input, offsets):
+    """Scale the effector offsets by the per-instance field weight (1 when Use Field is off)"""
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    weight = nodes.new('GeometryNodeSwitch')
+    weight.input_type = 'FLOAT'
+    weight.inputs['False'].default_value = 1.0
+    links.new(group_input.outputs['Use Field'], weight.inputs[0])  # Switch
+    links.new(group_input.outputs['Field'], weight.inputs['True'])
+    
+    weighted = {}
+    for key in ("translation", "rotation"):
+        weighted_offset = nodes.new('ShaderNodeVectorMath')
+        weighted_offset.operation = 'SCALE'
+        links.new(offsets[key], weighted_offset.inputs[0])
+        links.new(weight.outputs['Output'], weighted_offset.inputs['Scale'])
+        weighted[key] = weighted_offset.outputs['Vector']
+    
+    # Масштаб интерполируется от 1: 1 + (scale - 1) * weight
+    scale_delta = nodes.new('ShaderNodeVectorMath')
+    scale_delta.operation = 'SUBTRACT'
+    links.new(offsets["scale"], scale_delta.inputs[0])
+    scale_delta.inputs[1].default_value = (1.0, 1.0, 1.0)
+    
+    weighted_scale = nodes.new('ShaderNodeVectorMath')
+    weighted_scale.operation = 'MULTIPLY_ADD'
+    links.new(scale_delta.outputs['Vector'], weighted_scale.inputs[0])
+    links.new(weight.outputs['Output'], weighted_scale.inputs[1])
+    weighted_scale.inputs[2].default_value = (1.0, 1.0, 1.0)
+    weighted["scale"] = weighted_scale.outputs['Vector']
+    
+    return weighted
+
+# Шаг кодирования координаты решётки: степень двойки больше лимита клонов по оси
+STABLE_ID_STRIDE = 1024
+
+# Первая версия с узлом Integer Math (FunctionNodeIntegerMath)
+INTEGER_MATH_VERSION = (4, 3, 0)
+
+def build_stable_id(node_group, points_socket, coordinate=None, component_domain='POINT'):
+    """
+    Записывает стабильный целочисленный атрибут "id" для каждого клона.
+    
+    Для решёток id — код координаты ячейки x + 1024 * (y + 1024 * z), а не
+    линейный индекс, поэтому изменение Count X не перемешивает случайные
+    значения и не сбрасывает кэши, привязанные к клонам. Код однозначен:
+    у разных ячеек разные id. Без координаты используется индекс: у клонов
+    вдоль одной оси он и так не меняется при изменении количества.
+    
+    Код считается узлами Integer Math; в Blender без них (до 4.3) — float
+    Math, который точен только до 2^24, то есть для слоёв z < 16.
+    
+    Args:
+        coordinate: кортеж из трёх float-сокетов (x, y, z) или None
+    
+    Returns:
+        Сокет геометрии с атрибутом "id"
+    """
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    store_id = nodes.new('GeometryNodeStoreNamedAttribute')
+    store_id.name = "Store Stable ID"
+    store_id.data_type = 'INT'
+    store_id.domain = component_domain
+    store_id.inputs['Name'].default_value = "id"
+    links.new(points_socket, store_id.inputs['Geometry'])
+    
+    if coordinate is None:
+        point_index = nodes.new('GeometryNodeInputIndex')
+        links.new(point_index.outputs['Index'], store_id.inputs['Value'])
+        return store_id.outputs['Geometry']
+    
+    x, y, z = coordinate
+    math_node_type = 'FunctionNodeIntegerMath' if bpy.app.version >= INTEGER_MATH_VERSION else 'ShaderNodeMath'
+    
+    # y + stride * z
+    layer_key = nodes.new(math_node_type)
+    layer_key.operation = 'MULTIPLY_ADD'
+    links.new(z, layer_key.inputs[0])
+    layer_key.inputs[1].default_value = STABLE_ID_STRIDE
+    links.new(y, layer_key.inputs[2])
+    
+    # x + stride * (y + stride * z)
+    cell_key = nodes.new(math_node_type)
+    cell_key.name = "Stable ID Key"
+    cell_key.operation = 'MULTIPLY_ADD'
+    links.new(layer_key.outputs[0], cell_key.inputs[0])
+    cell_key.inputs[1].default_value = STABLE_ID_STRIDE
+    links.new(x, cell_key.inputs[2])
+    links.new(cell_key.outputs[0], store_id.inputs['Value'])
+    
+    return store_id.outputs['Geometry']
+
+def build_clone_position(node_group, group_input):
+    """Return the point position field with the cloner's Global Rotation/Position applied"""
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    position = nodes.new('GeometryNodeInputPosition')
+    global_rotate = nodes.new('ShaderNodeVectorRotate')
+    global_rotate.rotation_type = 'EULER_XYZ'
+    links.new(position.outputs['Position'], global_rotate.inputs['Vector'])
+    links.new(group_input.outputs['Global Rotation'], global_rotate.inputs['Rotation'])
+    global_position = nodes.new('ShaderNodeVectorMath')
+    global_position.operation = 'ADD'
+    links.new(global_rotate.outputs['Vector'], global_position.inputs[0])
+    links.new(group_input.outputs['Global Position'], global_position.inputs[1])
+    return global_position.outputs['Vector']
+
+def add_lod_inputs(node_group):
+    """Add the distance LOD sockets to a cloner interface"""
+    lod_input = node_group.interface.new_socket(name="LOD by Distance", in_out='INPUT', socket_type='NodeSocketBool')
+    lod_input.default_value = False
+    lod_input.description = "Pick collection variants by distance to the active camera (ordered from most to least detailed)"
+    
+    lod_distance_input = node_group.interface.new_socket(name="LOD Distance", in_out='INPUT', socket_type='NodeSocketFloat')
+    lod_distance_input.default_value = 10.0
+    lod_distance_input.min_value = 0.0
+    lod_distance_input.subtype = 'DISTANCE'
+    lod_distance_input.description = "Camera distance covered by each LOD level"
+    
+    lod_levels_input = node_group.interface.new_socket(name="LOD Levels", in_out='INPUT', socket_type='NodeSocketInt')
+    lod_levels_input.default_value = 3
+    lod_levels_input.min_value = 1
+    lod_levels_input.max_value = 32
+    lod_levels_input.description = "Number of detail variants in the instanced collection"
+
+def build_instance_picking(node_group, group_input, pick_node, random_index_socket):
+    """
+    Настраивает узел Instance on Points для выбора элемента коллекции:
+    случайно (Pick Random Instance) или по расстоянию до активной камеры (LOD by Distance).
+    
+    LOD уровень = min(floor(расстояние / LOD Distance), LOD Levels - 1).
+    
+    Returns:
+        Сокет Boolean, включающий режим выбора элемента коллекции
+    """
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    pick_node.inputs['Pick Instance'].default_value = True
+    
+    # Активная камера относительно объекта клонера
+    active_camera = nodes.new('GeometryNodeInputActiveCamera')
+    camera_info = nodes.new('GeometryNodeObjectInfo')
+    camera_info.name = "LOD Camera Info"
+    camera_info.transform_space = 'RELATIVE'
+    links.new(active_camera.outputs[0], camera_info.inputs['Object'])
+    
+    camera_distance = nodes.new('ShaderNodeVectorMath')
+    camera_distance.operation = 'DISTANCE'
+    links.new(build_clone_position(node_group, group_input), camera_distance.inputs[0])
+    links.new(camera_info.outputs['Location'], camera_distance.inputs[1])
+    
+    lod_step = nodes.new('ShaderNodeMath')
+    lod_step.operation = 'DIVIDE'
+    links.new(camera_distance.outputs['Value'], lod_step.inputs[0])
+    links.new(group_input.outputs['LOD Distance'], lod_step.inputs[1])
+    
+    lod_floor = nodes.new('ShaderNodeMath')
+    lod_floor.operation = 'FLOOR'
+    links.new(lod_step.outputs['Value'], lod_floor.inputs[0])
+    
+    last_level = nodes.new('ShaderNodeMath')
+    last_level.operation = 'SUBTRACT'
+    last_level.inputs[1].default_value = 1.0
+    links.new(group_input.outputs['LOD Levels'], last_level.inputs[0])
+    
+    lod_level = nodes.new('ShaderNodeMath')
+    lod_level.name = "LOD Level"
+    lod_level.operation = 'MINIMUM'
+    links.new(lod_floor.outputs['Value'], lod_level.inputs[0])
+    links.new(last_level.outputs['Value'], lod_level.inputs[1])
+    
+    index_switch = nodes.new('GeometryNodeSwitch')
+    index_switch.name = "Instance Index Mode"
+    index_switch.input_type = 'INT'
+    links.new(group_input.outputs['LOD by Distance'], index_switch.inputs['Switch'])
+    links.new(random_index_socket, index_switch.inputs[False])
+    links.new(lod_level.outputs['Value'], index_switch.inputs[True])
+    links.new(index_switch.outputs['Output'], pick_node.inputs['Instance Index'])
+    
+    pick_enabled = nodes.new('FunctionNodeBooleanMath')
+    pick_enabled.operation = 'OR'
+    links.new(group_input.outputs['Pick Random Instance'], pick_enabled.inputs[0])
+    links.new(group_input.outputs['LOD by Distance'], pick_enabled.inputs[1])
+    return pick_enabled.outputs['Boolean']
+
+def add_culling_inputs(node_group):
+    """Add the camera culling sockets to a cloner interface"""
+    camera_input = node_group.interface.new_socket(name="Cull Camera", in_out='INPUT', socket_type='NodeSocketObject')
+    camera_input.description = "Camera used for frustum, distance and screen size culling"
+    
+    frustum_input = node_group.interface.new_socket(name="Cull Frustum", in_out='INPUT', socket_type='NodeSocketBool')
+    frustum_input.default_value = False
+    frustum_input.description = "Remove clones outside the camera view"
+    
+    fov_input = node_group.interface.new_socket(name="Cull Field of View", in_out='INPUT', socket_type='NodeSocketFloat')
+    fov_input.default_value = 0.6911  # 50mm объектив, 36mm сенсор
+    fov_input.min_value = 0.01
+    fov_input.max_value = 3.1
+    fov_input.subtype = 'ANGLE'
+    
+    margin_input = node_group.interface.new_socket(name="Cull Margin", in_out='INPUT', socket_type='NodeSocketFloat')
+    margin_input.default_value = 0.1
+    margin_input.min_value = 0.0
+    margin_input.max_value = 10.0
+    
+    distance_input = node_group.interface.new_socket(name="Cull Distance", in_out='INPUT', socket_type='NodeSocketFloat')
+    distance_input.default_value = 0.0
+    distance_input.min_value = 0.0
+    distance_input.subtype = 'DISTANCE'
+    distance_input.description = "Remove clones farther from the camera than this (0 = off)"
+    
+    screen_size_input = node_group.interface.new_socket(name="Cull Screen Size", in_out='INPUT', socket_type='NodeSocketFloat')
+    screen_size_input.default_value = 0.0
+    screen_size_input.min_value = 0.0
+    screen_size_input.max_value = 1.0
+    screen_size_input.subtype = 'FACTOR'
+    screen_size_input.description = "Remove clones whose projected size is below this fraction of the view (0 = off)"
+
+def build_culling(node_group, group_input, points_socket):
+    """
+    Удаляет точки клонера вне пирамиды видимости камеры, дальше Cull Distance
+    или меньше Cull Screen Size на экране.
+    
+    Позиции точек переводятся в пространство объекта с учётом Global Position /
+    Global Rotation; камера берётся относительно объекта (Object Info RELATIVE).
+    Размер клона оценивается радиусом bounding box входной геометрии.
+    Если ни один режим не включён, этап пропускается через Switch.
+    
+    Returns:
+        Сокет с отсечёнными точками
+    """
+    nodes = node_group.nodes
+    links = node_group.links
+    
+    def math_node(operation, a=None, b=None, c=None):
+        node = nodes.new('ShaderNodeMath')
+        node.operation = operation
+        for i, value in enumerate((a, b, c)):
+            if value is None:
+                continue
+            if isinstance(value, (int, float)):
+                node.inputs[i].default_value = value
+            else:
+                links.new(value, node.inputs[i])
+        return node.outputs['Value']
+    
+    def compare_node(operation, a, b):
+        node = nodes.new('FunctionNodeCompare')
+        node.data_type = 'FLOAT'
+        node.operation = operation
+        for i, value in enumerate((a, b)):
+            if isinstance(value, (int, float)):
+                node.inputs[i].default_value = value
+            else:
+                links.new(value, node.inputs[i])
+        return node.outputs['Result']
+    
+    def boolean_node(operation, a, b):
+        node = nodes.new('FunctionNodeBooleanMath')
+        node.operation = operation
+        links.new(a, node.inputs[0])
+        links.new(b, node.inputs[1])
+        return node.outputs['Boolean']
+    
+    # Камера относительно объекта клонера
+    camera_info = nodes.new('GeometryNodeObjectInfo')
+    camera_info.name = "Cull Camera Info"
+    camera_info.transform_space = 'RELATIVE'
+    links.new(group_input.outputs['Cull Camera'], camera_info.inputs['Object'])
+    
+    # Радиус клона: половина диагонали bounding box входной геометрии
+    bounds = nodes.new('GeometryNodeBoundBox')
+    links.new(group_input.outputs['Geometry'], bounds.inputs['Geometry'])
+    bounds_size = nodes.new('ShaderNodeVectorMath')
+    bounds_size.operation = 'SUBTRACT'
+    links.new(bounds.outputs['Max'], bounds_size.inputs[0])
+    links.new(bounds.outputs['Min'], bounds_size.inputs[1])
+    bounds_length = nodes.new('ShaderNodeVectorMath')
+    bounds_length.operation = 'LENGTH'
+    links.new(bounds_size.outputs['Vector'], bounds_length.inputs[0])
+    radius = math_node('MULTIPLY', bounds_length.outputs['Value'], 0.5)
+    
+    # Вектор от камеры и его координаты в пространстве камеры (камера смотрит по -Z)
+    camera_vector = nodes.new('ShaderNodeVectorMath')
+    camera_vector.operation = 'SUBTRACT'
+    links.new(build_clone_position(node_group, group_input), camera_vector.inputs[0])
+    links.new(camera_info.outputs['Location'], camera_vector.inputs[1])
+    camera_distance = nodes.new('ShaderNodeVectorMath')
+    camera_distance.operation = 'LENGTH'
+    links.new(camera_vector.outputs['Vector'], camera_distance.inputs[0])
+    
+    camera_local = nodes.new('ShaderNodeVectorRotate')
+    camera_local.rotation_type = 'EULER_XYZ'
+    camera_local.invert = True
+    links.new(camera_vector.outputs['Vector'], camera_local.inputs['Vector'])
+    links.new(camera_info.outputs['Rotation'], camera_local.inputs['Rotation'])
+    camera_xyz = nodes.new('ShaderNodeSeparateXYZ')
+    links.new(camera_local.outputs['Vector'], camera_xyz.inputs['Vector'])
+    depth = math_node('MULTIPLY', camera_xyz.outputs['Z'], -1.0)
+    
+    # --- Frustum ---
+    half_fov = math_node('MULTIPLY', group_input.outputs['Cull Field of View'], 0.5)
+    tan_half_fov = math_node('TANGENT', half_fov)
+    margin_factor = math_node('ADD', group_input.outputs['Cull Margin'], 1.0)
+    tan_with_margin = math_node('MULTIPLY', tan_half_fov, margin_factor)
+    # Полуширина пирамиды на глубине точки плюс радиус клона
+    extent = math_node('MULTIPLY_ADD', depth, tan_with_margin, radius)
+    outside_x = compare_node('GREATER_THAN', math_node('ABSOLUTE', camera_xyz.outputs['X']), extent)
+    outside_y = compare_node('GREATER_THAN', math_node('ABSOLUTE', camera_xyz.outputs['Y']), extent)
+    behind = compare_node('LESS_THAN', depth, math_node('MULTIPLY', radius, -1.0))
+    outside = boolean_node('OR', boolean_node('OR', outside_x, outside_y), behind)
+    frustum_cull = boolean_node('AND', outside, group_input.outputs['Cull Frustum'])
+    
+    # --- Distance ---
+    distance_enabled = compare_node('GREATER_THAN', group_input.outputs['Cull Distance'], 0.0)
+    beyond = compare_node('GREATER_THAN', camera_distance.outputs['Value'], group_input.outputs['Cull Distance'])
+    distance_cull = boolean_node('AND', beyond, distance_enabled)
+    
+    # --- Screen size: радиус / (глубина * tan(fov/2)) ---
+    safe_depth = math_node('MAXIMUM', depth, 0.0001)
+    screen_size = math_node('DIVIDE', radius, math_node('MULTIPLY', safe_depth, tan_half_fov))
+    size_cull = compare_node('LESS_THAN', screen_size, group_input.outputs['Cull Screen Size'])
+    size_enabled = compare_node('GREATER_THAN', group_input.outputs['Cull Screen Size'], 0.0)
+    
+    cull = boolean_node('OR', boolean_node('OR', frustum_cull, distance_cull), size_cull)
+    
+    # Сохраняем исходный индекс до удаления точек
+    point_id = nodes.new('GeometryNodeInputID')
+    store_id = nodes.new('GeometryNodeStoreNamedAttribute')
+    store_id.name = "Store Cull ID"
+    store_id.data_type = 'INT'
+    store_id.domain = 'POINT'
+    store_id.inputs['Name'].default_value = "id"
+    links.new(points_socket, store_id.inputs['Geometry'])
+    links.new(point_id.outputs['ID'], store_id.inputs['Value'])
+    
+    delete_culled = nodes.new('GeometryNodeDeleteGeometry')
+    delete_culled.name = "Cull Points"
+    delete_culled.domain = 'POINT'
+    links.new(store_id.outputs['Geometry'], delete_culled.inputs['Geometry'])
+    links.new(cull, delete_culled.inputs['Selection'])
+    
+    # Без включённых режимов этап не вычисляется
+    culling_enabled = boolean_node('OR', boolean_node('OR', group_input.outputs['Cull Frustum'], distance_enabled), size_enabled)
+    culling_switch = nodes.new('GeometryNodeSwitch')
+    culling_switch.name = "Culling"
+    culling_switch.input_type = 'GEOMETRY'
+    links.new(culling_enabled, culling_switch.inputs['Switch'])
+    links.new(points_socket, culling_switch.inputs[False])
+    links.new(delete_culled.outputs['Geometry'], culling_switch.inputs[True])
+    
+    return culling_switch.outputs['Output']
+
+# Версия шаблонов нод-групп. Увеличивайте при изменении любого билдера,
+# чтобы шаблоны, сохранённые в старых .blend файлах, были пересозданы.
+TEMPLATE_VERSION = 16
+TEMPLATE_SUFFIX = ".template"
+
+def get_template_name(base_node_name):
+    """Return the hidden datablock name used for a node group template"""
+    # Точка в начале скрывает нод-группу из большинства списков Blender
+    return f".{base_node_name}{TEMPLATE_SUFFIX}"
+
+def get_node_group_template(template_creator_func, base_node_name):
+    """Return the cached template node group, building it only once per file/session"""
+    template_name = get_template_name(base_node_name)
+    template_node_group = bpy.data.node_groups.get(template_name)
+    
+    if template_node_group is not None:
+        if template_node_group.get("template_version") == TEMPLATE_VERSION:
+            return template_node_group
+        # Шаблон от старой версии аддона - убираем с дороги
+        template_node_group.use_fake_user = False
+        if template_node_group.users == 0:
+            bpy.data.node_groups.remove(template_node_group, do_unlink=True)
+        else:
+            template_node_group.name = create_unique_name(f"{template_name}.old", bpy.data.node_groups)
+    
+    # Сначала пробуем готовую группу из библиотеки, Python билдер - запасной вариант
+    template_node_group = load_node_group_from_library(base_node_name, TEMPLATE_VERSION)
+    if template_node_group is None:
+        template_node_group = template_creator_func()
+    if template_node_group is None:
+        return None
+    
+    template_node_group.name = template_name
+    template_node_group["template_version"] = TEMPLATE_VERSION
+    template_node_group.use_fake_user = True
+    return template_node_group
+
+def clear_node_group_templates():
+    """Remove all cached templates so the next request rebuilds them"""
+    for node_group in list(bpy.data.node_groups):
+        if node_group.name.startswith(".") and TEMPLATE_SUFFIX in node_group.name:
+            node_group.use_fake_user = False
+            if node_group.users == 0:
+                bpy.data.node_groups.remove(node_group, do_unlink=True)
+
 def create_independent_node_group(template_creator_func, base_node_name):
-    """Create an independent copy of a node group using a template creator function"""
-    # 1. Create template node group
-    template_node_group = template_creator_func()
+    """Create an independent copy of a node group from a cached template"""
+    # 1. Get (or build once) the template node group
+    template_node_group = get_node_group_template(template_creator_func, base_node_name)
     if template_node_group is None:
         return None
     
-    # 2. Create independent copy
+    # 2. Create independent copy - a single .copy() instead of a full rebuild
     try:
         independent_node_group = template_node_group.copy()
     except Exception as e:
         print(f"Failed to copy node group: {e}")
-        if template_node_group.users == 0:
-            try:
-                bpy.data.node_groups.remove(template_node_group, do_unlink=True)
-            except Exception as remove_e:
-                print(f"Warning: Could not remove template node group: {remove_e}")
         return None
     
-    # 3. Remove template
-    if template_node_group.users == 0:
-        try:
-            bpy.data.node_groups.remove(template_node_group, do_unlink=True)
-        except Exception as e:
-            print(f"Warning: Could not remove template node group: {e}")
-    else:
-        template_node_group.name += ".template"
-        print(f"Warning: Template node group has users, renamed instead of removing.")
+    # 3. The copy must not inherit the template markers
+    independent_node_group.use_fake_user = False
+    if "template_version" in independent_node_group:
+        del independent_node_group["template_version"]
     
     # 4. Assign unique name to copy
     unique_node_name = create_unique_name(base_node_name, bpy.data.node_groups)
     independent_node_group.name = unique_node_name
     
-    return independent_node_group
\ No newline at end of file
+    return independent_node_group
+
+# Атрибуты сокетов интерфейса, которые переносятся в обёртку
+INTERFACE_SOCKET_ATTRS = ("default_value", "min_value", "max_value", "subtype", "description", "hide_value")
+
+def copy_interface(source_group, target_group):
+    """Copy the interface sockets (and panels) of one node group into another"""
+    panels = {}
+    for item in source_group.interface.items_tree:
+        parent = panels.get(item.parent.identifier) if getattr(item, "parent", None) else None
+        if item.item_type == 'PANEL':
+            if parent is not None:
+                panels[item.identifier] = target_group.interface.new_panel(item.name, parent=parent)
+            else:
+                panels[item.identifier] = target_group.interface.new_panel(item.name)
+            continue
+        
+        if parent is not None:
+            socket = target_group.interface.new_socket(
+                name=item.name, in_out=item.in_out, socket_type=item.socket_type, parent=parent
+            )
+        else:
+            socket = target_group.interface.new_socket(
+                name=item.name, in_out=item.in_out, socket_type=item.socket_type
+            )
+        for attr in INTERFACE_SOCKET_ATTRS:
+            if hasattr(item, attr) and hasattr(socket, attr):
+                try:
+                    setattr(socket, attr, getattr(item, attr))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+
+SHARED_CORE_NODE_NAME = "Cloner Core"
+
+def create_shared_wrapper_node_group(template_creator_func, base_node_name):
+    """Create a small wrapper node group around the shared template graph.
+
+    All wrappers of a type reference the same template, so the heavy graph
+    exists (and is compiled) once. Settings live in the modifier inputs,
+    which the wrapper forwards unchanged; effector chains are inserted
+    between the core node and the wrapper output.
+    """
+    shared_node_group = get_node_group_template(template_creator_func, base_node_name)
+    if shared_node_group is None:
+        return None
+    
+    unique_node_name = create_unique_name(base_node_name, bpy.data.node_groups)
+    wrapper = bpy.data.node_groups.new(type='GeometryNodeTree', name=unique_node_name)
+    copy_interface(shared_node_group, wrapper)
+    
+    nodes = wrapper.nodes
+    links = wrapper.links
+    
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = (-300, 0)
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = (400, 0)
+    
+    core_node = nodes.new('GeometryNodeGroup')
+    core_node.name = SHARED_CORE_NODE_NAME
+    core_node.node_tree = shared_node_group
+    
+    # Интерфейсы совпадают, поэтому сокеты соединяются по порядку
+    group_inputs = [s for s in group_input.outputs if s.type != 'CUSTOM']
+    for input_socket, core_socket in zip(group_inputs, core_node.inputs):
+        links.new(input_socket, core_socket)
+    links.new(core_node.outputs['Geometry'], group_output.inputs['Geometry'])
+    
+    wrapper["shared_core"] = shared_node_group.name
+    return wrapper
\ No newline at end of file
@@ -0,0 +1,712 @@
+"""
+Headless NumPy reference engine for the cloner and effector graphs.
+
+Computes the same instance transforms as gridcloner3d_node_group,
+advancedlinearcloner_node_group and circlecloner_node_group without Blender:
+inputs are the cloner socket values keyed by socket name, the result is an
+(N, 4, 4) array of instance matrices plus per-instance attributes.
+randomeffector_node_group and noiseeffector_node_group are mirrored by
+batched functions over those matrices.
+
+The module only depends on NumPy and has no package-relative imports,
+so it can be loaded on its own in asset pipelines and render-farm pre-passes.
+Camera culling, distance LOD and the viewport budget depend on the scene
+and are not evaluated.
+"""
+import numpy as np
+
+# Внутренние множители графов (узлы Spacing/Offset/Radius Multiplier)
+GRID_SPACING_MULTIPLIER = (8.0, 8.0, 4.0)
+LINEAR_OFFSET_MULTIPLIER = (8.0, 8.0, 4.0)
+CIRCLE_RADIUS_MULTIPLIER = 8.0
+CIRCLE_HEIGHT_MULTIPLIER = 4.0
+
+# Поворот "лицом к центру" круглого клонера: граф подаёт 90 в радианный сокет
+CIRCLE_FACE_CENTER_ROTATION = (0.0, 0.0, 90.0)
+
+# Лимит точек решётки (MAX_GRID_POINTS в gridcloner3d_node_group)
+MAX_GRID_POINTS = 2 ** 24
+
+# Совпадает с build_stable_id
+STABLE_ID_STRIDE = 1024
+
+# Максимум по умолчанию у Random Value (INT) для выбора элемента коллекции
+RANDOM_INSTANCE_INDEX_MAX = 100
+
+GRID_DEFAULTS = {
+    "Count X": 3,
+    "Count Y": 3,
+    "Count Z": 1,
+    "Spacing": (1.0, 1.0, 1.0),
+    "Global Position": (0.0, 0.0, 0.0),
+    "Global Rotation": (0.0, 0.0, 0.0),
+    "Instance Scale": (1.0, 1.0, 1.0),
+    "Instance Rotation": (0.0, 0.0, 0.0),
+    "Random Position": (0.0, 0.0, 0.0),
+    "Random Rotation": (0.0, 0.0, 0.0),
+    "Random Scale": 0.0,
+    "Random Seed": 0,
+    "Pick Random Instance": False,
+    "Center Grid": False,
+}
+
+LINEAR_DEFAULTS = {
+    "Count": 5,
+    "Offset": (1.0, 0.0, 0.0),
+    "Global Position": (0.0, 0.0, 0.0),
+    "Global Rotation": (0.0, 0.0, 0.0),
+    "Scale Start": (1.0, 1.0, 1.0),
+    "Scale End": (1.0, 1.0, 1.0),
+    "Rotation Start": (0.0, 0.0, 0.0),
+    "Rotation End": (0.0, 0.0, 0.0),
+    "Random Position": (0.0, 0.0, 0.0),
+    "Random Rotation": (0.0, 0.0, 0.0),
+    "Random Scale": 0.0,
+    "Random Seed": 0,
+    "Pick Random Instance": False,
+}
+
+CIRCLE_DEFAULTS = {
+    "Count": 8,
+    "Radius": 1.0,
+    "Height": 0.0,
+    "Global Position": (0.0, 0.0, 0.0),
+    "Global Rotation": (0.0, 0.0, 0.0),
+    "Instance Scale": (1.0, 1.0, 1.0),
+    "Instance Rotation": (0.0, 0.0, 0.0),
+    "Random Position": (0.0, 0.0, 0.0),
+    "Random Rotation": (0.0, 0.0, 0.0),
+    "Random Scale": 0.0,
+    "Random Seed": 0,
+    "Pick Random Instance": False,
+}
+
+# --- Хэш Дженкинса (BLI_hash.hh), как в узле Random Value ---
+
+def _rot(x, k):
+    rotated = x << np.uint32(k)
+    rotated |= x >> np.uint32(32 - k)
+    return rotated
+
+def _final(a, b, c):
+    c ^= b; c -= _rot(b, 14)
+    a ^= c; a -= _rot(c, 11)
+    b ^= a; b -= _rot(a, 25)
+    c ^= b; c -= _rot(b, 16)
+    a ^= c; a -= _rot(c, 4)
+    b ^= a; b -= _rot(a, 14)
+    c ^= b; c -= _rot(b, 24)
+    return c
+
+def _as_uint32(value, shape):
+    # int -> uint32 с переполнением, как приведение int в C++
+    return np.broadcast_to(np.asarray(value, dtype=np.int64).astype(np.uint32), shape).copy()
+
+def jenkins_hash(*keys):
+    """Vectorised Blender noise::hash for 1 to 3 integer keys (uint32 result)"""
+    shape = np.broadcast_shapes(*(np.shape(k) for k in keys))
+    init = np.uint32((0xdeadbeef + (len(keys) << 2) + 13) & 0xFFFFFFFF)
+    a = np.full(shape, init, dtype=np.uint32)
+    b = a.copy()
+    c = a.copy()
+    with np.errstate(over='ignore'):
+        if len(keys) >= 3:
+            c += _as_uint32(keys[2], shape)
+        if len(keys) >= 2:
+            b += _as_uint32(keys[1], shape)
+        a += _as_uint32(keys[0], shape)
+        return _final(a, b, c)
+
+def hash_to_float(*keys):
+    """noise::hash_to_float: the hash mapped to 0..1 in float32"""
+    return jenkins_hash(*keys).astype(np.float32) / np.float32(0xFFFFFFFF)
+
+def random_float(ids, seed, min_value, max_value):
+    """Random Value node, FLOAT mode"""
+    value = hash_to_float(seed, ids)
+    return value * np.float32(max_value - min_value) + np.float32(min_value)
+
+def random_vector(ids, seed, min_value, max_value):
+    """Random Value node, FLOAT_VECTOR mode; returns (N, 3)"""
+    min_value = np.asarray(min_value, dtype=np.float32)
+    max_value = np.asarray(max_value, dtype=np.float32)
+    value = np.stack([hash_to_float(seed, ids, axis) for axis in range(3)], axis=-1)
+    return value * (max_value - min_value) + min_value
+
+def random_int(ids, seed, min_value, max_value):
+    """Random Value node, INT mode (note the swapped id/seed keys)"""
+    value = hash_to_float(ids, seed)
+    return np.floor(value * np.float32(max_value + 1 - min_value) + np.float32(min_value)).astype(np.int64)
+
+def stable_grid_id(x, y, z):
+    """Stable clone id of a grid cell, as written by build_stable_id with Integer Math"""
+    x, y, z = (np.asarray(axis, dtype=np.int64) for axis in (x, y, z))
+    return (x + STABLE_ID_STRIDE * (y + STABLE_ID_STRIDE * z)).astype(np.int32)
+
+# --- Матрицы инстансов ---
+
+def euler_to_matrix(euler):
+    """XYZ Euler angles (N, 3) -> rotation matrices (N, 3, 3), Rz @ Ry @ Rx"""
+    euler = np.asarray(euler, dtype=np.float64)
+    cx, cy, cz = np.cos(euler[..., 0]), np.cos(euler[..., 1]), np.cos(euler[..., 2])
+    sx, sy, sz = np.sin(euler[..., 0]), np.sin(euler[..., 1]), np.sin(euler[..., 2])
+    matrix = np.empty(euler.shape[:-1] + (3, 3))
+    matrix[..., 0, 0] = cy * cz
+    matrix[..., 0, 1] = sx * sy * cz - cx * sz
+    matrix[..., 0, 2] = cx * sy * cz + sx * sz
+    matrix[..., 1, 0] = cy * sz
+    matrix[..., 1, 1] = sx * sy * sz + cx * cz
+    matrix[..., 1, 2] = cx * sy * sz - sx * cz
+    matrix[..., 2, 0] = -sy
+    matrix[..., 2, 1] = sx * cy
+    matrix[..., 2, 2] = cx * cy
+    return matrix
+
+def instances_at(positions):
+    """Instance on Points: identity matrices placed at the points"""
+    matrices = np.zeros((len(positions), 4, 4))
+    matrices[:, 0, 0] = matrices[:, 1, 1] = matrices[:, 2, 2] = matrices[:, 3, 3] = 1.0
+    matrices[:, :3, 3] = positions
+    return matrices
+
+def translate_local(matrices, translation):
+    """Translate Instances in local space: the offset follows the instance rotation and scale"""
+    matrices[:, :3, 3] += np.einsum('nij,nj->ni', matrices[:, :3, :3], np.broadcast_to(translation, (len(matrices), 3)))
+
+def translate_world(matrices, translation):
+    """Set Position on instances: offset the instance origin"""
+    matrices[:, :3, 3] += translation
+
+def rotate_local(matrices, euler):
+    """
+    Rotate Instances in local space.
+    
+    The node rotates around the instance's own normalised axes, which for a
+    rotation-scale matrix R @ S gives R @ E @ S.
+    """
+    linear = matrices[:, :3, :3]
+    scale = np.linalg.norm(linear, axis=1)
+    axes = linear / np.where(scale > 0.0, scale, 1.0)[:, None, :]
+    rotation = euler_to_matrix(np.broadcast_to(euler, (len(matrices), 3)))
+    matrices[:, :3, :3] = np.einsum('nij,njk->nik', axes, rotation) * scale[:, None, :]
+
+def scale_local(matrices, scale):
+    """Scale Instances in local space"""
+    matrices[:, :3, :3] *= np.broadcast_to(scale, (len(matrices), 3))[:, None, :]
+
+def transform_global(matrices, position, rotation):
+    """Transform Geometry node applied to the instances (Global Position / Global Rotation)"""
+    global_matrix = np.eye(4)
+    global_matrix[:3, :3] = euler_to_matrix(np.asarray(rotation, dtype=np.float64)[None])[0]
+    global_matrix[:3, 3] = position
+    if np.array_equal(global_matrix, np.eye(4)):
+        return matrices
+    return np.einsum('ij,njk->nik', global_matrix, matrices)
+
+# --- Клонеры ---
+
+def _inputs(defaults, inputs):
+    values = dict(defaults)
+    if inputs:
+        values.update(inputs)
+    return values
+
+def _random_offsets(values, ids):
+    """Per-clone random position, rotation and uniform scale of the cloner graphs"""
+    seed = values["Random Seed"]
+    random_position = np.asarray(values["Random Position"], dtype=np.float32)
+    random_rotation = np.asarray(values["Random Rotation"], dtype=np.float32)
+    random_scale = np.float32(values["Random Scale"])
+    return (
+        random_vector(ids, seed, -random_position, random_position),
+        random_vector(ids, seed, -random_rotation, random_rotation),
+        random_float(ids, seed, -random_scale, random_scale),
+    )
+
+def _attributes(values, ids):
+    attributes = {"id": ids}
+    if values["Pick Random Instance"]:
+        attributes["instance_index"] = random_int(ids, values["Random Seed"], 0, RANDOM_INSTANCE_INDEX_MAX)
+    return attributes
+
+def _finish(values, matrices, dtype):
+    matrices = transform_global(matrices, values["Global Position"], values["Global Rotation"])
+    return matrices.astype(dtype, copy=False)
+
+def grid_cloner(inputs=None, dtype=np.float32):
+    """
+    Evaluate the Grid cloner.
+    
+    Returns:
+        (matrices (N, 4, 4), {"id": (N,), ...}); index order is X fastest, then Y, then Z
+    """
+    values = _inputs(GRID_DEFAULTS, inputs)
+    count_x, count_y, count_z = (max(int(values[name]), 0) for name in ("Count X", "Count Y", "Count Z"))
+    # Граф ограничивает число слоёв, чтобы X*Y*Z не превышало MAX_GRID_POINTS
+    count_z = min(count_z, MAX_GRID_POINTS // max(count_x * count_y, 1))
+    index = np.arange(count_x * count_y * count_z, dtype=np.int64)
+    x = index % max(count_x, 1)
+    y = (index // max(count_x, 1)) % max(count_y, 1)
+    z = index // max(count_x * count_y, 1)
+    
+    spacing = np.asarray(values["Spacing"], dtype=np.float64) * GRID_SPACING_MULTIPLIER
+    positions = np.stack((x, y, z), axis=-1) * spacing
+    if values["Center Grid"]:
+        positions -= (np.array((count_x, count_y, count_z)) - 1) * spacing / 2.0
+    
+    ids = stable_grid_id(x, y, z)
+    random_position, random_rotation, random_scale = _random_offsets(values, ids)
+    
+    matrices = instances_at(positions)
+    translate_local(matrices, random_position)
+    rotate_local(matrices, np.asarray(values["Instance Rotation"]) + random_rotation)
+    scale_local(matrices, np.asarray(values["Instance Scale"]) + random_scale[:, None])
+    return _finish(values, matrices, dtype), _attributes(values, ids)
+
+def linear_cloner(inputs=None, dtype=np.float32):
+    """
+    Evaluate the Linear cloner, including the start/end scale and rotation interpolation.
+    
+    Returns:
+        (matrices (N, 4, 4), {"id": (N,), "factor": (N,), ...})
+    """
+    values = _inputs(LINEAR_DEFAULTS, inputs)
+    count = max(int(values["Count"]), 0)
+    ids = np.arange(count, dtype=np.int32)
+    
+    offset = np.asarray(values["Offset"], dtype=np.float64) * LINEAR_OFFSET_MULTIPLIER
+    positions = ids[:, None] * offset
+    
+    factor = np.clip(ids / max(count - 1.0, 1.0), 0.0, 1.0)[:, None]
+    scale = np.asarray(values["Scale Start"]) * (1.0 - factor) + np.asarray(values["Scale End"]) * factor
+    rotation = np.asarray(values["Rotation Start"]) * (1.0 - factor) + np.asarray(values["Rotation End"]) * factor
+    
+    random_position, random_rotation, random_scale = _random_offsets(values, ids)
+    
+    matrices = instances_at(positions)
+    translate_world(matrices, random_position)
+    rotate_local(matrices, rotation + random_rotation)
+    scale_local(matrices, scale + random_scale[:, None])
+    attributes = _attributes(values, ids)
+    attributes["factor"] = factor[:, 0]
+    return _finish(values, matrices, dtype), attributes
+
+def circle_cloner(inputs=None, dtype=np.float32):
+    """
+    Evaluate the Circle cloner.
+    
+    Returns:
+        (matrices (N, 4, 4), {"id": (N,), ...}); fewer than 3 clones give an empty result like Mesh Circle
+    """
+    values = _inputs(CIRCLE_DEFAULTS, inputs)
+    count = int(values["Count"])
+    if count < 3:
+        count = 0
+    ids = np.arange(count, dtype=np.int32)
+    
+    angle = ids * (2.0 * np.pi / max(count, 1))
+    radius = values["Radius"] * CIRCLE_RADIUS_MULTIPLIER
+    positions = np.stack((np.cos(angle) * radius, np.sin(angle) * radius,
+                          np.full(count, values["Height"] * CIRCLE_HEIGHT_MULTIPLIER)), axis=-1)
+    
+    random_position, random_rotation, random_scale = _random_offsets(values, ids)
+    
+    matrices = instances_at(positions)
+    rotate_local(matrices, CIRCLE_FACE_CENTER_ROTATION)
+    rotate_local(matrices, values["Instance Rotation"])
+    scale_local(matrices, values["Instance Scale"])
+    translate_local(matrices, random_position)
+    rotate_local(matrices, random_rotation)
+    scale_local(matrices, 1.0 + random_scale[:, None])
+    return _finish(values, matrices, dtype), _attributes(values, ids)
+
+# Тип клонера -> функция движка
+CLONER_ENGINES = {
+    "GRID": grid_cloner,
+    "LINEAR": linear_cloner,
+    "CIRCLE": circle_cloner,
+}
+
+def evaluate_cloner(cloner_type, inputs=None, dtype=np.float32):
+    """Evaluate a cloner by type ('GRID', 'LINEAR' or 'CIRCLE')"""
+    return CLONER_ENGINES[cloner_type](inputs, dtype)
+
+# --- Эффекторы ---
+
+RANDOM_EFFECTOR_DEFAULTS = {
+    "Enable": False,
+    "Strength": 0.0,
+    "Position": (0.0, 0.0, 0.0),
+    "Rotation": (0.0, 0.0, 0.0),
+    "Scale": (0.0, 0.0, 0.0),
+    "Uniform Scale": True,
+    "Seed": 0,
+    "Field": 1.0,
+    "Use Field": False,
+}
+
+NOISE_EFFECTOR_DEFAULTS = {
+    "Enable": False,
+    "Strength": 0.0,
+    "Position": (0.0, 0.0, 0.0),
+    "Symmetric Translation": False,
+    "Rotation": (0.0, 0.0, 0.0),
+    "Symmetric Rotation": False,
+    "Scale": (0.0, 0.0, 0.0),
+    "Uniform Scale": True,
+    "Noise Scale": 0.5,
+    "Noise Detail": 2.0,
+    "Noise Roughness": 0.5,
+    "Noise Lacunarity": 2.0,
+    "Noise Distortion": 0.0,
+    "Noise Position": (0.0, 0.0, 0.0),
+    "Noise XYZ Scale": (1.0, 1.0, 1.0),
+    "Speed": 0.0,
+    "Seed": 0,
+    "Single Noise Sample": False,
+    "Baked Noise": False,
+    "Bake Resolution": 16,
+    "Field": 1.0,
+    "Use Field": False,
+}
+
+# Сдвиги W текстур шума вращения и масштаба (build_noise_colors)
+NOISE_CHANNEL_W_OFFSETS = (0.0, 42.0, 84.0)
+# Диапазон хэша id, добавляемого к W шума
+NOISE_ID_W_RANGE = 1000.0
+# Смеси каналов в режиме одной выборки (SINGLE_SAMPLE_*_MIX в GN_NoiseEffector)
+NOISE_SINGLE_ROTATION_MIX = (
+    (0.476, 0.706, -0.524),
+    (-0.707, -0.048, -0.706),
+    (-0.524, 0.707, 0.476),
+)
+NOISE_SINGLE_SCALE_MIX = (
+    (0.469, 0.691, 0.446),
+    (-0.445, 0.678, -0.529),
+    (-0.692, -0.003, 0.677),
+)
+
+def compose_matrices(position, rotation=None, scale=None):
+    """Build (N, 4, 4) matrices T @ R @ S from position, XYZ Euler rotation and scale arrays"""
+    position = np.asarray(position, dtype=np.float64)
+    matrices = instances_at(position)
+    if rotation is not None:
+        matrices[:, :3, :3] = euler_to_matrix(np.broadcast_to(rotation, position.shape))
+    if scale is not None:
+        scale_local(matrices, scale)
+    return matrices
+
+def _effector_setup(defaults, inputs, transforms, ids, field):
+    values = _inputs(defaults, inputs)
+    if isinstance(transforms, (tuple, list)):
+        matrices = compose_matrices(*transforms)
+        dtype = np.float32
+    else:
+        dtype = transforms.dtype
+        matrices = np.array(transforms, dtype=np.float64)
+    if ids is None:
+        # Без атрибута id узел ID возвращает индекс
+        ids = np.arange(len(matrices), dtype=np.int32)
+    if field is not None:
+        weight = np.asarray(field, dtype=np.float32)[:, None]
+    elif values["Use Field"]:
+        weight = np.float32(values["Field"])
+    else:
+        weight = np.float32(1.0)
+    return values, matrices, dtype, ids, weight
+
+def _apply_effector_offsets(matrices, translation, rotation, scale, weight):
+    """apply_effector_field_weight followed by the effector's Translate/Rotate/Scale Instances"""
+    translate_local(matrices, translation * weight)
+    rotate_local(matrices, rotation * weight)
+    scale_local(matrices, (scale - 1.0) * weight + 1.0)
+
+def random_effector(transforms, inputs=None, ids=None, field=None, frame=0.0):
+    """
+    Apply the Random effector to a batch of instances.
+    
+    Args:
+        transforms: (N, 4, 4) matrices or a (position, rotation, scale) tuple of (N, 3) arrays
+        ids: per-instance "id" attribute; the index is used when None
+        field: per-instance field weight (N,), overrides the Field/Use Field inputs
+        frame: unused, the Random effector is not animated
+    
+    Returns:
+        Transformed (N, 4, 4) matrices
+    """
+    values, matrices, dtype, ids, weight = _effector_setup(RANDOM_EFFECTOR_DEFAULTS, inputs, transforms, ids, field)
+    if not values["Enable"]:
+        return matrices.astype(dtype, copy=False)
+    
+    seed = values["Seed"]
+    strength = np.float32(values["Strength"])
+    position = np.asarray(values["Position"], dtype=np.float32)
+    rotation = np.asarray(values["Rotation"], dtype=np.float32)
+    scale = np.asarray(values["Scale"], dtype=np.float32)
+    
+    # Все три Random Value используют одни seed и id, как в графе
+    translation = random_vector(ids, seed, -position, position) * strength
+    rotation_offset = random_vector(ids, seed, -rotation, rotation) * strength
+    if values["Uniform Scale"]:
+        # Вектор в float-сокете Maximum неявно приводится к среднему компонент
+        uniform = np.float32(scale.mean())
+        scale_offset = np.repeat(random_float(ids, seed, 1.0 - uniform, 1.0 + uniform)[:, None], 3, axis=1)
+    else:
+        scale_offset = random_vector(ids, seed, 1.0 - scale, 1.0 + scale)
+    
+    _apply_effector_offsets(matrices, translation, rotation_offset, scale_offset, weight)
+    return matrices.astype(dtype, copy=False)
+
+# --- Шум Перлина (BLI_noise.cc), 4D fBM узла Noise Texture ---
+
+def _mix_hash(a, b, c):
+    a -= c; a ^= _rot(c, 4); c += b
+    b -= a; b ^= _rot(a, 6); a += c
+    c -= b; c ^= _rot(b, 8); b += a
+    a -= c; a ^= _rot(c, 16); c += b
+    b -= a; b ^= _rot(a, 19); a += c
+    c -= b; c ^= _rot(b, 4); b += a
+    return a, b, c
+
+def jenkins_hash4(kx, ky, kz, kw):
+    """Vectorised Blender noise::hash for four integer keys"""
+    shape = np.broadcast_shapes(np.shape(kx), np.shape(ky), np.shape(kz), np.shape(kw))
+    init = np.uint32(0xdeadbeef + (4 << 2) + 13)
+    a = np.full(shape, init, dtype=np.uint32)
+    b = a.copy()
+    c = a.copy()
+    with np.errstate(over='ignore'):
+        a += _as_uint32(kx, shape)
+        b += _as_uint32(ky, shape)
+        c += _as_uint32(kz, shape)
+        a, b, c = _mix_hash(a, b, c)
+        a += _as_uint32(kw, shape)
+        return _final(a, b, c)
+
+def _float_bits(value):
+    return np.asarray(value, dtype=np.float32).view(np.uint32)
+
+def random_float4_offset(seed):
+    """noise::random_float4_offset: a constant 4D offset in 100..200"""
+    return np.array([100.0 + hash_to_float(_float_bits(seed), _float_bits(axis)) * 100.0
+                     for axis in range(4)], dtype=np.float32)
+
+def _fade(t):
+    return t * t * t * (t * (t * np.float32(6.0) - np.float32(15.0)) + np.float32(10.0))
+
+def _select_bits(condition, a, b):
+    """condition ? a : b over uint32 bit patterns; cheaper than np.where with broadcasting"""
+    mask = condition.astype(np.uint32)
+    np.negative(mask, out=mask)
+    return b ^ ((a ^ b) & mask)
+
+def _grad4(hash_value, x, y, z, w):
+    h = hash_value & np.uint32(31)
+    x, y, z, w = (np.asarray(value, dtype=np.float32).view(np.uint32) for value in (x, y, z, w))
+    u = _select_bits(h < np.uint32(24), x, y)
+    v = _select_bits(h < np.uint32(16), y, z)
+    s = _select_bits(h < np.uint32(8), z, w)
+    # Биты 0..2 хэша меняют знак: переворачиваем знаковый бит float32
+    u ^= (h & np.uint32(1)) << np.uint32(31)
+    v ^= (h & np.uint32(2)) << np.uint32(30)
+    s ^= (h & np.uint32(4)) << np.uint32(29)
+    return u.view(np.float32) + v.view(np.float32) + s.view(np.float32)
+
+def _lerp(a, b, t):
+    return (np.float32(1.0) - t) * a + t * b
+
+def perlin_noise4(xyz, w):
+    """
+    Unscaled 4D Perlin noise of (N, 3) positions at K W coordinates.
+    
+    Хэш Дженкинса смешивает ключи x, y, z до того, как добавляется w, поэтому
+    смешивание считается один раз на угол куба xyz и общее для всех K строк W;
+    ключи ячеек вычисляются один раз сразу в uint32.
+    
+    Args:
+        xyz: (N, 3) float32 positions
+        w: (K, N) float32 W coordinates
+    
+    Returns:
+        (K, N) float32 noise
+    """
+    floored = np.floor(xyz)
+    # int -> uint32 с переполнением, как приведение int в C++
+    keys = np.ascontiguousarray(floored.astype(np.int32).view(np.uint32).T)
+    frac = np.ascontiguousarray((xyz - floored).T)
+    fade = _fade(frac)
+    floored_w = np.floor(w)
+    keys_w = floored_w.astype(np.int32).view(np.uint32)
+    frac_w = w - floored_w
+    
+    init = 0xdeadbeef + (4 << 2) + 13
+    # Значения, уже сведённые вдоль x: along_x[dw, dz, dy]
+    along_x = np.empty((2, 2, 2) + w.shape, dtype=np.float32)
+    with np.errstate(over='ignore'):
+        for dz in (0, 1):
+            for dy in (0, 1):
+                mixed = [_mix_hash(keys[0] + np.uint32(init + dx), keys[1] + np.uint32(init + dy),
+                                   keys[2] + np.uint32(init + dz)) for dx in (0, 1)]
+                for dw in (0, 1):
+                    key_w = keys_w + np.uint32(dw)
+                    local_w = frac_w - np.float32(dw)
+                    values = []
+                    for dx, (a, b, c) in enumerate(mixed):
+                        hash_value = _final(a + key_w, np.broadcast_to(b, w.shape).copy(),
+                                            np.broadcast_to(c, w.shape).copy())
+                        values.append(_grad4(hash_value, frac[0] - np.float32(dx), frac[1] - np.float32(dy),
+                                             frac[2] - np.float32(dz), local_w))
+                    along_x[dw, dz, dy] = _lerp(values[0], values[1], fade[0])
+    
+    along_y = _lerp(along_x[:, :, 0], along_x[:, :, 1], fade[1])
+    along_z = _lerp(along_y[:, 0], along_y[:, 1], fade[2])
+    return _lerp(along_z[0], along_z[1], _fade(frac_w))
+
+def perlin_signed4(xyz, w):
+    """noise::perlin_signed for 4D positions, repeating every 100000 units"""
+    period = np.float32(100000.0)
+    return perlin_noise4(np.fmod(xyz, period), np.fmod(w, period)) * np.float32(0.8344)
+
+def perlin_fbm4(xyz, w, detail, roughness, lacunarity, normalize=True):
+    """noise::perlin_fbm: fractal sum of octaves, fractional detail blends in the last one"""
+    detail = float(np.clip(detail, 0.0, 15.0))
+    roughness = np.float32(max(roughness, 0.0))
+    lacunarity = np.float32(lacunarity)
+    frequency = np.float32(1.0)
+    amplitude = np.float32(1.0)
+    max_amplitude = np.float32(0.0)
+    total = np.zeros(w.shape, dtype=np.float32)
+    # Цикл по октавам (не более 16), каждая вычисляется по всему массиву
+    for _ in range(int(detail) + 1):
+        total += perlin_signed4(frequency * xyz, frequency * w) * amplitude
+        max_amplitude += amplitude
+        amplitude *= roughness
+        frequency *= lacunarity
+    remainder = np.float32(detail - np.floor(detail))
+    if remainder != 0.0:
+        total_next = total + perlin_signed4(frequency * xyz, frequency * w) * amplitude
+        if normalize:
+            return _lerp(np.float32(0.5) * total / max_amplitude + np.float32(0.5),
+                         np.float32(0.5) * total_next / (max_amplitude + amplitude) + np.float32(0.5), remainder)
+        return _lerp(total, total_next, remainder)
+    if normalize:
+        return np.float32(0.5) * total / max_amplitude + np.float32(0.5)
+    return total
+
+def noise_texture_colors4(vector, ws, scale, detail, roughness, lacunarity, distortion):
+    """
+    Color outputs of several 4D Noise Texture nodes that differ only in W.
+    
+    Без искажения координаты xyz у всех текстур совпадают, и смешивание
+    хэша по xyz вычисляется один раз для всех W; с искажением текстуры
+    вычисляются по отдельности.
+    
+    Args:
+        vector: (N, 3) positions
+        ws: sequence of K (N,) W coordinates
+    
+    Returns:
+        (K, N, 3) float32 colors
+    """
+    if distortion != 0.0 and len(ws) > 1:
+        return np.stack([noise_texture_colors4(vector, (w,), scale, detail, roughness, lacunarity, distortion)[0]
+                         for w in ws])
+    scale = np.float32(scale)
+    xyz = np.asarray(vector, dtype=np.float32) * scale
+    w = np.stack([np.asarray(w, dtype=np.float32) for w in ws]) * scale
+    if distortion != 0.0:
+        distortion = np.float32(distortion)
+        # Все четыре смещения считаются от неискажённой позиции; здесь K = 1
+        displacement = [perlin_signed4(xyz + offset[:3], w + offset[3]) * distortion
+                        for offset in (random_float4_offset(axis) for axis in range(4))]
+        xyz = xyz + np.stack([axis[0] for axis in displacement[:3]], axis=-1)
+        w = w + displacement[3]
+    channels = [perlin_fbm4(xyz, w, detail, roughness, lacunarity)]
+    for seed in (4.0, 5.0):
+        offset = random_float4_offset(seed)
+        channels.append(perlin_fbm4(xyz + offset[:3], w + offset[3], detail, roughness, lacunarity))
+    return np.stack(channels, axis=-1)
+
+def noise_texture_color4(vector, w, scale, detail, roughness, lacunarity, distortion):
+    """
+    Color output of the Noise Texture node in 4D mode (fBM, normalized).
+    
+    Args:
+        vector: (N, 3) positions
+        w: (N,) W coordinates
+    
+    Returns:
+        (N, 3) float32 colors
+    """
+    return noise_texture_colors4(vector, (w,), scale, detail, roughness, lacunarity, distortion)[0]
+
+def noise_effector(transforms, inputs=None, ids=None, field=None, frame=0.0):
+    """
+    Apply the Noise effector to a batch of instances at a scene frame.
+    
+    The graph does not wire the Symmetric Translation/Rotation switches into
+    its offsets, so they have no effect here either. Baked Noise is evaluated
+    as live noise: the lattice only approximates it.
+    
+    Args:
+        transforms: (N, 4, 4) matrices or a (position, rotation, scale) tuple of (N, 3) arrays
+        ids: per-instance "id" attribute; the index is used when None
+        field: per-instance field weight (N,), overrides the Field/Use Field inputs
+        frame: scene frame driving Speed
+    
+    Returns:
+        Transformed (N, 4, 4) matrices
+    """
+    values, matrices, dtype, ids, weight = _effector_setup(NOISE_EFFECTOR_DEFAULTS, inputs, transforms, ids, field)
+    if not values["Enable"]:
+        return matrices.astype(dtype, copy=False)
+    
+    # W: хэш id (seed узла Random Value не подключён) + Seed + кадр * Speed
+    time_factor = np.float32(frame) * np.float32(values["Speed"])
+    w = random_float(ids, 0, 0.0, NOISE_ID_W_RANGE) + np.float32(values["Seed"]) + time_factor
+    
+    vector = ((matrices[:, :3, 3] + np.asarray(values["Noise Position"]))
+              * np.asarray(values["Noise XYZ Scale"])).astype(np.float32)
+    noise_parameters = (values["Noise Scale"], values["Noise Detail"], values["Noise Roughness"],
+                        values["Noise Lacunarity"], values["Noise Distortion"])
+    
+    if values["Single Noise Sample"]:
+        position_noise = noise_texture_color4(vector, w + np.float32(NOISE_CHANNEL_W_OFFSETS[0]), *noise_parameters)
+        # Вращение и масштаб - ортонормированные смеси каналов одной выборки
+        centered = position_noise - np.float32(0.5)
+        rotation_noise = np.clip(centered @ np.asarray(NOISE_SINGLE_ROTATION_MIX, dtype=np.float32).T + np.float32(0.5), 0.0, 1.0)
+        scale_noise = np.clip(centered @ np.asarray(NOISE_SINGLE_SCALE_MIX, dtype=np.float32).T + np.float32(0.5), 0.0, 1.0)
+    else:
+        # Три текстуры отличаются только W: смешивание хэша по xyz общее
+        position_noise, rotation_noise, scale_noise = noise_texture_colors4(
+            vector, [w + np.float32(offset) for offset in NOISE_CHANNEL_W_OFFSETS], *noise_parameters)
+    
+    strength = np.float32(values["Strength"])
+    translation = (position_noise * 2.0 - 1.0) * np.asarray(values["Position"], dtype=np.float32) * strength
+    rotation = (rotation_noise * 2.0 - 1.0) * np.asarray(values["Rotation"], dtype=np.float32) * strength
+    scale = 1.0 + (scale_noise * 2.0 - 1.0) * np.asarray(values["Scale"], dtype=np.float32)
+    if values["Uniform Scale"]:
+        scale = np.repeat(scale[:, :1], 3, axis=1)
+    
+    _apply_effector_offsets(matrices, translation, rotation, scale, weight)
+    return matrices.astype(dtype, copy=False)
+
+# Тип эффектора -> функция движка
+EFFECTOR_ENGINES = {
+    "RANDOM": random_effector,
+    "NOISE": noise_effector,
+}
+
+def evaluate_effector_stack(transforms, effectors, ids=None, frame=0.0):
+    """
+    Apply a chain of effectors in order, like the effector chain of a cloner.
+    
+    Args:
+        effectors: iterable of (effector type, inputs) or (effector type, inputs, field weights)
+    """
+    matrices = transforms
+    for effector in effectors:
+        effector_type, inputs = effector[0], effector[1]
+        field = effector[2] if len(effector) > 2 else None
+        matrices = EFFECTOR_ENGINES[effector_type](matrices, inputs, ids, field, frame)
+    return matrices
@@ -0,0 +1,151 @@
+import bpy
+import datetime
+import json
+import math
+import time
+from collections import deque
+from functools import wraps
+
+PROFILE_SCHEMA = 1
+# Для p95 хранятся только последние замеры каждой функции
+SAMPLE_LIMIT = 1000
+
+class ProfileStats:
+    """Call count, timings and graph changes of one profiled function"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=SAMPLE_LIMIT)
+        self.nodes_created = 0
+        self.nodes_removed = 0
+        self.links_created = 0
+        self.links_removed = 0
+    
+    @property
+    def p95_ms(self):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(len(ordered) * 0.95) - 1, 0)]
+    
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "p95_ms": self.p95_ms,
+            "max_ms": self.max_ms,
+            "nodes_created": self.nodes_created,
+            "nodes_removed": self.nodes_removed,
+            "links_created": self.links_created,
+            "links_removed": self.links_removed,
+        }
+
+def snapshot_graph_elements():
+    """Pointers of the nodes and links of every node group, keyed by datablock pointer"""
+    return {node_group.as_pointer(): ({node.as_pointer() for node in node_group.nodes},
+                                      {link.as_pointer() for link in node_group.links})
+            for node_group in bpy.data.node_groups}
+
+class AddonProfiler:
+    """
+    Опциональное профилирование операторов, пересборки клонеров и билдеров.
+    
+    Пока профилирование выключено, обёртки только проверяют флаг enabled.
+    Созданные и удалённые узлы и связи считаются сравнением множеств их
+    указателей в каждой нод-группе до и после вызова, поэтому пересборка
+    с удалением и созданием узлов видна в обоих счётчиках. Узел, созданный
+    по адресу только что удалённого, неотличим от него и не считается.
+    
+    Граф сканируется только на границах внешнего профилируемого вызова:
+    вложенные вызовы записывают время, а их изменения графа относятся
+    к внешнему вызову.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}  # имя функции -> ProfileStats
+        self._depth = 0  # глубина вложенности профилируемых вызовов
+    
+    def reset(self):
+        self.stats.clear()
+    
+    def call(self, name, func, *args, **kwargs):
+        """Run func and record its time and node/link changes under name"""
+        outermost = self._depth == 0
+        before = snapshot_graph_elements() if outermost else None
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            self._depth -= 1
+            after = snapshot_graph_elements() if outermost else None
+            self._record(name, elapsed_ms, before, after)
+    
+    def _record(self, name, elapsed_ms, before, after):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ProfileStats()
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.samples.append(elapsed_ms)
+        if before is None:
+            return
+        empty = (set(), set())
+        for pointer in before.keys() | after.keys():
+            nodes_before, links_before = before.get(pointer, empty)
+            nodes_after, links_after = after.get(pointer, empty)
+            stats.nodes_created += len(nodes_after - nodes_before)
+            stats.nodes_removed += len(nodes_before - nodes_after)
+            stats.links_created += len(links_after - links_before)
+            stats.links_removed += len(links_before - links_after)
+    
+    def sorted_stats(self):
+        """(name, stats) pairs, slowest in total first"""
+        return sorted(self.stats.items(), key=lambda item: item[1].total_ms, reverse=True)
+    
+    def report(self):
+        """JSON-ready summary of all recorded calls"""
+        from .. import bl_info
+        return {
+            "schema": PROFILE_SCHEMA,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "blender": bpy.app.version_string,
+            "addon_version": list(bl_info["version"]),
+            "stats": {name: stats.as_dict() for name, stats in self.sorted_stats()},
+        }
+    
+    def dump(self, filepath):
+        """Write report() to a JSON file"""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+# Global addon profiler
+profiler = AddonProfiler()
+
+def profiled(func=None, name=None):
+    """Decorator: record calls of a function while profiling is enabled"""
+    if func is None:
+        return lambda func: profiled(func, name)
+    stats_name = name or func.__name__
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        return profiler.call(stats_name, func, *args, **kwargs)
+    
+    wrapper._profiled = True
+    return wrapper
+
+def instrument_operator(cls):
+    """Wrap an operator's execute() for profiling; other classes are returned unchanged"""
+    execute = cls.__dict__.get("execute")
+    if execute is not None and not getattr(execute, "_profiled", False):
+        cls.execute = profiled(execute, name=cls.__name__)
+    return cls
@@ -0,0 +1,102 @@
+import bpy
+from bpy.types import Panel, Operator
+from bpy.props import StringProperty
+from ...utils.profiling import profiler
+
+# Сколько самых медленных функций показывать в панели
+PROFILE_PANEL_ROWS = 12
+
+class CLONER_OT_toggle_profiling(Operator):
+    bl_idname = "object.cloner_toggle_profiling"
+    bl_label  = "Toggle Profiling"
+    bl_description = "Record call counts, timings and node/link changes of cloner operators and rebuilds"
+    
+    def execute(self, context):
+        profiler.enabled = not profiler.enabled
+        return {'FINISHED'}
+
+class CLONER_OT_reset_profiling(Operator):
+    bl_idname = "object.cloner_reset_profiling"
+    bl_label  = "Reset Profiling"
+    bl_description = "Clear the recorded profiling statistics"
+    
+    def execute(self, context):
+        profiler.reset()
+        return {'FINISHED'}
+
+class CLONER_OT_dump_profiling(Operator):
+    bl_idname = "object.cloner_dump_profiling"
+    bl_label  = "Save Profile"
+    bl_description = "Write the recorded profiling statistics to a JSON file"
+    filepath: StringProperty(subtype='FILE_PATH', default="//cloner_profile.json")
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def execute(self, context):
+        filepath = bpy.path.abspath(self.filepath)
+        try:
+            profiler.dump(filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Не удалось сохранить профиль: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Profile saved to {filepath}")
+        return {'FINISHED'}
+
+class CLONER_PT_profiling_panel(Panel):
+    bl_label = "Profiling"
+    bl_idname = "CLONER_PT_profiling_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Cloners"
+    bl_parent_id = "CLONER_PT_main_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        row = layout.row(align=True)
+        row.operator("object.cloner_toggle_profiling",
+                     text="Stop" if profiler.enabled else "Start",
+                     icon='PAUSE' if profiler.enabled else 'PLAY',
+                     depress=profiler.enabled)
+        row.operator("object.cloner_reset_profiling", text="", icon='TRASH')
+        row.operator("object.cloner_dump_profiling", text="", icon='EXPORT')
+        
+        if not profiler.stats:
+            layout.label(text="No calls recorded")
+            return
+        
+        # ms: суммарное время / p95; nodes и links: создано / удалено
+        col = layout.column(align=True)
+        header = col.row(align=True)
+        for text in ("Function", "Calls", "Total ms", "p95 ms", "Nodes +/-", "Links +/-"):
+            header.label(text=text)
+        for name, stats in profiler.sorted_stats()[:PROFILE_PANEL_ROWS]:
+            r = col.row(align=True)
+            r.label(text=name)
+            r.label(text=str(stats.calls))
+            r.label(text=f"{stats.total_ms:.1f}")
+            r.label(text=f"{stats.p95_ms:.2f}")
+            r.label(text=f"{stats.nodes_created}/{stats.nodes_removed}")
+            r.label(text=f"{stats.links_created}/{stats.links_removed}")
+        hidden = len(profiler.stats) - PROFILE_PANEL_ROWS
+        if hidden > 0:
+            col.label(text=f"... {hidden} more in the saved profile")
+
+# регистрируем всё вместе
+classes = (
+    CLONER_OT_toggle_profiling,
+    CLONER_OT_reset_profiling,
+    CLONER_OT_dump_profiling,
+    CLONER_PT_profiling_panel,
+)
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
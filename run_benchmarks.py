@@ -0,0 +1,363 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks for node group construction, effector relinking and panel drawing.
+
+Measures wall time and Python allocations of:
+    - every *_node_group() builder
+    - create_independent_node_group for each cloner and effector type
+    - update_cloner_with_effectors with 1, 10 and 50 linked effectors
+    - panel draw() with 10, 100 and 500 modifiers on the active object
+
+Usage:
+    python benchmarks/run_benchmarks.py [--output results.json] [--repeat N]
+        Runs in Blender when a blender executable is found (--blender or PATH),
+        otherwise against the in-memory fake bpy (--standin forces it).
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --output results.json
+
+Results are written as JSON for trend tracking; "backend" tells Blender
+numbers apart from fake_bpy numbers, which only measure the Python side
+(node graphs are built and relinked but never evaluated).
+"""
+import argparse
+import datetime
+import gc
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_MODULE = "advanced_cloners"
+RESULTS_SCHEMA = 1
+
+EFFECTOR_COUNTS = (1, 10, 50)
+MODIFIER_COUNTS = (10, 100, 500)
+# В стеке для замера панелей каждый пятый модификатор - клонер,
+# остальные эффекторы, связанные с ближайшим клонером выше
+CLONER_STRIDE = 5
+DRAWN_PANELS = (
+    ("cloner_panel", "CLONER_PT_main_panel"),
+    ("effector_panel", "EFFECTOR_PT_main_panel"),
+)
+
+def install_bpy_standin():
+    """Register the in-memory fake bpy (benchmarks/fake_bpy.py) in sys.modules"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import fake_bpy
+    return fake_bpy.install()
+
+def in_blender():
+    try:
+        import bpy
+    except ImportError:
+        return False
+    return not getattr(bpy, "IS_FAKE", False)
+
+def load_addon():
+    """Import the addon package from the repository, whatever the checkout directory is called"""
+    if ADDON_MODULE in sys.modules:
+        return sys.modules[ADDON_MODULE]
+    spec = importlib.util.spec_from_file_location(
+        ADDON_MODULE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_MODULE] = addon
+    spec.loader.exec_module(addon)
+    return addon
+
+def import_addon_module(name):
+    return importlib.import_module(f"{ADDON_MODULE}.{name}")
+
+# --- Замеры ---
+
+def measure(run, repeat, cleanup=None):
+    """
+    Время и аллокации Python одной операции.
+    
+    run() выполняется repeat раз без трассировки и ещё раз под tracemalloc,
+    cleanup(результат) после каждого запуска в замер не входит.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = run()
+        times.append((time.perf_counter() - start) * 1000.0)
+        if cleanup is not None:
+            cleanup(result)
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if cleanup is not None:
+        cleanup(result)
+    
+    return {
+        "runs": repeat,
+        "wall_ms_min": min(times),
+        "wall_ms_median": statistics.median(times),
+        "wall_ms_mean": statistics.fmean(times),
+        "alloc_kib_peak": peak / 1024.0,
+        "alloc_kib_net": current / 1024.0,
+    }
+
+def node_group_names():
+    import bpy
+    return {node_group.name for node_group in bpy.data.node_groups}
+
+def remove_new_node_groups(existing_names):
+    """Remove unused node groups created since existing_names was taken (templates are kept)"""
+    import bpy
+    node_utils = import_addon_module("utils.node_utils")
+    for node_group in list(bpy.data.node_groups):
+        if node_group.name in existing_names or node_utils.TEMPLATE_SUFFIX in node_group.name:
+            continue
+        if node_group.users == 0:
+            bpy.data.node_groups.remove(node_group)
+
+def new_object(name):
+    import bpy
+    mesh = bpy.data.meshes.new(name)
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+def remove_object(obj):
+    import bpy
+    mesh = obj.data
+    bpy.data.objects.remove(obj, do_unlink=True)
+    if mesh is not None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+
+def add_node_modifier(obj, name, creator_func, base_node_name):
+    """Add a geometry nodes modifier with an independent copy of a cloner/effector graph"""
+    node_utils = import_addon_module("utils.node_utils")
+    modifier = obj.modifiers.new(name=name, type='NODES')
+    modifier.node_group = node_utils.create_independent_node_group(creator_func, base_node_name)
+    return modifier
+
+def add_cloner(obj, addon, name, effector_names=()):
+    modifier = add_node_modifier(obj, name, addon.CLONER_CREATORS["GRID"], addon.CLONER_GROUP_NAMES["GRID"])
+    modifier.node_group["linked_effectors"] = list(effector_names)
+    return modifier
+
+def add_effector(obj, addon, name):
+    socket_schema = import_addon_module("utils.socket_schema")
+    modifier = add_node_modifier(obj, name, addon.EFFECTOR_CREATORS["RANDOM"], addon.EFFECTOR_GROUP_NAMES["RANDOM"])
+    socket_schema.set_modifier_inputs(modifier, {"Enable": True, "Strength": 1.0, "Position": (0.1, 0.1, 0.1)})
+    return modifier
+
+def bench_builders(addon, repeat):
+    """Wall time and allocations of every node group builder"""
+    results = {}
+    for group_name, creator_func in addon.get_node_group_creators().items():
+        existing = node_group_names()
+        results[group_name] = measure(creator_func, repeat, lambda node_group: remove_new_node_groups(existing))
+    return results
+
+def bench_independent_copies(addon, repeat):
+    """create_independent_node_group with a warm template"""
+    node_utils = import_addon_module("utils.node_utils")
+    creators = {}
+    for kind in ("CLONER", "EFFECTOR"):
+        for type_id, creator_func in getattr(addon, f"{kind}_CREATORS").items():
+            creators[getattr(addon, f"{kind}_GROUP_NAMES")[type_id]] = creator_func
+    
+    results = {}
+    for base_node_name, creator_func in creators.items():
+        node_utils.get_node_group_template(creator_func, base_node_name)
+        existing = node_group_names()
+        results[base_node_name] = measure(
+            lambda: node_utils.create_independent_node_group(creator_func, base_node_name),
+            repeat, lambda node_group: remove_new_node_groups(existing),
+        )
+    return results
+
+def bench_effector_relinking(addon, repeat, effector_counts=EFFECTOR_COUNTS):
+    """update_cloner_with_effectors on a grid cloner with N linked effectors"""
+    cloner_utils = import_addon_module("utils.cloner_utils")
+    dependency_manager = import_addon_module("utils.dependency_manager")
+    results = {}
+    for count in effector_counts:
+        existing = node_group_names()
+        obj = new_object(f"Benchmark Relink {count}")
+        try:
+            effector_names = [add_effector(obj, addon, f"Random Effector.{i:03d}").name for i in range(count)]
+            cloner_mod = add_cloner(obj, addon, "Grid Cloner", effector_names)
+            dependency_manager.cloner_index.invalidate(obj)
+            results[str(count)] = {
+                "full_rebuild": measure(
+                    lambda: cloner_utils.update_cloner_with_effectors(obj, cloner_mod, full_rebuild=True), repeat),
+                "incremental": measure(
+                    lambda: cloner_utils.update_cloner_with_effectors(obj, cloner_mod), repeat),
+            }
+        finally:
+            remove_object(obj)
+            remove_new_node_groups(existing)
+    return results
+
+class RecordingLayout:
+    """UILayout stand-in for draw(): counts the elements a panel creates"""
+    
+    def __init__(self, counter):
+        self._counter = counter
+    
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        def element(*args, **kwargs):
+            self._counter[name] += 1
+            return RecordingLayout(self._counter)
+        return element
+
+class DrawContext:
+    """Draw context with a given active object; everything else comes from bpy.context"""
+    
+    def __init__(self, obj):
+        self.active_object = obj
+        self.object = obj
+    
+    def __getattr__(self, name):
+        import bpy
+        return getattr(bpy.context, name)
+
+def make_panel(panel_cls, counter):
+    """Instance of a panel's methods with a recording layout (UILayout only exists while Blender draws)"""
+    namespace = {key: value for key, value in vars(panel_cls).items() if not key.startswith("__")}
+    panel = type(panel_cls.__name__, (), namespace)()
+    panel.layout = RecordingLayout(counter)
+    return panel
+
+def bench_panel_draw(addon, repeat, modifier_counts=MODIFIER_COUNTS):
+    """draw() of the sidebar panels with N modifiers on the active object"""
+    cloner_utils = import_addon_module("utils.cloner_utils")
+    dependency_manager = import_addon_module("utils.dependency_manager")
+    panels = [getattr(import_addon_module(f"src.ui.{module}"), class_name) for module, class_name in DRAWN_PANELS]
+    results = {}
+    for count in modifier_counts:
+        existing = node_group_names()
+        obj = new_object(f"Benchmark Draw {count}")
+        try:
+            cloner_mod = None
+            for i in range(count):
+                if i % CLONER_STRIDE == 0:
+                    cloner_mod = add_cloner(obj, addon, f"Grid Cloner.{i:03d}")
+                    continue
+                effector_mod = add_effector(obj, addon, f"Random Effector.{i:03d}")
+                cloner_mod.node_group["linked_effectors"] = list(cloner_mod.node_group["linked_effectors"]) + [effector_mod.name]
+            dependency_manager.cloner_index.invalidate(obj)
+            for modifier in list(obj.modifiers):
+                if modifier.node_group and "linked_effectors" in modifier.node_group:
+                    cloner_utils.update_cloner_with_effectors(obj, modifier, full_rebuild=True)
+            
+            context = DrawContext(obj)
+            panel_results = {}
+            for panel_cls in panels:
+                counter = Counter()
+                panel = make_panel(panel_cls, counter)
+                panel_results[panel_cls.__name__] = measure(lambda: panel.draw(context), repeat)
+                panel_results[panel_cls.__name__]["layout_elements"] = sum(counter.values()) // (repeat + 1)
+            results[str(count)] = panel_results
+        finally:
+            remove_object(obj)
+            remove_new_node_groups(existing)
+    return results
+
+BENCHMARKS = (
+    ("builders", bench_builders),
+    ("create_independent_node_group", bench_independent_copies),
+    ("update_cloner_with_effectors", bench_effector_relinking),
+    ("panel_draw", bench_panel_draw),
+)
+
+def run_benchmarks(backend, repeat, selected=None):
+    """Register the addon, run the benchmarks and return the JSON-ready results"""
+    import bpy
+    addon = load_addon()
+    addon.register()
+    results = {}
+    try:
+        for name, benchmark in BENCHMARKS:
+            if selected and name not in selected:
+                continue
+            try:
+                results[name] = benchmark(addon, repeat)
+            except Exception as e:
+                print(f"Ошибка в замере {name}: {e}")
+                results[name] = {"error": str(e)}
+    finally:
+        addon.unregister()
+    
+    report = {
+        "schema": RESULTS_SCHEMA,
+        "backend": backend,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "blender": bpy.app.version_string if backend == "blender" else None,
+        "addon_version": list(addon.bl_info["version"]),
+        "template_version": import_addon_module("utils.node_utils").TEMPLATE_VERSION,
+        "repeat": repeat,
+        "results": results,
+    }
+    return report
+
+def run_in_blender(blender, args):
+    """Run this script inside blender --background and return its results"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.json")
+        command = [blender, "--background", "--factory-startup", "--python", os.path.abspath(__file__),
+                   "--", "--output", output, "--repeat", str(args.repeat)]
+        for name in args.only or ():
+            command += ["--only", name]
+        subprocess.run(command, check=True)
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Advanced Cloners benchmarks")
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement")
+    parser.add_argument("--only", action="append", choices=[name for name, _ in BENCHMARKS],
+                        help="run only the given benchmark (repeatable)")
+    parser.add_argument("--blender", help="blender executable (default: blender on PATH)")
+    parser.add_argument("--standin", action="store_true", help="use the fake bpy even if Blender is available")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    if argv is None:
+        # Внутри Blender аргументы скрипта идут после "--"
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    args = parse_args(argv)
+    
+    blender = None if args.standin else (args.blender or shutil.which("blender"))
+    if in_blender():
+        report = run_benchmarks("blender", args.repeat, args.only)
+    elif blender:
+        report = run_in_blender(blender, args)
+    else:
+        install_bpy_standin()
+        report = run_benchmarks("fake_bpy", args.repeat, args.only)
+    
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import bpy
+from collections import namedtuple
+from bpy.app.handlers import persistent
+
+# Описание сокета интерфейса; category - имя панели интерфейса ("" вне панелей)
+SocketEntry = namedtuple("SocketEntry", ("name", "identifier", "in_out", "socket_type", "category", "default"))
+
+# Владелец подписок msgbus на переименование сокетов
+_MSGBUS_OWNER = object()
+
+class SocketSchema:
+    """Name -> socket lookup tables of one node group interface, built with a single items_tree walk"""
+    
+    def __init__(self, node_group):
+        self.inputs = {}    # имя -> SocketEntry, в порядке интерфейса
+        self.outputs = {}
+        self.revision = len(node_group.interface.items_tree)
+        for item in node_group.interface.items_tree:
+            if item.item_type != 'SOCKET':
+                continue
+            parent = getattr(item, "parent", None)
+            entry = SocketEntry(
+                item.name,
+                item.identifier,
+                item.in_out,
+                item.socket_type,
+                parent.name if parent is not None else "",
+                getattr(item, "default_value", None),
+            )
+            sockets = self.inputs if item.in_out == 'INPUT' else self.outputs
+            # При совпадающих именах берём первый сокет, как и прежние обходы
+            sockets.setdefault(item.name, entry)
+    
+    def identifier(self, name, in_out='INPUT'):
+        """Identifier of a socket by name, or None"""
+        entry = (self.inputs if in_out == 'INPUT' else self.outputs).get(name)
+        return entry.identifier if entry else None
+
+class SocketSchemaCache:
+    """
+    Кэш схем интерфейсов нод-групп.
+    
+    Схема строится один раз на нод-группу и сбрасывается, когда меняется
+    интерфейс: число элементов служит ревизией для добавления и удаления
+    сокетов, обновления нод-дерева в depsgraph и переименования через
+    msgbus сбрасывают кэш явно.
+    """
+    
+    def __init__(self):
+        self._schemas = {}  # (указатель, имя группы) -> SocketSchema
+    
+    @staticmethod
+    def _key(node_group):
+        return node_group.as_pointer(), node_group.name_full
+    
+    def get(self, node_group):
+        key = self._key(node_group)
+        schema = self._schemas.get(key)
+        if schema is None or schema.revision != len(node_group.interface.items_tree):
+            schema = SocketSchema(node_group)
+            self._schemas[key] = schema
+        return schema
+    
+    def invalidate(self, node_group=None):
+        if node_group is None:
+            self._schemas.clear()
+        else:
+            self._schemas.pop(self._key(node_group), None)
+
+# Global socket schema cache
+socket_schema = SocketSchemaCache()
+
+def get_socket_schema(node_group):
+    """Cached socket schema of a node group"""
+    return socket_schema.get(node_group)
+
+def get_input_identifier(node_group, name):
+    """Identifier of a node group input by name, or None"""
+    return socket_schema.get(node_group).identifier(name)
+
+def get_modifier_input(mod, name, default=None):
+    """Read a geometry nodes modifier input by socket name"""
+    identifier = get_input_identifier(mod.node_group, name)
+    if identifier is None:
+        return default
+    return mod.get(identifier, default)
+
+def set_modifier_inputs(mod, values):
+    """
+    Записывает входы модификатора по именам сокетов.
+    
+    Returns:
+        Количество записанных входов; отсутствующие сокеты пропускаются
+    """
+    schema = socket_schema.get(mod.node_group)
+    written = 0
+    for name, value in values.items():
+        identifier = schema.identifier(name)
+        if identifier is None:
+            continue
+        try:
+            mod[identifier] = value
+            written += 1
+        except Exception as e:
+            print(f"Не удалось установить {name}: {e}")
+    return written
+
+@persistent
+def _invalidate_changed_trees(scene, depsgraph):
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.NodeTree):
+            socket_schema.invalidate(update.id.original)
+
+@persistent
+def _clear_socket_schema(*args):
+    socket_schema.invalidate()
+    _subscribe_socket_renames()
+
+def _subscribe_socket_renames():
+    bpy.msgbus.clear_by_owner(_MSGBUS_OWNER)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.NodeTreeInterfaceSocket, "name"),
+        owner=_MSGBUS_OWNER,
+        args=(),
+        notify=socket_schema.invalidate,
+    )
+
+_CLEAR_HANDLERS = (
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+    bpy.app.handlers.load_post,
+)
+
+def register():
+    _subscribe_socket_renames()
+    if _invalidate_changed_trees not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_invalidate_changed_trees)
+    for handlers in _CLEAR_HANDLERS:
+        if _clear_socket_schema not in handlers:
+            handlers.append(_clear_socket_schema)
+
+def unregister():
+    bpy.msgbus.clear_by_owner(_MSGBUS_OWNER)
+    if _invalidate_changed_trees in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_invalidate_changed_trees)
+    for handlers in _CLEAR_HANDLERS:
+        if _clear_socket_schema in handlers:
+            handlers.remove(_clear_socket_schema)
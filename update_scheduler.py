@@ -0,0 +1,106 @@
+import bpy
+from bpy.app.handlers import persistent
+
+# Задержка перед пересборкой: операторы и скрипты в пределах одного
+# цикла событий успевают пометить все затронутые клонеры
+UPDATE_DELAY = 0.01
+
+class ClonerUpdateScheduler:
+    """
+    Отложенное обновление клонеров.
+    
+    Операторы помечают клонеры как грязные, один таймер bpy.app.timers
+    затем пересобирает каждый клонер один раз, сколько бы эффекторов
+    к нему ни привязали за это время. Скрипты, которым результат нужен
+    сразу, вызывают flush().
+    """
+    
+    def __init__(self):
+        self.dirty = {}  # (имя объекта, имя клонера) -> нужна ли полная пересборка
+    
+    def mark(self, obj, cloner_mod, full_rebuild=False):
+        """Mark a cloner for rebuilding; full_rebuild requests are kept until the flush"""
+        key = (obj.name, cloner_mod.name)
+        self.dirty[key] = self.dirty.get(key, False) or full_rebuild
+        if not bpy.app.timers.is_registered(_flush_timer):
+            bpy.app.timers.register(_flush_timer, first_interval=UPDATE_DELAY)
+    
+    def mark_object(self, obj):
+        """Mark every cloner of an object"""
+        from .dependency_manager import cloner_index
+        for cloner_name in cloner_index.cloners(obj):
+            cloner_mod = obj.modifiers.get(cloner_name)
+            if cloner_mod is not None:
+                self.mark(obj, cloner_mod)
+    
+    def flush(self):
+        """
+        Пересобирает все помеченные клонеры.
+        
+        Returns:
+            Количество пересобранных клонеров
+        """
+        from .cloner_utils import update_cloner_with_effectors
+        dirty, self.dirty = self.dirty, {}
+        updated = 0
+        for (object_name, cloner_name), full_rebuild in dirty.items():
+            obj = bpy.data.objects.get(object_name)
+            cloner_mod = obj.modifiers.get(cloner_name) if obj else None
+            if cloner_mod is None:
+                continue
+            try:
+                update_cloner_with_effectors(obj, cloner_mod, full_rebuild=full_rebuild)
+                updated += 1
+            except Exception as e:
+                print(f"Ошибка при обновлении клонера {cloner_name}: {e}")
+        return updated
+    
+    def cancel(self):
+        self.dirty.clear()
+        if bpy.app.timers.is_registered(_flush_timer):
+            bpy.app.timers.unregister(_flush_timer)
+
+# Global cloner update scheduler
+update_scheduler = ClonerUpdateScheduler()
+
+def mark_cloner_dirty(obj, cloner_mod, full_rebuild=False):
+    """Schedule a cloner rebuild for the next timer tick"""
+    update_scheduler.mark(obj, cloner_mod, full_rebuild)
+
+def flush_cloner_updates():
+    """Rebuild every scheduled cloner now"""
+    if bpy.app.timers.is_registered(_flush_timer):
+        bpy.app.timers.unregister(_flush_timer)
+    return update_scheduler.flush()
+
+def _flush_timer():
+    update_scheduler.flush()
+    return None  # Таймер одноразовый, следующий mark() зарегистрирует его снова
+
+@persistent
+def _resync_after_undo(*args):
+    # Шаг отмены мог быть записан до срабатывания таймера: сверяем графы
+    # клонеров со списками эффекторов (обновление инкрементальное и дешёвое)
+    update_scheduler.dirty.clear()
+    for obj in bpy.data.objects:
+        if any(mod.type == 'NODES' for mod in obj.modifiers):
+            update_scheduler.mark_object(obj)
+
+@persistent
+def _cancel_on_load(*args):
+    update_scheduler.cancel()
+
+def register():
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if _resync_after_undo not in handlers:
+            handlers.append(_resync_after_undo)
+    if _cancel_on_load not in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.append(_cancel_on_load)
+
+def unregister():
+    update_scheduler.cancel()
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if _resync_after_undo in handlers:
+            handlers.remove(_resync_after_undo)
+    if _cancel_on_load in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(_cancel_on_load)